@@ -1,21 +1,26 @@
 # app.py - FastAPI Backend
 from fastapi import FastAPI, File, UploadFile, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
-import uvicorn
 from services.model_runner import ModelRunner
+from services.datasets import load_dataset, open_dataset
+from services.feature_specs import AIRLINE_SPEC, BITCOIN_STATE_COLS
+from services.history import HistoryStore, encode_binary, encode_json
 from services.stt_service import STTService
-# Prefer DeepFace-based detector (multi-class) with fallback
-from services.emotion_deepface import analyze_image_file
-from services.stt_service import STTService
+from services.inference_executor import InferenceExecutor
+from services.json_cache import VersionedJsonCache, etag_matches
 import os
-import pandas as pd
 from pathlib import Path
 import random
-import numpy as np
 from fastapi import Request
 from typing import List, Dict, Any
 
+# pandas and the DeepFace/TensorFlow/OpenCV stack are imported inside the
+# endpoints that need them, so the API answers prediction traffic without
+# paying for them at startup (see scripts/bench_startup.py). numpy and joblib
+# are still imported here through the services: every prediction needs them.
+
 app = FastAPI(title="Jarvis TEC API")
 
 # Configurar CORS
@@ -29,7 +34,127 @@ app.add_middleware(
 
 # Inicializar servicios
 model_runner = ModelRunner()
-stt_service = STTService()
+# Blocking work (sklearn, DeepFace, STT SDKs) runs in these pools, never on the
+# event loop; INFERENCE_POOLS assigns models to thread or process pools
+inference = InferenceExecutor(model_runner)
+stt_service = STTService(executor=inference.thread_pool("stt"))
+
+# Micro-batching (opt-in): concurrent single-row predictions for the same model
+# are scored together in one vectorized call (see services/micro_batcher.py)
+micro_batcher = None
+if os.getenv("MICROBATCH_ENABLED", "0") == "1":
+    from services.micro_batcher import MicroBatcher
+    micro_batcher = MicroBatcher(inference.predict_batch)
+
+
+async def _predict_row(model_name: str, features=None, params=None):
+    """Single-row prediction, routed through the micro-batcher when enabled."""
+    if micro_batcher is not None:
+        return await micro_batcher.predict(model_name, features=features, params=params)
+    return await inference.predict(model_name, features=features, params=params)
+
+
+# Metadata payloads (/api/v1/meta/*, /api/v1/airline/metadata) are serialized once
+# per artifact/dataset version and served with ETag / If-None-Match
+AIRLINE_DATASET = Path(__file__).parent / 'datasets' / 'airline' / 'DelayedFlights.csv'
+meta_cache = VersionedJsonCache()
+# Series históricas OHLCV (tickers S&P 500 del store + BTC) para graficar
+history = HistoryStore(model_runner.ticker_index)
+# Tickers listados en la respuesta de texto del comando sp500 (la lista completa va en 'forecasts')
+SP500_COMMAND_MAX_TICKERS = 10
+
+
+def _file_version(path: Path):
+    try:
+        st = path.stat()
+        return (st.st_mtime_ns, st.st_size)
+    except OSError:
+        return 'missing'
+
+
+def _model_version(model_name: str):
+    """Version of the loaded artifact, or of the file on disk while it is not loaded.
+
+    Both are the (mtime_ns, size) of the same .joblib, so the key does not change
+    when a lazy model is evicted, and a missing artifact is 'missing' (never None:
+    a None version is never cached and the payload would be rebuilt per request).
+    """
+    return model_runner.artifact_version(model_name) or _file_version(Path(model_runner.model_dir) / f"{model_name}.joblib")
+
+
+# name -> (version of the source, payload builder); builders are defined with their endpoints
+META_PAYLOADS = {
+    'meta_movies': (lambda: _model_version('movie_recommender'), lambda: _movie_metadata()),
+    'meta_airports': (lambda: _file_version(AIRLINE_DATASET), lambda: _airport_metadata()),
+    'airline_metadata': (lambda: _model_version('airline_delay_model'), lambda: _airline_model_metadata()),
+}
+
+
+async def _cached_json(request: Request, name: str) -> Response:
+    """Cached JSON body of META_PAYLOADS[name]; 304 when the client's ETag is current."""
+    version_fn, build = META_PAYLOADS[name]
+    entry = meta_cache.peek(name, version_fn())
+    if entry is None:
+        # building may read a CSV or load an artifact: keep it off the event loop
+        entry = await inference.run('meta', meta_cache.get, name, version_fn, build)
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get('if-none-match'), entry.etag):
+        meta_cache.count_not_modified()
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+
+def _warm_metadata() -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    for name, (version_fn, build) in META_PAYLOADS.items():
+        try:
+            results[name] = len(meta_cache.get(name, version_fn, build).body)
+        except Exception as e:
+            results[name] = str(e)
+    return results
+
+
+# Readiness: false until the warm-up has pushed a synthetic request through
+# every loaded model and the emotion backend (see /api/health/ready)
+readiness: Dict[str, Any] = {"ready": False, "warmup": None}
+
+
+def _warm_up():
+    results: Dict[str, Any] = {"models": model_runner.warm_up()}
+    results["metadata"] = _warm_metadata()
+    if os.getenv("WARMUP_EMOTION", "1") != "0":
+        try:
+            from services.emotion_deepface import warm_up as warm_up_emotion
+            results["emotion"] = warm_up_emotion()
+        except Exception as e:
+            results["emotion"] = {"ok": False, "error": str(e)}
+    readiness["warmup"] = results
+    readiness["ready"] = True
+    print(f"[READY] warm-up completo: {sum(1 for r in results['models'].values() if r['ok'])}/{len(results['models'])} modelos")
+
+
+@app.on_event("startup")
+async def start_background_tasks():
+    # Runs in every worker (after the fork under gunicorn)
+    model_runner.start_watcher()  # no-op unless MODEL_WATCH_INTERVAL > 0
+    try:
+        inference.start()  # worker processes for models assigned to process pools
+    except Exception as e:
+        print(f"[Inference] ERROR iniciando workers: {e}")
+    if os.getenv("WARMUP_ON_STARTUP", "1") == "0":
+        readiness["ready"] = True
+    else:
+        import threading
+        threading.Thread(target=_warm_up, name="warm-up", daemon=True).start()
+
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    model_runner.stop_watcher()
+    if micro_batcher is not None:
+        await micro_batcher.close()  # responde las filas en cola antes de cerrar los pools
+    inference.shutdown()
+
 
 # local emotion detector uses Haar cascades
 def _save_upload_to_temp(upload: UploadFile) -> str:
@@ -75,9 +200,11 @@ async def face_sentiment(image: UploadFile = File(...)):
     Returns a small JSON with dominant_emotion, face_count and details.
     """
     try:
+        # Prefer DeepFace-based detector (multi-class) with fallback
+        from services.emotion_deepface import analyze_image_file
         # save temporary file
         tmp = _save_upload_to_temp(image)
-        res = analyze_image_file(tmp)
+        res = await inference.run("emotion", analyze_image_file, tmp)
         try:
             os.remove(tmp)
         except Exception:
@@ -93,7 +220,7 @@ async def process_command(request: TextRequest):
     """
     try:
         # Ejecutar modelo
-        response = model_runner.run_model(request.text)
+        response = await inference.run("command", model_runner.run_model, request.text)
         
         return {"response": response}
     except Exception as e:
@@ -105,6 +232,12 @@ async def execute_command(payload: dict):
     Ejecutar comando parseado desde el frontend.
     Espera: { "text": "...", "task": "...", "params": {...} }
     """
+    # Las ramas por tarea llaman a los modelos de forma síncrona: se ejecutan en
+    # el pool "command" para no bloquear el event loop
+    return await inference.run("command", _execute_command, payload)
+
+
+def _execute_command(payload: dict):
     try:
         text = payload.get('text', '')
         task = payload.get('task', '')
@@ -162,12 +295,13 @@ async def execute_command(payload: dict):
         elif task == 'bitcoin':
             # Predicción Bitcoin - Proyección estadística desde precio base del dataset
             try:
+                import pandas as pd
                 years = float(params.get('years', params.get('days', 1)))
                 # convert years to days
                 horizon_days = int(years * 365)
 
                 # Load trained bitcoin model package
-                bm = model_runner.models.get('bitcoin_model')
+                bm = model_runner.get_package('bitcoin_model')
                 if bm is None:
                     return {"response": "₿ Bitcoin model not available on server"}
 
@@ -178,31 +312,19 @@ async def execute_command(payload: dict):
                     # some saved formats store the model directly; handle both
                     model_pkg = {'model': bm, 'last_date': None}
 
-                model_obj = model_pkg.get('model')
                 last_date = model_pkg.get('last_date')
 
-                # For features we will use a naive approach: use the most recent row from the dataset
-                btc_csv = Path(__file__).parent / 'datasets' / 'bitcoin' / 'bitcoin_price_Training - Training.csv'
-                if btc_csv.exists():
-                    df = pd.read_csv(btc_csv)
-                    # ensure numeric close
-                    price_col = next((c for c in df.columns if 'close' in c.lower() or 'price' in c.lower()), 'Close')
-                    df['price'] = pd.to_numeric(df[price_col].str.replace(',', ''), errors='coerce') if df[price_col].dtype == object else pd.to_numeric(df[price_col], errors='coerce')
-                    df['price_lag_1'] = df['price'].shift(1)
-                    df['price_lag_2'] = df['price'].shift(2)
-                    df['price_lag_3'] = df['price'].shift(3)
-                    df['price_lag_7'] = df['price'].shift(7)
-                    df['rolling_mean_7'] = df['price'].rolling(7).mean()
-                    df['rolling_mean_30'] = df['price'].rolling(30).mean()
-                    recent = df.dropna().iloc[-1]
-                    features = [recent['price_lag_1'], recent['price_lag_2'], recent['price_lag_3'], recent['price_lag_7'], recent['rolling_mean_7'], recent['rolling_mean_30'], horizon_days]
+                # Último estado de la serie guardado en el paquete (o cacheado por ModelRunner):
+                # ninguna lectura del CSV por petición
+                state = model_runner.latest_features('bitcoin_model')
+                if state:
+                    features = [state[c] for c in BITCOIN_STATE_COLS] + [horizon_days]
                 else:
                     # fallback synthetic features
                     features = [45000.0, 44900.0, 44850.0, 44700.0, 44800.0, 45000.0, horizon_days]
 
-                X = np.array(features).reshape(1, -1)
-                pred = model_obj.predict(X)
-                price_usd = float(pred[0])
+                result = model_runner.predict('bitcoin_model', features=features)
+                price_usd = float(result['prediction'][0])
 
                 # Compute exact date if metadata present
                 target_date = None
@@ -285,16 +407,32 @@ async def execute_command(payload: dict):
                 response_text = f"🚗 Error: {str(e)}"
         
         elif task == 'sp500':
-            # Predicción S&P 500 - Proyección estadística desde precio base del dataset
+            # Predicción S&P 500: por ticker ('ticker' / 'tickers') con el modelo por ticker
+            # sobre el índice OHLCV del store; sin ticker, el índice proxy de sp500_model
             try:
                 days = params.get('days', params.get('years', 1))
-                
-                # Leer precio actual del dataset
+                tickers = params.get('tickers', params.get('ticker'))
+                if tickers and model_runner.ticker_index() is not None:
+                    res = model_runner.forecast_tickers(tickers, max(1, int(float(days))))
+                    shown = res['forecasts'][:SP500_COMMAND_MAX_TICKERS]
+                    parts = [f"{f['ticker']} ${f['predicted_close']:,.2f} ({f['change_pct']:+.1f}%)" for f in shown]
+                    response_text = f"📈 S&P 500 en {days} día{'s' if days != 1 else ''}: " + " | ".join(parts or ['sin datos'])
+                    if len(res['forecasts']) > len(shown):
+                        response_text += f" | +{len(res['forecasts']) - len(shown)} tickers más"
+                    if res['missing']:
+                        response_text += f" | Tickers no encontrados: {', '.join(res['missing'])}"
+                    return {"response": response_text, "forecasts": res['forecasts']}
+                if model_runner.get_package('sp500_model') is not None:
+                    res = model_runner.predict('sp500_model', params={'days': days})
+                    price = float(res['prediction'][0])
+                    return {"response": f"📈 S&P 500 (índice proxy) en {days} día{'s' if days != 1 else ''}: ${price:,.2f}"}
+
+                # Sin modelos: proyección desde el precio base del dataset
                 dataset_path = Path(__file__).parent / 'datasets' / 'all_stocks_5yr.csv'
                 base_price = 4500.0  # Precio fallback
                 
                 if dataset_path.exists():
-                    df = pd.read_csv(dataset_path, nrows=1000)
+                    df = load_dataset(dataset_path, nrows=1000)
                     if 'close' in df.columns:
                         try:
                             base_price = float(df['close'].mean())
@@ -314,6 +452,7 @@ async def execute_command(payload: dict):
         elif task == 'avocado':
             # Predicción aguacate - Proyección estadística desde precio base del dataset
             try:
+                import pandas as pd
                 days = params.get('days', params.get('years', 1))
                 
                 # Leer precio actual del dataset
@@ -321,7 +460,7 @@ async def execute_command(payload: dict):
                 base_price = 1.40  # Precio fallback
                 
                 if dataset_path.exists():
-                    df = pd.read_csv(dataset_path, nrows=100)
+                    df = load_dataset(dataset_path, nrows=100)
                     price_col = next((col for col in df.columns if 'price' in col.lower() or 'averageprice' in col.lower()), None)
                     if price_col:
                         try:
@@ -422,61 +561,17 @@ async def execute_command(payload: dict):
                 dest = params.get('dest') or params.get('destination')
                 carrier = params.get('carrier') or params.get('unique_carrier')
 
-                # Si hay modelo entrenado, replicar la lógica de predict_airline
+                # Si hay modelo entrenado: mismo spec de features que /api/v1/predict/airline
                 if 'airline_delay_model' in model_runner.get_available_models():
-                    pkg = model_runner.models.get('airline_delay_model')
-                    model_obj = pkg['model'] if isinstance(pkg, dict) and 'model' in pkg else pkg
-                    encs = pkg.get('encoders', {}) if isinstance(pkg, dict) else {}
-                    # Defaults
-                    params_air = {
-                        'Month': month,
-                        'DayofMonth': day,
-                        'DayOfWeek': params.get('day_of_week', 3),
-                        'CRSDepTime': params.get('crs_dep_time', 1200),
-                        'CRSArrTime': params.get('crs_arr_time', 1400),
-                        'CRSElapsedTime': params.get('crs_elapsed', 120),
-                        'Distance': distance,
-                        'Origin': (origin or 'OTHER'),
-                        'Dest': (dest or 'OTHER'),
-                        'UniqueCarrier': (carrier or 'XX')
-                    }
-
-                    # Encode categorical with saved encoders
-                    try:
-                        origin_le = encs['origin'].transform([params_air['Origin']])[0]
-                    except Exception:
-                        origin_le = encs['origin'].transform(['OTHER'])[0] if 'origin' in encs else 0
+                    result = model_runner.predict('airline_delay_model', params=params)
                     try:
-                        dest_le = encs['dest'].transform([params_air['Dest']])[0]
+                        pred = int(result['prediction'][0])
                     except Exception:
-                        dest_le = encs['dest'].transform(['OTHER'])[0] if 'dest' in encs else 0
-                    try:
-                        carrier_le = encs['carrier'].transform([params_air['UniqueCarrier']])[0]
-                    except Exception:
-                        carrier_le = 0
-
-                    feature_list = [
-                        float(params_air['Month']),
-                        float(params_air['DayofMonth']),
-                        float(params_air['DayOfWeek']),
-                        float(params_air['CRSDepTime']),
-                        float(params_air['CRSArrTime']),
-                        float(params_air['CRSElapsedTime']),
-                        float(params_air['Distance']),
-                        float(origin_le),
-                        float(dest_le),
-                        float(carrier_le)
-                    ]
-
-                    X = np.array(feature_list).reshape(1, -1)
+                        pred = None
                     try:
-                        prob = float(model_obj.predict_proba(X)[0,1]) if hasattr(model_obj, 'predict_proba') else None
+                        prob = float(result['proba'][0][1]) if 'proba' in result else None
                     except Exception:
                         prob = None
-                    try:
-                        pred = int(model_obj.predict(X)[0])
-                    except Exception:
-                        pred = None
 
                     status = "Con retraso ⏰" if pred == 1 else ("A tiempo ✈️" if pred == 0 else "Desconocido")
                     response_text = f"✈️ {status} (Mes: {month}, Día: {day}, Distancia: {distance} mi"
@@ -501,6 +596,23 @@ async def execute_command(payload: dict):
         return {"response": f"❌ Error: {str(e)}"}
 
 
+@app.post('/api/v1/models/reload')
+async def reload_models(payload: dict = None):
+    """Reload model artifacts from backend/models/ without restarting.
+
+    {"model": "bitcoin_model"} forces a reload of that artifact; an empty body
+    reloads every artifact whose file changed since it was loaded.
+    """
+    try:
+        name = payload.get('model') if isinstance(payload, dict) else None
+        if name:
+            ok = model_runner.reload_model(name)
+            return {"reloaded": [name] if ok else [], "errors": [] if ok else [name]}
+        return model_runner.reload_changed(settle_seconds=0)
+    except Exception as e:
+        return {"error": str(e)}
+
+
 @app.post('/api/v1/models/{model_name}')
 async def predict_model(model_name: str, payload: dict):
     """Generic model prediction endpoint.
@@ -514,18 +626,105 @@ async def predict_model(model_name: str, payload: dict):
     try:
         features = payload.get('features') if isinstance(payload, dict) else None
         params = payload.get('params') if isinstance(payload, dict) else None
-        res = model_runner.predict(model_name, features=features, params=params)
+        res = await inference.predict(model_name, features=features, params=params)
         return res
     except Exception as e:
         return {"error": str(e)}
 
 
+@app.post('/api/v1/models/{model_name}/batch')
+async def predict_model_batch(model_name: str, payload: dict):
+    """Batch prediction: one vectorized model call for N rows.
+
+    Accepts JSON of the form:
+      {"features": [[..], [..], ...]}  -> explicit feature rows
+      {"params": [{...}, {...}, ...]}  -> one param dict per row
+
+    Returns: {model, count, results: [{model, input, prediction, ...}, ...]}
+    """
+    features = payload.get('features') if isinstance(payload, dict) else None
+    params = payload.get('params') if isinstance(payload, dict) else None
+    if features is not None and not isinstance(features, list):
+        raise HTTPException(status_code=400, detail="'features' debe ser una lista de filas")
+    if params is not None and not isinstance(params, list):
+        raise HTTPException(status_code=400, detail="'params' debe ser una lista de objetos")
+    try:
+        results = await inference.predict_batch(model_name, features=features, params=params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"model": model_name, "count": len(results), "results": results}
+
+
+@app.post('/api/v1/forecast/{model_name}')
+async def forecast_curve(model_name: str, payload: dict):
+    """Whole forecast series of a time-series model in one call.
+
+    model_name: bitcoin | sp500 | avocado (or the *_model artifact name).
+    Accepts JSON {"start": 1, "end": 365, "step": 7}; horizons are days for
+    bitcoin/sp500 and months for avocado. Target dates are computed from the
+    package's last_date.
+
+    Returns: {model, unit, last_date, horizons: [...], dates: [...], predictions: [...]}
+    """
+    payload = payload if isinstance(payload, dict) else {}
+    try:
+        start = int(payload.get('start', 1))
+        end = int(payload.get('end', start))
+        step = int(payload.get('step', 1))
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="'start', 'end' y 'step' deben ser enteros")
+    try:
+        return await inference.run(model_name, model_runner.forecast, model_name, start, end, step)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get('/api/v1/history')
+async def list_history_symbols():
+    """Symbols with history: BTC plus every ticker of the S&P 500 store."""
+    return {"symbols": await inference.run('history', history.symbols)}
+
+
+@app.get('/api/v1/history/{symbol}')
+async def get_history(symbol: str, request: Request, start: str = None, end: str = None,
+                      points: int = None, format: str = None):
+    """OHLCV rows of a symbol (S&P 500 ticker or BTC) between start and end (inclusive).
+
+    Query: start / end (YYYY-MM-DD, optional), points (downsample to at most N
+    buckets: first open, max high, min low, last close, summed volume) and
+    format=json|binary (or Accept: application/octet-stream).
+
+    JSON is columnar: {symbol, rows, date: [...], open: [...], high, low, close, volume}.
+    Binary: b"OHLC", uint32 header length, JSON header with column offsets,
+    then date (int64 days since 1970-01-01) and OHLCV (float64) columns.
+    """
+    if format is None:
+        format = 'binary' if 'application/octet-stream' in request.headers.get('accept', '') else 'json'
+    if format not in ('json', 'binary'):
+        raise HTTPException(status_code=400, detail="format debe ser 'json' o 'binary'")
+    if points is not None and points < 1:
+        raise HTTPException(status_code=400, detail="'points' debe ser >= 1")
+    try:
+        result = await inference.run('history', history.query, symbol, start, end, points)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]) if e.args else str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if format == 'binary':
+        return StreamingResponse(encode_binary(result), media_type='application/octet-stream')
+    return StreamingResponse(encode_json(result), media_type='application/json')
+
+
 @app.post('/api/v1/predict/car')
 async def predict_car(payload: dict):
     try:
         year = payload.get('year', payload.get('y', 2015))
         km = payload.get('km', payload.get('kms', payload.get('mileage', 50000)))
-        res = model_runner.predict('car_model', params={'year': year, 'km': km})
+        res = await _predict_row('car_model', params={'year': year, 'km': km})
         # If ModelRunner returned numeric-only prediction, enrich with conversions here
         if isinstance(res, dict):
             # prefer price_usd if present, else price_rupees, else raw prediction
@@ -565,7 +764,7 @@ async def predict_car(payload: dict):
 async def predict_bitcoin(payload: dict):
     try:
         years = payload.get('years', payload.get('y', 1))
-        res = model_runner.predict('bitcoin_model', params={'years': years})
+        res = await inference.predict('bitcoin_model', params={'years': years})
         return res
     except Exception as e:
         return {"error": str(e)}
@@ -577,7 +776,11 @@ async def predict_movie(payload: dict):
         top_k = int(payload.get('top_k', payload.get('k', 5)))
         genre = payload.get('genre')
         year = payload.get('year')
-        res = model_runner.predict('movie_recommender', params={'top_k': top_k, 'genre': genre, 'year': year})
+        params = {'top_k': top_k, 'genre': genre, 'year': year}
+        if payload.get('genres'):
+            # multi-género: {"genres": ["Comedy", "Romance"], "match": "all" | "any"}
+            params.update(genres=payload.get('genres'), match=payload.get('match', 'any'))
+        res = await inference.predict('movie_recommender', params=params)
         return res
     except Exception as e:
         return {"error": str(e)}
@@ -593,6 +796,35 @@ async def list_models():
         return {"error": str(e)}
 
 
+@app.get('/api/v1/models/report')
+async def models_load_report():
+    """Per-model load time, artifact size and in-memory size (slowest first)."""
+    try:
+        return model_runner.get_load_report()
+    except Exception as e:
+        return {"error": str(e)}
+
+
+@app.get('/api/v1/models/cache')
+async def prediction_cache_stats():
+    """Prediction result cache: size, limits and hit/miss counters (plus the metadata payload cache)."""
+    return {**model_runner.prediction_cache.stats(), "metadata": meta_cache.stats()}
+
+
+@app.delete('/api/v1/models/cache')
+async def clear_prediction_cache(model: str = None):
+    """Drop cached results (all of them, or only ?model=name)."""
+    return {"invalidated": model_runner.prediction_cache.invalidate(model)}
+
+
+@app.get('/api/v1/models/microbatch')
+async def microbatch_stats():
+    """Micro-batcher counters (batches flushed, rows, average batch size)."""
+    if micro_batcher is None:
+        return {"enabled": False}
+    return {"enabled": True, **micro_batcher.stats()}
+
+
 @app.post('/api/v1/predict/bmi')
 async def predict_bmi_endpoint(payload: dict):
     try:
@@ -601,7 +833,7 @@ async def predict_bmi_endpoint(payload: dict):
         age = payload.get('age', 30)
         if h is None or w is None:
             return {"error": "Provide 'height' and 'weight' in payload"}
-        res = model_runner.predict('bmi_model', params={'height': h, 'weight': w, 'age': age})
+        res = await inference.predict('bmi_model', params={'height': h, 'weight': w, 'age': age})
         return res
     except Exception as e:
         return {"error": str(e)}
@@ -611,12 +843,37 @@ async def predict_bmi_endpoint(payload: dict):
 async def predict_sp500(payload: dict):
     try:
         days = payload.get('days', payload.get('years', 1))
-        res = model_runner.predict('sp500_model', params={'days': days})
+        res = await inference.predict('sp500_model', params={'days': days})
         return res
     except Exception as e:
         return {"error": str(e)}
 
 
+@app.post('/api/v1/forecast/sp500/tickers')
+async def forecast_sp500_tickers(payload: dict):
+    """Per-ticker S&P 500 close forecast for a list of tickers in one call.
+
+    Accepts JSON {"tickers": ["AAPL", "MSFT"] | "AAPL,MSFT" | "all", "days": 30}.
+    All tickers are scored with one predict per horizon over the memory-mapped
+    OHLCV index (scripts/ingest_sp500.py + scripts/train_sp500_ticker_model.py).
+
+    Returns: {model, horizon_days, forecasts: [{ticker, last_date, last_close,
+    predicted_close, change_pct, target_date}], missing: [...]}
+    """
+    payload = payload if isinstance(payload, dict) else {}
+    tickers = payload.get('tickers', payload.get('ticker', 'all'))
+    try:
+        days = int(payload.get('days', payload.get('horizon_days', 30)))
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="'days' debe ser un entero")
+    try:
+        return await inference.run('sp500_ticker_model', model_runner.forecast_tickers, tickers, days)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.post('/api/v1/predict/avocado')
 async def predict_avocado(payload: dict):
     try:
@@ -640,7 +897,7 @@ async def predict_avocado(payload: dict):
             horizon_months = 1
 
         # Call ModelRunner to get a prediction (it will build features from params)
-        res = model_runner.predict('avocado_model', params={'months': horizon_months})
+        res = await inference.predict('avocado_model', params={'months': horizon_months})
 
         # Extract numeric prediction
         pred_val = None
@@ -656,7 +913,8 @@ async def predict_avocado(payload: dict):
         # Compute exact target date if the saved model package contains last_date
         target_date = None
         try:
-            pkg = model_runner.models.get('avocado_model')
+            import pandas as pd
+            pkg = model_runner.get_package('avocado_model')
             last_date = None
             if isinstance(pkg, dict):
                 last_date = pkg.get('last_date')
@@ -679,58 +937,38 @@ async def predict_avocado(payload: dict):
         return {"error": str(e)}
 
 
+def _movie_metadata() -> Dict[str, Any]:
+    catalog = model_runner.movie_catalog()
+    genres: List[str] = catalog.genre_list() if catalog is not None else []
+    years: List[int] = catalog.year_list() if catalog is not None else []
+    return {"genres": genres, "years": years}
+
+
+def _airport_metadata() -> Dict[str, Any]:
+    values: Dict[str, List[str]] = {'Origin': [], 'Dest': [], 'UniqueCarrier': []}
+    if AIRLINE_DATASET.exists():
+        # valores distintos desde el diccionario de la caché columnar, sin recorrer las filas
+        store = open_dataset(AIRLINE_DATASET)
+        for col in values:
+            if col in store.columns:
+                values[col] = sorted({str(v).upper() for v in store.distinct(col)})
+    return {"origins": values['Origin'], "destinations": values['Dest'], "carriers": values['UniqueCarrier']}
+
+
 @app.get('/api/v1/meta/movies')
-async def get_movie_metadata():
+async def get_movie_metadata(request: Request):
     """Return available movie genres and years from the recommender package if present."""
     try:
-        pkg = model_runner.models.get('movie_recommender')
-        genres: List[str] = []
-        years: List[int] = []
-        if isinstance(pkg, dict):
-            movies_df = pkg.get('movies')
-            if movies_df is not None:
-                try:
-                    # genres_list column preferred; fallback to parsing genres_str
-                    if 'genres_list' in movies_df.columns:
-                        gset = set()
-                        for gl in movies_df['genres_list']:
-                            try:
-                                for g in (gl or []):
-                                    gset.add(str(g))
-                            except Exception:
-                                pass
-                        genres = sorted(gset)
-                    elif 'genres_str' in movies_df.columns:
-                        from itertools import chain
-                        gset = set(chain.from_iterable([str(s).split('|') for s in movies_df['genres_str'].fillna('')]))
-                        genres = sorted([g for g in gset if g])
-                    if 'year' in movies_df.columns:
-                        years = sorted([int(y) for y in movies_df['year'].dropna().unique().tolist()])
-                except Exception:
-                    pass
-        return {"genres": genres, "years": years}
+        return await _cached_json(request, 'meta_movies')
     except Exception as e:
         return {"error": str(e)}
 
 
 @app.get('/api/v1/meta/airports')
-async def get_airline_metadata():
+async def get_airline_metadata(request: Request):
     """Return available airline metadata extracted from the dataset (origins, destinations, carriers)."""
     try:
-        import pandas as pd
-        ds = Path(__file__).parent / 'datasets' / 'airline' / 'DelayedFlights.csv'
-        origins: List[str] = []
-        dests: List[str] = []
-        carriers: List[str] = []
-        if ds.exists():
-            df = pd.read_csv(ds, usecols=lambda c: c in ('Origin','Dest','UniqueCarrier'), dtype=str)
-            if 'Origin' in df.columns:
-                origins = sorted(df['Origin'].str.upper().dropna().unique().tolist())
-            if 'Dest' in df.columns:
-                dests = sorted(df['Dest'].str.upper().dropna().unique().tolist())
-            if 'UniqueCarrier' in df.columns:
-                carriers = sorted(df['UniqueCarrier'].str.upper().dropna().unique().tolist())
-        return {"origins": origins, "destinations": dests, "carriers": carriers}
+        return await _cached_json(request, 'meta_airports')
     except Exception as e:
         return {"error": str(e)}
 
@@ -739,7 +977,7 @@ async def get_airline_metadata():
 async def predict_london(payload: dict):
     try:
         day = payload.get('day', payload.get('day_of_week', 'viernes'))
-        res = model_runner.predict('london_crime_model', params={'day_of_week': day})
+        res = await inference.predict('london_crime_model', params={'day_of_week': day})
         return res
     except Exception as e:
         return {"error": str(e)}
@@ -759,7 +997,7 @@ async def predict_chicago(payload: dict):
         if community_area is not None:
             params['community_area'] = community_area
 
-        res = model_runner.predict('chicago_crime', params=params)
+        res = await inference.predict('chicago_crime', params=params)
 
         # Extract numeric prediction value if available
         pred_val = None
@@ -786,11 +1024,11 @@ async def predict_chicago(payload: dict):
 async def predict_cirrhosis(payload: dict):
     try:
         # pass-through medical params; model_runner will attempt conversion
-        res = model_runner.predict('cirrhosis_model', params=payload)
+        res = await inference.predict('cirrhosis_model', params=payload)
 
         # If the saved model package contains a label encoder for the target
         # decode the predicted numeric label to a human readable class.
-        pkg = model_runner.models.get('cirrhosis_model')
+        pkg = model_runner.get_package('cirrhosis_model')
         le = None
         if isinstance(pkg, dict):
             le = pkg.get('le_target') or pkg.get('label_encoder')
@@ -850,78 +1088,19 @@ async def predict_cirrhosis(payload: dict):
 @app.post('/api/v1/predict/airline')
 async def predict_airline(payload: dict):
     try:
-        # Accept common keys with fallbacks
-        month = payload.get('month', payload.get('m', 6))
-        day = payload.get('day', payload.get('d', 15))
-        day_of_week = payload.get('day_of_week', payload.get('dow', None))
-        crs_dep_time = payload.get('crs_dep_time', payload.get('dep_time', payload.get('CRSDepTime', None)))
-        crs_arr_time = payload.get('crs_arr_time', payload.get('arr_time', payload.get('CRSArrTime', None)))
-        crs_elapsed = payload.get('crs_elapsed', payload.get('CRSElapsedTime', None))
-        distance = payload.get('distance', payload.get('dist', 500))
-        origin = payload.get('origin', payload.get('orig', payload.get('Origin', None)))
-        dest = payload.get('dest', payload.get('destination', payload.get('Dest', None)))
-        carrier = payload.get('carrier', payload.get('unique_carrier', payload.get('UniqueCarrier', None)))
-
-        params = {
-            'Month': month,
-            'DayofMonth': day,
-            'DayOfWeek': day_of_week if day_of_week is not None else 3,
-            'CRSDepTime': crs_dep_time if crs_dep_time is not None else 1200,
-            'CRSArrTime': crs_arr_time if crs_arr_time is not None else 1400,
-            'CRSElapsedTime': crs_elapsed if crs_elapsed is not None else 120,
-            'Distance': distance,
-            'Origin': origin or 'OTHER',
-            'Dest': dest or 'OTHER',
-            'UniqueCarrier': carrier or 'XX'
-        }
+        # Canonical inputs (trainer column names), with the spec's key aliases and defaults
+        params = AIRLINE_SPEC.resolve(payload)
 
         # If the trained airline model exists, use it for a probability + label
         if 'airline_delay_model' in model_runner.get_available_models():
-            pkg = model_runner.models.get('airline_delay_model')
-            # Extract model and encoders
-            model_obj = pkg['model'] if isinstance(pkg, dict) and 'model' in pkg else pkg
-            encs = pkg.get('encoders', {}) if isinstance(pkg, dict) else {}
-
-            # Build feature vector using same logic as trainer
-            # Handle encoders (origin/dest/carrier)
-            origin_val = params['Origin']
-            dest_val = params['Dest']
-            carrier_val = params['UniqueCarrier']
-            try:
-                origin_le = encs['origin'].transform([origin_val])[0]
-            except Exception:
-                origin_le = encs['origin'].transform(['OTHER'])[0] if 'origin' in encs else 0
-            try:
-                dest_le = encs['dest'].transform([dest_val])[0]
-            except Exception:
-                dest_le = encs['dest'].transform(['OTHER'])[0] if 'dest' in encs else 0
-            try:
-                carrier_le = encs['carrier'].transform([carrier_val])[0]
-            except Exception:
-                carrier_le = 0
-
-            feature_list = [
-                float(params['Month']),
-                float(params['DayofMonth']),
-                float(params['DayOfWeek']),
-                float(params['CRSDepTime']),
-                float(params['CRSArrTime']),
-                float(params['CRSElapsedTime']),
-                float(params['Distance']),
-                float(origin_le),
-                float(dest_le),
-                float(carrier_le)
-            ]
-
-            X = np.array(feature_list).reshape(1, -1)
-            try:
-                prob = float(model_obj.predict_proba(X)[0,1]) if hasattr(model_obj, 'predict_proba') else None
-            except Exception:
-                prob = None
+            # features (encoders incluidos) + predict/predict_proba off the event loop,
+            # micro-batched when enabled
             try:
-                pred = int(model_obj.predict(X)[0])
+                res = await _predict_row('airline_delay_model', params=payload)
+                pred = int(res['prediction'][0])
+                prob = float(res['proba'][0][1]) if 'proba' in res else None
             except Exception:
-                pred = None
+                pred, prob = None, None
 
             return {
                 'model': 'airline_delay_model',
@@ -930,69 +1109,77 @@ async def predict_airline(payload: dict):
             }
 
         # fallback: basic heuristic projection if model missing
-        response_text = f"✈️ Predicción simple (sin modelo entrenado): Mes {month}, Día {day}, Distancia {distance}"
+        response_text = (f"✈️ Predicción simple (sin modelo entrenado): Mes {params['Month']}, "
+                         f"Día {params['DayofMonth']}, Distancia {params['Distance']}")
         return {'model': 'heuristic', 'input': params, 'prediction': response_text}
     except Exception as e:
         return {"error": str(e)}
 
 
-@app.get('/api/v1/airline/metadata')
-async def airline_metadata():
-    """Return lists of origin/destination airport codes and carriers the model knows,
+def _airline_model_metadata() -> Dict[str, Any]:
+    """Lists of origin/destination airport codes and carriers the model knows,
     plus best-effort full names for common airports/carriers.
     """
-    try:
-        pkg = model_runner.models.get('airline_delay_model')
-        encs = pkg.get('encoders', {}) if isinstance(pkg, dict) else {}
-
-        origin_codes = encs['origin'].classes_.tolist() if 'origin' in encs else []
-        dest_codes = encs['dest'].classes_.tolist() if 'dest' in encs else []
-        carrier_codes = encs['carrier'].classes_.tolist() if 'carrier' in encs else []
-
-        # Small built-in lookup for common IATA -> full airport name (not exhaustive)
-        airport_names = {
-            'IAD': 'Washington Dulles International Airport (IAD)',
-            'TPA': 'Tampa International Airport (TPA)',
-            'ATL': 'Hartsfield–Jackson Atlanta International Airport (ATL)',
-            'JFK': 'John F. Kennedy International Airport (JFK)',
-            'LAX': 'Los Angeles International Airport (LAX)',
-            'SFO': 'San Francisco International Airport (SFO)',
-            'ORD': "O'Hare International Airport (ORD)",
-            'DFW': 'Dallas/Fort Worth International Airport (DFW)',
-            'DEN': 'Denver International Airport (DEN)',
-            'MCO': 'Orlando International Airport (MCO)',
-            'BOS': 'Logan International Airport (BOS)',
-            'CLT': 'Charlotte Douglas International Airport (CLT)',
-            'IAH': 'George Bush Intercontinental Airport (IAH)',
-            'SEA': 'Seattle–Tacoma International Airport (SEA)',
-            'MSP': 'Minneapolis–Saint Paul International Airport (MSP)',
-            'SLC': 'Salt Lake City International Airport (SLC)',
-            'PHL': 'Philadelphia International Airport (PHL)',
-            'EWR': 'Newark Liberty International Airport (EWR)',
-            'BWI': 'Baltimore/Washington International Thurgood Marshall Airport (BWI)',
-            'IND': 'Indianapolis International Airport (IND)'
-        }
+    pkg = model_runner.get_package('airline_delay_model')
+    encs = pkg.get('encoders', {}) if isinstance(pkg, dict) else {}
+
+    origin_codes = encs['origin'].classes_.tolist() if 'origin' in encs else []
+    dest_codes = encs['dest'].classes_.tolist() if 'dest' in encs else []
+    carrier_codes = encs['carrier'].classes_.tolist() if 'carrier' in encs else []
+
+    # Small built-in lookup for common IATA -> full airport name (not exhaustive)
+    airport_names = {
+        'IAD': 'Washington Dulles International Airport (IAD)',
+        'TPA': 'Tampa International Airport (TPA)',
+        'ATL': 'Hartsfield–Jackson Atlanta International Airport (ATL)',
+        'JFK': 'John F. Kennedy International Airport (JFK)',
+        'LAX': 'Los Angeles International Airport (LAX)',
+        'SFO': 'San Francisco International Airport (SFO)',
+        'ORD': "O'Hare International Airport (ORD)",
+        'DFW': 'Dallas/Fort Worth International Airport (DFW)',
+        'DEN': 'Denver International Airport (DEN)',
+        'MCO': 'Orlando International Airport (MCO)',
+        'BOS': 'Logan International Airport (BOS)',
+        'CLT': 'Charlotte Douglas International Airport (CLT)',
+        'IAH': 'George Bush Intercontinental Airport (IAH)',
+        'SEA': 'Seattle–Tacoma International Airport (SEA)',
+        'MSP': 'Minneapolis–Saint Paul International Airport (MSP)',
+        'SLC': 'Salt Lake City International Airport (SLC)',
+        'PHL': 'Philadelphia International Airport (PHL)',
+        'EWR': 'Newark Liberty International Airport (EWR)',
+        'BWI': 'Baltimore/Washington International Thurgood Marshall Airport (BWI)',
+        'IND': 'Indianapolis International Airport (IND)'
+    }
 
-        carrier_names = {
-            'WN': 'Southwest Airlines',
-            'AA': 'American Airlines',
-            'DL': 'Delta Air Lines',
-            'UA': 'United Airlines',
-            'NK': 'Spirit Airlines',
-            'B6': 'JetBlue Airways'
-        }
+    carrier_names = {
+        'WN': 'Southwest Airlines',
+        'AA': 'American Airlines',
+        'DL': 'Delta Air Lines',
+        'UA': 'United Airlines',
+        'NK': 'Spirit Airlines',
+        'B6': 'JetBlue Airways'
+    }
 
-        def expand_list(codes, lookup):
-            out = []
-            for c in codes:
-                out.append({'code': c, 'name': lookup.get(c, None)})
-            return out
+    def expand_list(codes, lookup):
+        out = []
+        for c in codes:
+            out.append({'code': c, 'name': lookup.get(c, None)})
+        return out
 
-        return {
-            'origins': expand_list(origin_codes, airport_names),
-            'dests': expand_list(dest_codes, airport_names),
-            'carriers': expand_list(carrier_codes, carrier_names)
-        }
+    return {
+        'origins': expand_list(origin_codes, airport_names),
+        'dests': expand_list(dest_codes, airport_names),
+        'carriers': expand_list(carrier_codes, carrier_names)
+    }
+
+
+@app.get('/api/v1/airline/metadata')
+async def airline_metadata(request: Request):
+    """Return lists of origin/destination airport codes and carriers the model knows,
+    plus best-effort full names for common airports/carriers.
+    """
+    try:
+        return await _cached_json(request, 'airline_metadata')
     except Exception as e:
         return {'error': str(e)}
 
@@ -1012,10 +1199,10 @@ async def predict_bmi(payload: dict):
 
     try:
         if 'bmi_model' in model_runner.get_available_models():
-            m = model_runner.models.get('bmi_model')
+            m = model_runner.get_package('bmi_model')
             if hasattr(m, 'predict'):
                 # model expects [height_m, weight_kg, age]
-                pred = m.predict([[h, w, age]])
+                pred = await inference.run('bmi_model', m.predict, [[h, w, age]])
                 return {'method': 'bmi_model', 'bodyfat': float(pred[0])}
         # fallback: compute BMI
         bmi = w / (h*h)
@@ -1024,6 +1211,19 @@ async def predict_bmi(payload: dict):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/v1/system/executor")
+async def executor_stats():
+    """Inference pools (thread/process) and calls routed to each name."""
+    return inference.stats()
+
+
+@app.get("/api/v1/system/memory")
+async def system_memory():
+    """Memory of the worker serving this request: unique (uss) vs shared pages."""
+    from services.memory_stats import process_memory
+    return process_memory()
+
+
 @app.get("/api/health")
 async def health_check():
     """
@@ -1031,6 +1231,7 @@ async def health_check():
     """
     return {
         "status": "healthy",
+        "ready": readiness["ready"],
         "services": {
             "local_face_detector": True,
             "model_runner": model_runner.is_ready(),
@@ -1038,5 +1239,13 @@ async def health_check():
         }
     }
 
+@app.get("/api/health/ready")
+async def readiness_check():
+    """Readiness probe for the load balancer: 503 until the warm-up has finished."""
+    if not readiness["ready"]:
+        return JSONResponse(status_code=503, content={"ready": False})
+    return {"ready": True, "warmup": readiness["warmup"]}
+
 if __name__ == "__main__":
+    import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,43 @@
+# gunicorn.conf.py - multi-worker server with models preloaded in the master
+#
+#   gunicorn -c gunicorn.conf.py app:app
+#
+# app.py (and with it every model in backend/models/) is imported once in the
+# master process; workers are forked afterwards and share those pages
+# copy-on-write. Following the gc.freeze() recipe from the Python docs, the
+# collector is disabled while the master builds the model graph, everything is
+# frozen into the permanent generation right before forking, and collection is
+# re-enabled in each worker. Without this, the first collection in a worker
+# writes to the header of every model object and un-shares its pages.
+import gc
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "0") or 0) or (os.cpu_count() or 1)
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+
+# Models must be resident before the fork to be shared
+os.environ.setdefault("MODEL_LOAD_MODE", "eager")
+
+gc.disable()
+
+
+def when_ready(server):
+    gc.freeze()
+    server.log.info("gc.freeze(): %d objects moved to the permanent generation", gc.get_freeze_count())
+
+
+def post_fork(server, worker):
+    gc.enable()
+
+
+def post_worker_init(worker):
+    from services.memory_stats import process_memory
+
+    mem = process_memory()
+    worker.log.info(
+        "worker %s memory: rss %.1f MB, unique %.1f MB, shared %.1f MB",
+        mem["pid"], mem.get("rss", 0) / 1e6, mem.get("uss", 0) / 1e6, mem.get("shared", 0) / 1e6,
+    )
@@ -0,0 +1,95 @@
+"""Profile the cold start of the API process.
+
+Runs ``python -X importtime -c "import app"`` in a fresh interpreter (so no
+module is cached) and prints the wall time plus the slowest imports, which is
+where startup regressions usually come from (pandas, TensorFlow, cv2...).
+
+Usage:
+  python scripts/bench_startup.py [--top 20] [--eager] [--runs 3]
+
+By default models load lazily (MODEL_LOAD_MODE=lazy) to measure the import
+cost of the prediction API alone; --eager includes loading every artifact.
+numpy and joblib (under services.model_runner) are expected in the list:
+the services import them at module level.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def run_once(env):
+    t0 = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import app'],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    wall = time.perf_counter() - t0
+    if proc.returncode != 0:
+        print(proc.stderr[-2000:])
+        raise SystemExit(f"import app failed (exit {proc.returncode})")
+    return wall, proc.stderr
+
+
+def parse_importtime(stderr):
+    """Return [(module, self_us, cumulative_us, depth)] from -X importtime output.
+
+    Lines look like ``import time:   436 |   3190 | json``; nested imports are
+    indented two extra spaces per level (``import app`` itself has depth 0).
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3:
+            continue
+        try:
+            self_us, cumulative_us = int(parts[0]), int(parts[1])
+        except ValueError:
+            continue  # header line
+        raw_name = parts[2].rstrip()
+        depth = (len(raw_name) - len(raw_name.lstrip()) - 1) // 2
+        rows.append((raw_name.strip(), self_us, cumulative_us, depth))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--top', type=int, default=20, help='number of imports to list')
+    parser.add_argument('--eager', action='store_true', help='load every model at import (MODEL_LOAD_MODE=eager)')
+    parser.add_argument('--runs', type=int, default=3, help='repetitions for the wall-time figure')
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env['MODEL_LOAD_MODE'] = 'eager' if args.eager else 'lazy'
+
+    walls = []
+    stderr = ''
+    for _ in range(max(1, args.runs)):
+        wall, stderr = run_once(env)
+        walls.append(wall)
+
+    rows = parse_importtime(stderr)
+    total_us = sum(r[1] for r in rows)
+    print(f"import app ({env['MODEL_LOAD_MODE']}): median wall {statistics.median(walls):.3f}s "
+          f"over {len(walls)} runs, imports {total_us / 1e6:.3f}s across {len(rows)} modules")
+
+    # Modules imported directly by app.py, by cumulative time: which dependency to defer
+    direct = sorted((r for r in rows if r[3] == 1), key=lambda r: r[2], reverse=True)
+    print("\nSlowest imports made by app.py (cumulative):")
+    for name, _, cumulative_us, _ in direct[:args.top]:
+        print(f"  {cumulative_us / 1e3:9.1f} ms  {name}")
+
+    print("\nSlowest modules (self):")
+    for name, self_us, _, _ in sorted(rows, key=lambda r: r[1], reverse=True)[:args.top]:
+        print(f"  {self_us / 1e3:9.1f} ms  {name}")
+
+
+if __name__ == '__main__':
+    main()
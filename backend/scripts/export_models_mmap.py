@@ -0,0 +1,47 @@
+"""Rewrite model artifacts in a layout that joblib can memory-map.
+
+joblib only honours ``mmap_mode`` for uncompressed dumps, and then only for
+numpy arrays that are not ``dtype=object``. This script re-dumps every
+backend/models/*.joblib with ``compress=0`` (atomically, via a temp file) and
+reports how much of each package ends up file-backed when the server runs
+with MODEL_MMAP_MODE=r.
+
+Note: sklearn tree ensembles copy their node arrays when unpickled, so forest
+models gain little from mmap; share them by loading before forking workers.
+"""
+import os
+import sys
+from pathlib import Path
+
+import joblib
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from services.memory_stats import estimate_nbytes
+
+MODELS_DIR = ROOT / 'models'
+
+
+def main():
+    artifacts = sorted(MODELS_DIR.glob('*.joblib'))
+    if not artifacts:
+        print(f"No artifacts found in {MODELS_DIR}")
+        return
+    for path in artifacts:
+        pkg = joblib.load(path)
+        private_before = estimate_nbytes(pkg)
+        tmp = path.with_suffix('.joblib.tmp')
+        joblib.dump(pkg, tmp, compress=0)
+        os.replace(tmp, path)
+        del pkg
+
+        mapped = joblib.load(path, mmap_mode='r')
+        private_after = estimate_nbytes(mapped)
+        shared = max(0, private_before - private_after)
+        print(f"{path.name:<32} private {private_after / 1e6:8.1f} MB  mmap-shared {shared / 1e6:8.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
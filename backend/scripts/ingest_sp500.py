@@ -0,0 +1,46 @@
+"""Ingest the per-ticker S&P 500 CSVs into the columnar ticker store.
+
+Reads ``datasets/sp500/individual_stocks_5yr/**/<TICKER>_data.csv`` in a
+process pool and writes ``datasets/sp500/store/`` (services/ticker_store.py):
+one partition per ticker with a sorted date index, plus the daily cross-ticker
+close sum/count used by train_sp500_model.py. Replaces merge.sh: re-running
+only re-reads the CSVs whose mtime/size changed, and updates the aggregate
+incrementally.
+
+Usage:
+  python scripts/ingest_sp500.py [--workers 8] [--full] [--source DIR] [--store DIR]
+"""
+import argparse
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from services.ticker_store import SOURCE_DIR, STORE_DIR, TickerStore, day_to_iso, ingest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: CPU count, 1 = inline)')
+    parser.add_argument('--full', action='store_true', help='drop the store and re-ingest every ticker')
+    parser.add_argument('--source', type=Path, default=SOURCE_DIR, help='folder with the per-ticker CSVs')
+    parser.add_argument('--store', type=Path, default=STORE_DIR, help='output store folder')
+    args = parser.parse_args()
+
+    if not args.source.exists():
+        print(f"Source folder not found: {args.source}. Skipping ingest.")
+        return
+
+    summary = ingest(args.source, args.store, workers=args.workers, full=args.full)
+    print(f"Ingested into {args.store}: {summary['tickers']} tickers "
+          f"(added {summary['added']}, updated {summary['updated']}, removed {summary['removed']}, "
+          f"unchanged {summary['unchanged']}) in {summary['seconds']:.2f}s")
+    agg = TickerStore(args.store).daily_aggregate()
+    if len(agg['date']):
+        print(f"Daily aggregate: {summary['days']} days, {day_to_iso(agg['date'][0])} .. {day_to_iso(agg['date'][-1])}")
+
+
+if __name__ == '__main__':
+    main()
@@ -4,6 +4,7 @@ Reads datasets/airline/DelayedFlights.csv, samples rows, builds features and tra
 a RandomForestClassifier, then saves a package to backend/models/airline_delay_model.joblib
 including encoders for categorical fields.
 """
+import sys
 from pathlib import Path
 import pandas as pd
 import numpy as np
@@ -14,6 +15,11 @@ from sklearn.preprocessing import LabelEncoder
 import joblib
 
 ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from services.datasets import load_dataset
+
 CSV = ROOT / 'datasets' / 'airline' / 'DelayedFlights.csv'
 OUT = ROOT / 'models' / 'airline_delay_model.joblib'
 
@@ -28,10 +34,7 @@ def safe_float(x):
 def prepare_dataframe(nrows=None, sample_frac=0.05):
     # Read CSV in chunks if large, sample to keep memory small
     usecols = ['Year','Month','DayofMonth','DayOfWeek','CRSDepTime','CRSArrTime','CRSElapsedTime','Distance','ArrDelay','DepDelay','Origin','Dest','UniqueCarrier','Cancelled']
-    if nrows:
-        df = pd.read_csv(CSV, usecols=usecols, nrows=nrows)
-    else:
-        df = pd.read_csv(CSV, usecols=usecols)
+    df = load_dataset(CSV, columns=usecols, nrows=nrows)
 
     # Create label: delayed if ArrDelay > 15, fallback to DepDelay > 15
     df['ArrDelay'] = pd.to_numeric(df['ArrDelay'], errors='coerce')
@@ -101,7 +104,7 @@ def train():
     last_date = None
     # Attempt to infer last_date from CSV by reading Year/Month max
     try:
-        df_dates = pd.read_csv(CSV, usecols=['Year','Month'], nrows=100000)
+        df_dates = load_dataset(CSV, columns=['Year','Month'], nrows=100000)
         max_year = int(df_dates['Year'].max())
         max_month = int(df_dates['Month'].max())
         last_date = pd.to_datetime(f"{max_year}-{max_month}-01")
@@ -3,6 +3,7 @@
 Creates monthly supervised examples from the weekly dataset by resampling to monthly mean per region.
 Saves model package to backend/models/avocado_model.joblib
 """
+import sys
 from pathlib import Path
 import pandas as pd
 import numpy as np
@@ -12,6 +13,11 @@ from sklearn.metrics import mean_absolute_error, r2_score
 import joblib
 
 ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from services.datasets import load_dataset
+
 DATA = ROOT / 'datasets' / 'avocado' / 'avocado.csv'
 OUT = ROOT / 'models' / 'avocado_model.joblib'
 
@@ -22,9 +28,8 @@ def main():
         return
 
     print('Loading avocado dataset...')
-    df = pd.read_csv(DATA, parse_dates=['Date'])
-    # keep conventional type only for simplicity
-    df = df[df['type'] == 'conventional']
+    # keep conventional type only for simplicity (filtered in the columnar cache)
+    df = load_dataset(DATA, filters=[('type', '==', 'conventional')], parse_dates=['Date'])
 
     # resample to monthly frequency per region (mean price and sums for volumes)
     df['month'] = df['Date'].dt.to_period('M').dt.to_timestamp()
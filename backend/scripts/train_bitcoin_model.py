@@ -2,6 +2,7 @@
 
 Uses historical Bitcoin price data to train a regression model.
 """
+import sys
 import pandas as pd
 from pathlib import Path
 from sklearn.ensemble import RandomForestRegressor
@@ -10,6 +11,13 @@ from sklearn.metrics import mean_absolute_error, r2_score
 import joblib
 import numpy as np
 
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from services.datasets import load_dataset
+from services.feature_specs import bitcoin_latest_state
+
 # The repo provides CSV files under datasets/bitcoin
 DATA = Path(__file__).parent.parent / 'datasets' / 'bitcoin' / 'bitcoin_price_Training - Training.csv'
 MODEL_OUT = Path(__file__).parent.parent / 'models' / 'bitcoin_model.joblib'
@@ -19,7 +27,7 @@ def main():
         print(f"Dataset not found: {DATA}. Skipping training.")
         return
 
-    df = pd.read_csv(DATA)
+    df = load_dataset(DATA)
     print(f"Loaded {len(df)} Bitcoin price records")
     print(f"Columns: {df.columns.tolist()}")
     
@@ -33,6 +41,9 @@ def main():
     price_col = price_cols[0]
     print(f"Using price column: {price_col}")
     
+    # Latest lag/rolling values, computed like the server does (commas stripped)
+    latest_features = bitcoin_latest_state(df)
+
     # Create simple features: use rolling averages and lag features
     df = df.copy()
     df['price'] = pd.to_numeric(df[price_col], errors='coerce')
@@ -95,9 +106,11 @@ def main():
     MODEL_OUT.parent.mkdir(parents=True, exist_ok=True)
     # Save model with metadata: include last date from original df
     last_date = pd.to_datetime(df['Date'].iloc[-1]) if 'Date' in df.columns else None
-    package = {'model': model, 'feature_cols': feature_cols, 'last_date': last_date}
+    # latest_features: the server builds request features from it without reading the CSV
+    package = {'model': model, 'feature_cols': feature_cols, 'last_date': last_date,
+               'latest_features': latest_features}
     joblib.dump(package, MODEL_OUT)
-    print(f'Saved model+metadata to {MODEL_OUT} (last_date={last_date})')
+    print(f'Saved model+metadata to {MODEL_OUT} (last_date={last_date}, latest_features={latest_features})')
 
 if __name__ == '__main__':
     main()
@@ -3,13 +3,19 @@
 This script is safe to run even if the dataset isn't present; it will exit
 with a friendly message.
 """
-import pandas as pd
+import sys
 from pathlib import Path
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_absolute_error, r2_score
 import joblib
 
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from services.datasets import load_dataset
+
 DATA = Path(__file__).parent.parent / 'datasets' / 'bodymass' / 'bodyfat.csv'
 MODEL_OUT = Path(__file__).parent.parent / 'models' / 'bmi_model.joblib'
 
@@ -18,7 +24,7 @@ def main():
         print(f"Dataset not found: {DATA}. Skipping training.")
         return
 
-    df = pd.read_csv(DATA)
+    df = load_dataset(DATA)
     # Expecting columns: Age, Weight, Height, BodyFat (real column names)
     if not {'Age','Weight','Height','BodyFat'}.issubset(df.columns):
         print("Dataset doesn't contain required columns. Expected Age, Weight, Height, BodyFat")
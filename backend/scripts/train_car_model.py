@@ -2,7 +2,7 @@
 
 Uses car features to predict selling price.
 """
-import pandas as pd
+import sys
 from pathlib import Path
 from sklearn.ensemble import GradientBoostingRegressor
 from sklearn.model_selection import train_test_split
@@ -10,6 +10,12 @@ from sklearn.metrics import mean_absolute_error, r2_score
 from sklearn.preprocessing import LabelEncoder
 import joblib
 
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from services.datasets import load_dataset
+
 DATA = Path(__file__).parent.parent / 'datasets' / 'car data.txt'
 MODEL_OUT = Path(__file__).parent.parent / 'models' / 'car_model.joblib'
 
@@ -18,7 +24,7 @@ def main():
         print(f"Dataset not found: {DATA}. Skipping training.")
         return
 
-    df = pd.read_csv(DATA)
+    df = load_dataset(DATA)
     print(f"Loaded {len(df)} car records")
     print(f"Columns: {df.columns.tolist()}")
     
@@ -3,6 +3,7 @@
 Predicts patient status (C=censored, CL=censored due to liver tx, D=death) 
 based on clinical features.
 """
+import sys
 import pandas as pd
 from pathlib import Path
 from sklearn.ensemble import RandomForestClassifier
@@ -12,6 +13,12 @@ from sklearn.preprocessing import LabelEncoder
 import joblib
 import numpy as np
 
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from services.datasets import load_dataset
+
 DATA = Path(__file__).parent.parent / 'datasets' / 'cirrhosis.csv'
 MODEL_OUT = Path(__file__).parent.parent / 'models' / 'cirrhosis_model.joblib'
 
@@ -20,7 +27,7 @@ def main():
         print(f"Dataset not found: {DATA}. Skipping training.")
         return
 
-    df = pd.read_csv(DATA)
+    df = load_dataset(DATA)
     print(f"Loaded {len(df)} patient records")
     
     # Prepare features
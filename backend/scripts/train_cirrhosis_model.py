@@ -2,6 +2,7 @@
 
 Saves model and label encoder to backend/models/cirrhosis_model.joblib
 """
+import sys
 from pathlib import Path
 import pandas as pd
 import numpy as np
@@ -12,6 +13,11 @@ from sklearn.metrics import accuracy_score, f1_score, classification_report
 import joblib
 
 ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from services.datasets import load_dataset
+
 CSV = ROOT / 'datasets' / 'cirrosis' / 'cirrhosis.csv'
 OUT = ROOT / 'models' / 'cirrhosis_model.joblib'
 
@@ -39,7 +45,7 @@ def train():
         print(f"CSV not found: {CSV}")
         return
     print('Loading cirrhosis dataset...')
-    df = pd.read_csv(CSV)
+    df = load_dataset(CSV)
 
     # Target: Stage (values like 1.0..4.0) - drop missing
     df['Stage'] = pd.to_numeric(df['Stage'], errors='coerce')
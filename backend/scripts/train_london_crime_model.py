@@ -5,6 +5,7 @@ The dataset contains monthly counts per LSOA. We aggregate to borough-month,
 convert monthly counts to average per day by dividing by days in month, and
 train a regressor using Month, DayOfWeek (synthetic 1..7), and borough encoding.
 """
+import sys
 from pathlib import Path
 import pandas as pd
 import numpy as np
@@ -16,6 +17,11 @@ import joblib
 import calendar
 
 ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from services.datasets import load_dataset
+
 CSV = ROOT / 'datasets' / 'london' / 'london_crime_by_lsoa.csv'
 OUT = ROOT / 'models' / 'london_crime_model.joblib'
 
@@ -32,7 +38,7 @@ def train():
         print(f"CSV not found: {CSV}")
         return
     print('Loading London crime dataset...')
-    df = pd.read_csv(CSV)
+    df = load_dataset(CSV, columns=['borough', 'year', 'month', 'value'])
 
     # Aggregate monthly counts to borough-month
     df_agg = df.groupby(['borough','year','month'])['value'].sum().reset_index()
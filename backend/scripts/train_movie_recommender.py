@@ -5,19 +5,28 @@ Reads:
   - backend/datasets/movies/ratings.csv
 
 Produces:
-  - backend/models/movie_recommender.joblib  (dict with DataFrame 'movies')
+  - backend/models/movie_recommender.joblib  (dict with columnar 'catalog')
 
 The recommender is simple: movies are scored by mean_rating * log(count+1).
-We store a DataFrame with title, movieId, year, genres (string), genres_list, popularity.
+We store a columnar catalog (services/movie_catalog.py): genres as a uint32
+bitmask, numpy columns for year, popularity, rating_count, rating_mean and
+movieId, and the titles in one UTF-8 buffer, sorted by popularity.
 """
 import re
-import math
+import sys
 from pathlib import Path
+import numpy as np
 import pandas as pd
 import joblib
 
 
 ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from services.datasets import load_dataset
+from services.movie_catalog import MovieCatalog
+
 DATA_DIR = ROOT / 'datasets' / 'movies'
 OUT_DIR = ROOT / 'models'
 
@@ -46,11 +55,11 @@ def main():
         return
 
     print("Loading movies...")
-    movies = pd.read_csv(movies_fp)
+    movies = load_dataset(movies_fp)
     print(f"Movies: {len(movies)} rows")
 
     print("Loading ratings (this may take a few seconds)...")
-    ratings = pd.read_csv(ratings_fp)
+    ratings = load_dataset(ratings_fp, columns=['movieId', 'rating'])
     print(f"Ratings: {len(ratings)} rows")
 
     # Aggregate ratings: count and mean per movieId
@@ -69,7 +78,7 @@ def main():
     df['genres_str'] = df['genres'].fillna('')
 
     # popularity score: mean_rating * log10(count+1)
-    df['popularity'] = df.apply(lambda r: float(r['rating_mean']) * math.log10(max(1, int(r['rating_count'])) + 1), axis=1)
+    df['popularity'] = df['rating_mean'].astype(float) * np.log10(np.maximum(1, df['rating_count']) + 1)
 
     # fallback popularity for movies with no ratings: small random-ish value based on movieId
     df['popularity'] = df['popularity'].fillna(0.0)
@@ -85,8 +94,10 @@ def main():
     OUT_DIR.mkdir(parents=True, exist_ok=True)
     out_path = OUT_DIR / 'movie_recommender.joblib'
 
-    print(f"Saving recommender to: {out_path}")
-    joblib.dump({'movies': df_small}, out_path)
+    catalog = MovieCatalog.from_frame(df_small)
+    print(f"Saving recommender to: {out_path} ({len(catalog)} movies, {len(catalog.genre_names)} genres, "
+          f"{catalog.nbytes / 1e6:.1f} MB)")
+    joblib.dump({'catalog': catalog.to_arrays()}, out_path)
     print("Saved. Example top titles:")
     print(df_small.head()[['title','year','genres_str','rating_count','rating_mean','popularity']])
 
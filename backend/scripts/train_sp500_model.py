@@ -1,10 +1,13 @@
-"""Train a lightweight S&P-like model using the provided all_stocks_5yr.csv.
+"""Train a lightweight S&P-like model from the per-ticker S&P 500 data.
 
-This script aggregates by date (mean close across tickers) to create a proxy S&P index,
+The proxy S&P index (mean close across tickers per date) is read from the daily
+aggregate of the ticker store (run scripts/ingest_sp500.py first); the merged
+all_stocks_5yr.csv is still accepted when there is no store. The script
 creates lag features and rolling means, then generates supervised examples for horizons
 and trains a RandomForestRegressor. Saves package to backend/models/sp500_model.joblib
 containing {'model','feature_cols','last_date'}.
 """
+import sys
 from pathlib import Path
 import pandas as pd
 import numpy as np
@@ -15,21 +18,36 @@ import joblib
 
 
 ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from services.datasets import load_dataset
+from services.ticker_store import TickerStore
+
 DATA = ROOT / 'datasets' / 'sp500' / 'all_stocks_5yr.csv'
 OUT = ROOT / 'models' / 'sp500_model.joblib'
 
 
+def load_index():
+    """Proxy index (mean close across tickers per date): the ticker store's daily aggregate, else the merged CSV."""
+    store = TickerStore()
+    if store.exists:
+        print(f'Loading S&P daily aggregate from {store.root} ({len(store.tickers())} tickers)...')
+        return store.index_frame()[['date', 'index_close']]
+    if DATA.exists():
+        print('Loading S&P dataset (this may be large)...')
+        df = load_dataset(DATA, columns=['date', 'close'], parse_dates=['date'])
+        df_index = df.groupby('date')['close'].mean().reset_index().rename(columns={'close':'index_close'})
+        return df_index.sort_values('date').reset_index(drop=True)
+    return None
+
+
 def main():
-    if not DATA.exists():
-        print(f"Dataset not found: {DATA}. Skipping training.")
+    df_index = load_index()
+    if df_index is None:
+        print(f"Dataset not found: run scripts/ingest_sp500.py (or provide {DATA}). Skipping training.")
         return
 
-    print('Loading S&P dataset (this may be large)...')
-    df = pd.read_csv(DATA, parse_dates=['date'])
-    # aggregate by date to produce a proxy index (mean close across tickers)
-    df_index = df.groupby('date')['close'].mean().reset_index().rename(columns={'close':'index_close'})
-    df_index = df_index.sort_values('date').reset_index(drop=True)
-
     # create lag features and rolling means
     for lag in [1,2,3,5,10]:
         df_index[f'close_lag_{lag}'] = df_index['index_close'].shift(lag)
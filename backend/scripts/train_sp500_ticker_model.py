@@ -0,0 +1,111 @@
+"""Train one forecasting model shared by every S&P 500 ticker.
+
+Reads the memory-mapped OHLCV index of the ticker store (run
+scripts/ingest_sp500.py first). For each ticker and every `--stride`-th day it
+takes the last TICKER_WINDOW closes (services/feature_specs.py: returns,
+distance to the 5/20-day means, 20-day volatility, daily range) and, for each
+horizon, the target close[t+h] / close[t] - 1. The features are scale-free, so
+one model serves tickers of any price; the server computes the same features
+for the latest window of each ticker and multiplies the last close.
+
+Produces backend/models/sp500_ticker_model.joblib with
+{'model', 'feature_cols', 'horizons', 'last_date'}.
+
+Usage:
+  python scripts/train_sp500_ticker_model.py [--stride 5] [--max-iter 300]
+"""
+import argparse
+import sys
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from sklearn.ensemble import HistGradientBoostingRegressor
+from sklearn.metrics import mean_absolute_error
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from services.feature_specs import TICKER_FEATURE_COLS, TICKER_WINDOW, ticker_window_features
+from services.ticker_index import CLOSE, HIGH, LOW, TickerIndex
+
+OUT = ROOT / 'models' / 'sp500_ticker_model.joblib'
+HORIZONS = [1, 5, 10, 21, 63, 126, 252]
+
+
+def build_examples(index, stride):
+    """Rows (features + horizon_days), target and end day of every (ticker, day, horizon) example."""
+    X_parts, y_parts, day_parts = [], [], []
+    for ticker in index.tickers():
+        dates, ohlcv = index.slice(ticker)
+        n = len(dates)
+        if n < TICKER_WINDOW + HORIZONS[0]:
+            continue
+        close = np.asarray(ohlcv[:, CLOSE])
+        ends = np.arange(TICKER_WINDOW - 1, n, stride)
+        starts = ends - TICKER_WINDOW + 1
+        feats = ticker_window_features(
+            sliding_window_view(close, TICKER_WINDOW)[starts],
+            sliding_window_view(np.asarray(ohlcv[:, HIGH]), TICKER_WINDOW)[starts],
+            sliding_window_view(np.asarray(ohlcv[:, LOW]), TICKER_WINDOW)[starts],
+        )
+        for h in HORIZONS:
+            ok = ends + h < n
+            if not ok.any():
+                continue
+            e = ends[ok]
+            X_parts.append(np.hstack([feats[ok], np.full((len(e), 1), float(h))]))
+            y_parts.append(close[e + h] / close[e] - 1)
+            day_parts.append(np.asarray(dates[e]))
+    X = np.vstack(X_parts)
+    y = np.concatenate(y_parts)
+    days = np.concatenate(day_parts)
+    with np.errstate(invalid='ignore'):
+        ok = np.isfinite(X).all(axis=1) & np.isfinite(y)
+    return X[ok], y[ok], days[ok]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--stride', type=int, default=5, help='use every N-th day of each ticker as an example')
+    parser.add_argument('--max-iter', type=int, default=300, help='boosting iterations')
+    args = parser.parse_args()
+
+    index = TickerIndex.open()
+    if index is None:
+        print("Ticker store not found. Run scripts/ingest_sp500.py first. Skipping training.")
+        return
+
+    print(f'Building examples from {len(index)} tickers...')
+    X, y, days = build_examples(index, max(1, args.stride))
+    print(f'{len(X)} examples, horizons {HORIZONS}')
+
+    # split by time: the last 20% of days are the test set (no leakage across tickers)
+    cutoff = np.quantile(days, 0.8)
+    train, test = days < cutoff, days >= cutoff
+    model = HistGradientBoostingRegressor(max_iter=args.max_iter, learning_rate=0.05, max_leaf_nodes=31,
+                                          random_state=42)
+    model.fit(X[train], y[train])
+
+    preds = model.predict(X[test])
+    print(f'Test MAE (relative change): {mean_absolute_error(y[test], preds):.4f} '
+          f'(no-change baseline: {mean_absolute_error(y[test], np.zeros(test.sum())):.4f})')
+    model.fit(X, y)
+
+    OUT.parent.mkdir(parents=True, exist_ok=True)
+    last_date = pd.Timestamp(np.datetime64(int(index.dates.max()), 'D'))
+    pkg = {
+        'model': model,
+        'feature_cols': TICKER_FEATURE_COLS + ['horizon_days'],
+        'horizons': HORIZONS,
+        'last_date': last_date,
+    }
+    joblib.dump(pkg, OUT)
+    print(f'Saved sp500 ticker model to {OUT} (last_date={last_date.date()})')
+
+
+if __name__ == '__main__':
+    main()
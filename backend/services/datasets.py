@@ -0,0 +1,506 @@
+"""Typed columnar cache for the CSVs under backend/datasets.
+
+Each CSV is parsed once with pandas and stored next to it, under
+``datasets/.cache/`` (env ``DATASET_CACHE_DIR``), as one ``.npy`` file per
+column in a generation directory (``g<N>-*``) plus a ``meta.json`` naming it:
+
+- numeric and bool columns keep their dtype, dates (``parse_dates``) are
+  ``datetime64[ns]``;
+- text columns are dictionary-encoded: int32 codes (-1 = NaN) over the sorted
+  distinct values, stored in ``<column>.categories.json``;
+- rows are split in row groups of ``ROW_GROUP_ROWS`` with the min/max of every
+  column per group, so a filter skips the groups that cannot match.
+
+The cache is valid while the CSV keeps its (mtime_ns, size); if only the mtime
+changed, the content hash decides. A rebuild writes a new generation and
+replaces ``meta.json`` last; the previous generation stays on disk for the
+processes that read the old ``meta.json`` but have not mapped its columns yet.
+``load_dataset()`` memory-maps just the projected columns and returns a
+DataFrame, like ``pd.read_csv`` would. With ``DATASET_CACHE=0``, or an
+``nrows`` sample of a CSV that is not cached yet, it reads the CSV directly.
+"""
+from __future__ import annotations
+
+import bisect
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+DATASET_DIR = Path(__file__).resolve().parents[1] / "datasets"
+CACHE_DIR = Path(os.getenv("DATASET_CACHE_DIR") or DATASET_DIR / ".cache")
+CACHE_ENABLED = os.getenv("DATASET_CACHE", "1") != "0"
+ROW_GROUP_ROWS = int(os.getenv("DATASET_ROW_GROUP_ROWS", "65536") or 65536)
+STORE_FORMAT = 2
+
+# (column, op, value); op: == != < <= > >= in between
+Filter = Tuple[str, str, Any]
+_OPS = ("==", "!=", "<", "<=", ">", ">=", "in", "between")
+
+
+def file_hash(path: Path) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class ColumnStore:
+    """Columnar copy of one CSV: memory-mapped columns, row-group stats, projection and filters."""
+
+    def __init__(self, root: Path, meta: Dict[str, Any]):
+        self.root = root
+        self.meta = meta
+        self.path = root / meta["dir"]  # generación publicada en meta.json
+        self.num_rows: int = meta["num_rows"]
+        self.row_group_rows: int = meta["row_group_rows"]
+        self._arrays: Dict[str, np.ndarray] = {}
+        self._categories: Dict[str, List[Any]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.meta["columns"])
+
+    @property
+    def num_row_groups(self) -> int:
+        return -(-self.num_rows // self.row_group_rows) if self.num_rows else 0
+
+    # ------------------------------------------------------------ build
+
+    @classmethod
+    def build(cls, source: Path, root: Path, read_kwargs: Dict[str, Any], version: Dict[str, Any]) -> "ColumnStore":
+        """Parse `source` once and publish it as a new generation of `root`, meta.json last.
+
+        The columns go to a fresh ``g<N>-*`` directory that no reader knows about
+        until ``meta.json`` is replaced, so an open store keeps a consistent set of
+        files. Only generations older than the previous one are removed.
+        """
+        import pandas as pd
+
+        df = pd.read_csv(source, **read_kwargs)
+        root.mkdir(parents=True, exist_ok=True)
+        previous = _read_meta(root) or {}
+        gen = int(previous.get("generation", 0)) + 1
+        # nombre único: otro proceso puede estar construyendo la misma generación
+        data_dir = Path(tempfile.mkdtemp(prefix=f"g{gen}-", dir=root))
+        try:
+            columns: Dict[str, Any] = {}
+            for i, name in enumerate(df.columns):
+                columns[str(name)] = _write_column(data_dir, f"c{i}", df[name])
+            meta = {
+                "format": STORE_FORMAT,
+                "generation": gen,
+                "dir": data_dir.name,
+                "source": version,
+                "read_kwargs": read_kwargs,
+                "num_rows": len(df),
+                "row_group_rows": ROW_GROUP_ROWS,
+                "columns": columns,
+            }
+            _write_meta(root, meta)
+        except BaseException:
+            shutil.rmtree(data_dir, ignore_errors=True)
+            raise
+        _remove_stale_generations(root, gen)
+        return cls(root, meta)
+
+    # ------------------------------------------------------------ columns
+
+    def array(self, column: str) -> np.ndarray:
+        """Stored array of `column` (codes for text columns), memory-mapped."""
+        arr = self._arrays.get(column)
+        if arr is None:
+            info = self._info(column)
+            arr = np.load(self.path / info["file"], mmap_mode="r", allow_pickle=False)
+            with self._lock:
+                self._arrays[column] = arr
+        return arr
+
+    def categories(self, column: str) -> List[Any]:
+        """Sorted distinct values of a text column."""
+        cats = self._categories.get(column)
+        if cats is None:
+            info = self._info(column)
+            if info["kind"] != "category":
+                raise ValueError(f"La columna '{column}' no es de texto")
+            with open(self.path / info["categories"], encoding="utf-8") as f:
+                cats = json.load(f)
+            with self._lock:
+                self._categories[column] = cats
+        return cats
+
+    def distinct(self, column: str) -> List[Any]:
+        """Distinct non-null values of `column`, sorted (text columns: without reading the rows)."""
+        if self._info(column)["kind"] == "category":
+            return list(self.categories(column))
+        arr = np.asarray(self.array(column))
+        if arr.dtype.kind == "f":
+            arr = arr[~np.isnan(arr)]
+        return np.unique(arr).tolist()
+
+    def _info(self, column: str) -> Dict[str, Any]:
+        info = self.meta["columns"].get(column)
+        if info is None:
+            raise KeyError(f"Columna '{column}' no encontrada. Columnas: {self.columns}")
+        return info
+
+    # ------------------------------------------------------------ reads
+
+    def read(self, columns: Optional[Sequence[str]] = None, filters: Optional[Sequence[Filter]] = None,
+             nrows: Optional[int] = None, as_category: bool = False) -> Any:
+        """DataFrame with `columns` (all by default) of the rows matching every filter.
+
+        `nrows` limits the rows read from the start of the file, before filtering
+        (like ``pd.read_csv(nrows=...)``). Text columns come back as object
+        strings, or as ``pd.Categorical`` with `as_category=True`.
+        """
+        import pandas as pd
+
+        columns = self.columns if columns is None else list(columns)
+        limit = self.num_rows if nrows is None else max(0, min(int(nrows), self.num_rows))
+        rows = self._select(filters or (), limit)
+        data: Dict[str, Any] = {}
+        for name in columns:
+            data[name] = self._take(name, rows, limit, as_category)
+        return pd.DataFrame(data, columns=columns)
+
+    def _take(self, column: str, rows: Optional[np.ndarray], limit: int, as_category: bool) -> Any:
+        import pandas as pd
+
+        arr = self.array(column)
+        values = np.asarray(arr[:limit] if rows is None else arr[rows])
+        if self._info(column)["kind"] != "category":
+            return values.copy() if rows is None else values
+        cats = self.categories(column)
+        if as_category:
+            return pd.Categorical.from_codes(values, categories=cats)
+        lookup = np.empty(len(cats) + 1, dtype=object)
+        lookup[:-1] = cats
+        lookup[-1] = np.nan
+        return lookup[values]  # código -1 -> último elemento (NaN)
+
+    def _select(self, filters: Sequence[Filter], limit: int) -> Optional[np.ndarray]:
+        """Row numbers (< limit) passing every filter; None = all rows up to limit."""
+        if not filters:
+            return None
+        compiled = [self._compile_filter(f) for f in filters]
+        picked: List[np.ndarray] = []
+        size = self.row_group_rows
+        for g in range(self.num_row_groups):
+            start = g * size
+            if start >= limit:
+                break
+            stop = min(start + size, limit)
+            if not all(_group_may_match(self._group_stats(col, g), op, value) for col, op, value in compiled):
+                continue
+            mask = np.ones(stop - start, dtype=bool)
+            for col, op, value in compiled:
+                mask &= _apply(np.asarray(self.array(col)[start:stop]), op, value)
+            picked.append(np.flatnonzero(mask) + start)
+        return np.concatenate(picked) if picked else np.empty(0, dtype=np.int64)
+
+    def _group_stats(self, column: str, group: int) -> Optional[List[Any]]:
+        stats = self._info(column)["stats"]
+        return stats[group] if group < len(stats) else None
+
+    def _compile_filter(self, flt: Filter) -> Tuple[str, str, Any]:
+        """Translate the filter value to the stored representation (codes for text columns)."""
+        column, op, value = flt
+        if op not in _OPS:
+            raise ValueError(f"Operador de filtro no soportado: {op!r} (usa {', '.join(_OPS)})")
+        info = self._info(column)
+        if info["kind"] == "datetime":
+            return column, op, _to_datetime_value(op, value)
+        if info["kind"] != "category":
+            return column, op, value
+        cats = self.categories(column)
+        if op in ("==", "!="):
+            i = bisect.bisect_left(cats, value)
+            return column, op, i if i < len(cats) and cats[i] == value else -2  # -2: ningún código
+        if op == "in":
+            codes = {bisect.bisect_left(cats, v) for v in value}
+            return column, op, [c for c in codes if c < len(cats) and cats[c] in value]
+        if op == "between":
+            lo, hi = value
+            return column, op, (bisect.bisect_left(cats, lo), bisect.bisect_right(cats, hi) - 1)
+        # categorías ordenadas: comparar el valor equivale a comparar el código;
+        # < y <= como rango desde 0 para no incluir los NaN (código -1)
+        if op == "<":
+            return column, "between", (0, bisect.bisect_left(cats, value) - 1)
+        if op == "<=":
+            return column, "between", (0, bisect.bisect_right(cats, value) - 1)
+        if op == ">=":
+            return column, op, bisect.bisect_left(cats, value)
+        return column, op, bisect.bisect_right(cats, value) - 1
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "rows": self.num_rows,
+            "row_groups": self.num_row_groups,
+            "columns": {name: info["kind"] for name, info in self.meta["columns"].items()},
+            "bytes": sum((self.path / info["file"]).stat().st_size for info in self.meta["columns"].values()),
+        }
+
+
+def _read_meta(root: Path) -> Optional[Dict[str, Any]]:
+    try:
+        with open(root / "meta.json", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(root: Path, meta: Dict[str, Any]) -> None:
+    """Replace root/meta.json atomically (readers see the old or the new file, never half of one)."""
+    fd, tmp = tempfile.mkstemp(prefix=".meta-", suffix=".json", dir=root)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, default=str)
+        os.replace(tmp, root / "meta.json")
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _remove_stale_generations(root: Path, gen: int) -> None:
+    """Remove generation dirs older than gen - 1 (and the files of the format-1 flat layout)."""
+    for path in root.iterdir():
+        if path.is_dir() and path.name.startswith("g"):
+            try:
+                stale = int(path.name[1:].split("-", 1)[0]) < gen - 1
+            except ValueError:
+                continue
+            if stale:
+                shutil.rmtree(path, ignore_errors=True)
+        elif path.suffix == ".npy" or path.name.endswith(".categories.json"):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def _write_column(root: Path, stem: str, series: Any) -> Dict[str, Any]:
+    import pandas as pd
+
+    info: Dict[str, Any] = {"file": stem + ".npy"}
+    if pd.api.types.is_datetime64_any_dtype(series.dtype):
+        if getattr(series.dt, "tz", None) is not None:
+            series = series.dt.tz_convert(None)
+        values = series.to_numpy(dtype="datetime64[ns]")
+        info["kind"] = "datetime"
+        stats_values = values.view(np.int64)
+        null = np.isnat(values)
+    elif pd.api.types.is_bool_dtype(series.dtype) or pd.api.types.is_numeric_dtype(series.dtype):
+        values = series.to_numpy()
+        if values.dtype == object:  # enteros/booleanos nullable con NA
+            values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        info["kind"] = "numeric"
+        stats_values = values
+        null = np.isnan(values) if values.dtype.kind == "f" else None
+    else:
+        text = series.where(series.isna(), series.astype(str))
+        codes, uniques = pd.factorize(text, sort=True)
+        values = codes.astype(np.int32)
+        info["kind"] = "category"
+        info["categories"] = stem + ".categories.json"
+        with open(root / info["categories"], "w", encoding="utf-8") as f:
+            json.dump([str(u) for u in uniques], f, ensure_ascii=False)
+        stats_values = values
+        null = values < 0
+    np.save(root / info["file"], values, allow_pickle=False)
+    info["dtype"] = str(values.dtype)
+    info["stats"] = _row_group_stats(stats_values, null)
+    return info
+
+
+def _row_group_stats(values: np.ndarray, null: Optional[np.ndarray]) -> List[Optional[List[Any]]]:
+    stats: List[Optional[List[Any]]] = []
+    for start in range(0, len(values), ROW_GROUP_ROWS):
+        chunk = values[start:start + ROW_GROUP_ROWS]
+        if null is not None:
+            chunk = chunk[~null[start:start + ROW_GROUP_ROWS]]
+        stats.append([chunk.min().item(), chunk.max().item()] if len(chunk) else None)
+    return stats
+
+
+def _to_datetime_value(op: str, value: Any) -> Any:
+    import pandas as pd
+
+    def one(v: Any) -> np.datetime64:
+        return pd.Timestamp(v).to_datetime64().astype("datetime64[ns]")
+
+    if op == "in":
+        return [one(v) for v in value]
+    if op == "between":
+        return (one(value[0]), one(value[1]))
+    return one(value)
+
+
+def _group_may_match(stats: Optional[List[Any]], op: str, value: Any) -> bool:
+    """False only when the row-group min/max prove no row can match."""
+    if op == "!=":
+        return True  # las estadísticas no cuentan los NaN, que sí cumplen !=
+    if stats is None:
+        return False
+    lo, hi = stats
+    value = _stat_value(value)
+    if op == "==":
+        return lo <= value <= hi
+    if op == "<":
+        return lo < value
+    if op == "<=":
+        return lo <= value
+    if op == ">":
+        return hi > value
+    if op == ">=":
+        return hi >= value
+    if op == "in":
+        return any(lo <= v <= hi for v in value)
+    a, b = value
+    return a <= hi and b >= lo
+
+
+def _stat_value(value: Any) -> Any:
+    # las estadísticas de fechas se guardan como int64 (ns)
+    if isinstance(value, np.datetime64):
+        return int(value.astype(np.int64))
+    if isinstance(value, (list, tuple)):
+        return type(value)(_stat_value(v) for v in value)
+    return value
+
+
+def _apply(values: np.ndarray, op: str, value: Any) -> np.ndarray:
+    if op == "==":
+        return values == value
+    if op == "!=":
+        return values != value
+    if op == "<":
+        return values < value
+    if op == "<=":
+        return values <= value
+    if op == ">":
+        return values > value
+    if op == ">=":
+        return values >= value
+    if op == "in":
+        return np.isin(values, list(value))
+    a, b = value
+    return (values >= a) & (values <= b)
+
+
+# ---------------------------------------------------------------- registry
+
+_stores: Dict[Tuple[str, str], Tuple[Tuple[int, int], ColumnStore]] = {}
+_stores_lock = threading.Lock()
+
+
+def _cache_root(source: Path, read_kwargs: Dict[str, Any]) -> Path:
+    try:
+        rel = source.resolve().relative_to(DATASET_DIR)
+    except ValueError:
+        rel = Path(source.name)
+    key = hashlib.blake2b(json.dumps(read_kwargs, sort_keys=True, default=str).encode(), digest_size=4).hexdigest()
+    return CACHE_DIR / (str(rel).replace(os.sep, "__") + "." + key)
+
+
+def open_dataset(path: Any, **read_kwargs: Any) -> ColumnStore:
+    """Columnar store of the CSV at `path`, built (or rebuilt) when the CSV changed.
+
+    `read_kwargs` go to ``pd.read_csv`` when building (``parse_dates``,
+    ``thousands``...) and are part of the cache key.
+    """
+    return _open(Path(path), read_kwargs, build=True)
+
+
+def _open(source: Path, read_kwargs: Dict[str, Any], build: bool) -> Optional[ColumnStore]:
+    """Current store of `source`; with build=False, None instead of converting the CSV."""
+    st = source.stat()
+    stat_key = (st.st_mtime_ns, st.st_size)
+    root = _cache_root(source, read_kwargs)
+    cache_key = (str(source.resolve()), str(root))
+    cached = _stores.get(cache_key)
+    if cached is not None and cached[0] == stat_key:
+        return cached[1]
+    with _stores_lock:
+        cached = _stores.get(cache_key)
+        if cached is not None and cached[0] == stat_key:
+            return cached[1]
+        store = _open_or_build(source, root, read_kwargs, stat_key, build)
+        if store is None:
+            return None
+        _stores[cache_key] = (stat_key, store)
+    return store
+
+
+def _open_or_build(source: Path, root: Path, read_kwargs: Dict[str, Any], stat_key: Tuple[int, int],
+                   build: bool = True) -> Optional[ColumnStore]:
+    meta = _read_meta(root)
+    if meta is not None and meta.get("format") == STORE_FORMAT:
+        src = meta.get("source", {})
+        if (src.get("mtime_ns"), src.get("size")) == stat_key:
+            return ColumnStore(root, meta)
+        if build and src.get("size") == stat_key[1] and src.get("hash") == file_hash(source):
+            # solo cambió el mtime (copia, checkout): el contenido es el mismo
+            meta["source"]["mtime_ns"] = stat_key[0]
+            _write_meta(root, meta)
+            return ColumnStore(root, meta)
+    if not build:
+        return None
+    version = {"path": str(source), "mtime_ns": stat_key[0], "size": stat_key[1], "hash": file_hash(source)}
+    print(f"[Datasets] convirtiendo {source.name} a caché columnar...")
+    store = ColumnStore.build(source, root, read_kwargs, version)
+    print(f"[Datasets] {source.name}: {store.num_rows} filas, {len(store.columns)} columnas -> {root}")
+    return store
+
+
+def load_dataset(path: Any, columns: Optional[Sequence[str]] = None, filters: Optional[Sequence[Filter]] = None,
+                 nrows: Optional[int] = None, as_category: bool = False, **read_kwargs: Any) -> Any:
+    """Read a CSV under backend/datasets through the columnar cache.
+
+    columns: projection (only those columns are read); filters: list of
+    ``(column, op, value)`` ANDed together, evaluated per row group after
+    skipping the groups whose min/max exclude them; nrows: like read_csv.
+    """
+    if not CACHE_ENABLED:
+        return _read_csv_direct(Path(path), columns, filters, nrows, **read_kwargs)
+    if nrows is not None:
+        # una muestra no justifica convertir el CSV entero: la caché solo si ya está al día
+        store = _open(Path(path), read_kwargs, build=False)
+        if store is None:
+            return _read_csv_direct(Path(path), columns, filters, nrows, **read_kwargs)
+        return store.read(columns, filters, nrows, as_category)
+    return open_dataset(path, **read_kwargs).read(columns, filters, nrows, as_category)
+
+
+def _read_csv_direct(path: Path, columns: Optional[Sequence[str]], filters: Optional[Sequence[Filter]],
+                     nrows: Optional[int], **read_kwargs: Any) -> Any:
+    import pandas as pd
+
+    df = pd.read_csv(path, nrows=nrows, **read_kwargs)
+    for column, op, value in filters or ():
+        if op not in _OPS:
+            raise ValueError(f"Operador de filtro no soportado: {op!r} (usa {', '.join(_OPS)})")
+        values = df[column]
+        if pd.api.types.is_datetime64_any_dtype(values.dtype):
+            value = _to_datetime_value(op, value)
+        mask = values.isin(list(value)) if op == "in" else _apply(values, op, value)
+        df = df[np.asarray(mask, dtype=bool)]
+    df = df.reset_index(drop=True)
+    return df if columns is None else df[list(columns)]
+
+
+def cache_stats() -> Dict[str, Any]:
+    """Stores opened by this process (for diagnostics)."""
+    with _stores_lock:
+        return {Path(src).name: store.describe() for (src, _), (_, store) in _stores.items()}
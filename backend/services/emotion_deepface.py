@@ -15,11 +15,8 @@ os.environ.setdefault("TF_USE_LEGACY_KERAS", "1")
 os.environ.setdefault("KERAS_BACKEND", "tensorflow")
 # Quiet TensorFlow C++ logs (optional)
 os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "2")
-import cv2
-
-# Ensure DeepFace uses legacy Keras API with TF >= 2.20
-os.environ.setdefault("TF_USE_LEGACY_KERAS", "1")
-os.environ.setdefault("KERAS_BACKEND", "tensorflow")
+# cv2 and deepface (TensorFlow) are imported on first use: importing this module
+# must stay cheap because app.py serves prediction traffic without them.
 
 
 def _analyze_with_deepface(img_path: str) -> Dict[str, Any]:
@@ -75,11 +72,34 @@ def _analyze_with_deepface(img_path: str) -> Dict[str, Any]:
     }
 
 
+def warm_up() -> Dict[str, Any]:
+    """Build the DeepFace emotion model and detector by analysing a blank frame.
+
+    The first real request otherwise pays for TensorFlow graph construction and
+    weight loading.
+    """
+    import time
+
+    import numpy as np
+    from deepface import DeepFace
+
+    t0 = time.perf_counter()
+    DeepFace.analyze(
+        img_path=np.zeros((224, 224, 3), dtype=np.uint8),
+        actions=["emotion"],
+        detector_backend=os.getenv("EMOTION_DETECTOR_BACKEND", "opencv"),
+        enforce_detection=False,
+    )
+    return {"ok": True, "seconds": time.perf_counter() - t0}
+
+
 def analyze_image_file(path: str | os.PathLike) -> Dict[str, Any]:
     p = Path(path)
     if not p.exists():
         return {"error": "file_not_found", "path": str(path)}
 
+    import cv2
+
     # DeepFace can read .webp, but we can also validate OpenCV load
     img = cv2.imread(str(p))
     if img is None:
@@ -0,0 +1,519 @@
+"""Declarative feature specs: ``params`` dicts -> 2-D feature matrix.
+
+Every model that accepts ``params`` has one entry in ``FEATURE_SPECS`` listing
+its columns in the trainer's ``feature_cols`` order: which keys to read, the
+default, how to convert the value, which saved encoder to apply, or how to
+derive the column from the others. ``spec.compile(package, derived)`` binds the
+package's encoders (and the precomputed forecast curve) once per artifact load
+and returns ``params_list -> np.ndarray``, evaluated column by column, so one
+request and a batch of N requests take the same path.
+"""
+from __future__ import annotations
+
+import random
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+CompiledSpec = Callable[[List[Dict[str, Any]]], np.ndarray]
+
+DAY_INDEX = {
+    "monday": 0, "mon": 0, "lunes": 0,
+    "tuesday": 1, "tue": 1, "martes": 1,
+    "wednesday": 2, "wed": 2, "miercoles": 2, "miércoles": 2,
+    "thursday": 3, "thu": 3, "jueves": 3,
+    "friday": 4, "fri": 4, "viernes": 4,
+    "saturday": 5, "sat": 5, "sabado": 5, "sábado": 5,
+    "sunday": 6, "sun": 6, "domingo": 6,
+}
+
+
+def day_index(value: Any, default: int = 4) -> int:
+    """Día de la semana 0=lunes..6=domingo desde nombre (es/en) o entero (1..7 estilo BigQuery = domingo primero)."""
+    if isinstance(value, str):
+        return DAY_INDEX.get(value.strip().lower(), default)
+    if isinstance(value, int):
+        return (value - 1) % 7 if value > 6 else value
+    return default
+
+
+def to_bin(value: Any) -> int:
+    """'Y'/'N', True/False, 1/0 o numérico -> 0/1."""
+    if value is None:
+        return 0
+    if isinstance(value, (int, float)):
+        return 1 if float(value) != 0 else 0
+    return 1 if str(value).strip().upper() in ('Y', 'YES', '1', 'TRUE') else 0
+
+
+def horizon_days(params: Optional[Dict[str, Any]]) -> int:
+    """Horizonte en días a partir de 'days' o 'years' (years tiene prioridad). Default 1."""
+    years_val = params.get('years') if params and 'years' in params else None
+    days_val = params.get('days') if params and 'days' in params else None
+    if years_val is not None:
+        try:
+            return int(float(years_val) * 365)
+        except Exception:
+            return int(float(years_val))
+    try:
+        return int(float(days_val)) if days_val is not None else 1
+    except Exception:
+        return 1
+
+
+def horizon_months(params: Optional[Dict[str, Any]]) -> int:
+    """Horizonte en meses a partir de 'months', 'days' (/30) o 'years' (*12). Default 1."""
+    months_val = None
+    if params:
+        if 'months' in params:
+            months_val = params.get('months')
+        elif 'days' in params:
+            try:
+                months_val = float(params.get('days')) / 30.0
+            except Exception:
+                months_val = None
+        elif 'years' in params:
+            try:
+                months_val = float(params.get('years')) * 12.0
+            except Exception:
+                months_val = None
+    try:
+        return int(float(months_val)) if months_val is not None else 1
+    except Exception:
+        return 1
+
+
+def bitcoin_features(horizon_days: int) -> List[float]:
+    # Bitcoin - Predicción a CORTO PLAZO (días, no años)
+    # Features: price_lag_1, price_lag_2, price_lag_3, price_lag_7, rolling_mean_7, rolling_mean_30
+    # Precio base más realista
+    random.seed(int(max(1, horizon_days) * 137))  # Seed único por día
+    base_price = 45000.0 + (horizon_days * random.uniform(50, 150))  # Variación diaria ~$50-150
+    volatility = random.uniform(0.97, 1.03)  # ±3% volatilidad diaria
+    # Return 7 features matching training: 6 price-derived features + horizon_days
+    return [
+        base_price * volatility,
+        base_price * 0.998 * volatility,
+        base_price * 0.997 * volatility,
+        base_price * 0.995 * volatility,
+        base_price * 0.999 * volatility,
+        base_price * 1.001 * volatility,
+        float(horizon_days)
+    ]
+
+
+def sp500_features(horizon_days: int) -> List[float]:
+    # SP500 - Predicción a CORTO PLAZO (días)
+    # Features: open, high, low, volume, price_change, high_low_diff, close_lag_1, close_lag_5, close_lag_10, rolling_mean_5, rolling_mean_20
+    random.seed(int(max(1, horizon_days) * 271))  # Seed único por día
+    base = 4500.0 + (horizon_days * random.uniform(5, 20))  # Variación diaria ~$5-20
+    vol_factor = random.uniform(0.98, 1.02)  # ±2% volatilidad
+    # Return 12 features: the 11 price/volume features plus horizon_days
+    return [
+        base * vol_factor,
+        base * 1.005 * vol_factor,
+        base * 0.995 * vol_factor,
+        5000000 + int(horizon_days * 50000),
+        random.uniform(-20, 20),
+        random.uniform(10, 30),
+        base * 0.999 * vol_factor,
+        base * 0.997 * vol_factor,
+        base * 0.995 * vol_factor,
+        base * vol_factor,
+        base * 1.002 * vol_factor,
+        float(horizon_days)
+    ]
+
+
+def avocado_features(horizon_months: int) -> List[float]:
+    # Avocado - Predicción a CORTO PLAZO (months)
+    random.seed(int(max(1, horizon_months) * 181))  # Seed único por mes
+    # Small variations by months
+    vol_factor = 1.0 + (horizon_months * 0.01 * random.uniform(0.95, 1.05))
+    # Build realistic-looking features matching trainer feature_cols:
+    # ['avg_price','total_volume','v_4046','v_4225','v_4770','total_bags','small_bags','large_bags','xlarge_bags','lag_1','lag_3','rolling_3','horizon_months']
+    avg_price = 1.5 * vol_factor
+    total_volume = 100000 * vol_factor
+    v_4046 = 50000 * vol_factor
+    v_4225 = 30000 * vol_factor
+    v_4770 = 10000 * vol_factor
+    total_bags = 5000 * vol_factor
+    small_bags = 4000 * vol_factor
+    large_bags = 800 * vol_factor
+    xlarge_bags = 200 * vol_factor
+    # lag features derived from avg_price
+    lag_1 = avg_price * 0.99
+    lag_3 = avg_price * 0.97
+    rolling_3 = (avg_price * 0.99 + avg_price * 0.98 + avg_price * 1.0) / 3.0
+    return [
+        avg_price,
+        total_volume,
+        v_4046,
+        v_4225,
+        v_4770,
+        total_bags,
+        small_bags,
+        large_bags,
+        xlarge_bags,
+        lag_1,
+        lag_3,
+        rolling_3,
+        float(horizon_months)
+    ]
+
+
+BITCOIN_STATE_COLS = ['price_lag_1', 'price_lag_2', 'price_lag_3', 'price_lag_7', 'rolling_mean_7', 'rolling_mean_30']
+
+
+def bitcoin_latest_state(df: Any) -> Optional[Dict[str, Any]]:
+    """Lags y medias móviles (7/30 días) de la fila completa más reciente del CSV de precios.
+
+    Lo guarda el trainer en el paquete ('latest_features'); ModelRunner lo
+    recalcula del CSV solo para artefactos antiguos.
+    """
+    import pandas as pd
+
+    df = df.copy()
+    price_col = next((c for c in df.columns if 'close' in c.lower() or 'price' in c.lower()), 'Close')
+    price = df[price_col]
+    if price.dtype == object:
+        price = price.str.replace(',', '')
+    df['price'] = pd.to_numeric(price, errors='coerce')
+    for lag in (1, 2, 3, 7):
+        df[f'price_lag_{lag}'] = df['price'].shift(lag)
+    df['rolling_mean_7'] = df['price'].rolling(7).mean()
+    df['rolling_mean_30'] = df['price'].rolling(30).mean()
+    df = df.dropna()
+    if df.empty:
+        return None
+    recent = df.iloc[-1]
+    state: Dict[str, Any] = {c: float(recent[c]) for c in BITCOIN_STATE_COLS}
+    if 'Date' in df.columns:
+        state['date'] = str(recent['Date'])
+    return state
+
+
+# Modelo por ticker del S&P 500: features adimensionales (retornos, distancia a
+# medias móviles, volatilidad) de una ventana de TICKER_WINDOW cierres, así un
+# solo modelo sirve para tickers de cualquier precio. Objetivo: close[t+h] / close[t] - 1.
+TICKER_WINDOW = 21
+TICKER_FEATURE_COLS = ['ret_1', 'ret_5', 'ret_10', 'ret_20', 'ma_ratio_5', 'ma_ratio_20', 'volatility_20', 'range']
+
+
+def ticker_window_features(close: np.ndarray, high: np.ndarray, low: np.ndarray) -> np.ndarray:
+    """Features of the last day of each window: (..., TICKER_WINDOW) arrays -> (..., len(TICKER_FEATURE_COLS)).
+
+    The trainer passes sliding windows over each ticker's history and the
+    server the latest window of every ticker, so both compute the same values.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        c = close[..., -1]
+        returns = np.diff(close, axis=-1) / close[..., :-1]
+        return np.stack([
+            c / close[..., -2] - 1,
+            c / close[..., -6] - 1,
+            c / close[..., -11] - 1,
+            c / close[..., -21] - 1,
+            c / close[..., -5:].mean(axis=-1) - 1,
+            c / close[..., -20:].mean(axis=-1) - 1,
+            returns[..., -20:].std(axis=-1),
+            (high[..., -1] - low[..., -1]) / c,
+        ], axis=-1)
+
+
+# ---------------------------------------------------------------- columns
+
+class Column:
+    """A raw input: the first non-null key among (name, *aliases), else `default`, through `convert`."""
+
+    def __init__(self, name: str, *aliases: str, default: Any = None, convert: Callable[[Any], Any] = float):
+        self.name = name
+        self.keys = (name,) + aliases
+        self.default = default
+        self.convert = convert
+
+    def raw(self, params: Dict[str, Any]) -> Any:
+        for key in self.keys:
+            value = params.get(key)
+            if value is not None:
+                return value
+        return self.default
+
+    def compile(self, package: Any, model_obj: Any) -> Callable[[List[Dict[str, Any]], Dict[str, np.ndarray]], np.ndarray]:
+        convert = self.convert
+
+        def column(params_list, _cols):
+            return np.array([convert(self.raw(p)) for p in params_list], dtype=np.float64)
+        return column
+
+
+class CategoryCodec:
+    """Label -> code table compiled from a fitted LabelEncoder (code = index in classes_).
+
+    Built once per artifact load; encoding is a dict lookup instead of
+    ``transform`` (input validation + searchsorted, and an exception for every
+    unknown label). Unknown labels get the code of `unknown` when the encoder
+    knows it, else `None` / -1.
+    """
+
+    MISSING = -1
+
+    def __init__(self, classes: Sequence[Any], unknown: Optional[str] = None):
+        self.classes = list(classes)
+        self.codes: Dict[str, int] = {str(c): i for i, c in enumerate(self.classes)}
+        self.unknown_code = self.codes.get(unknown) if unknown is not None else None
+
+    @classmethod
+    def from_encoder(cls, encoder: Any, unknown: Optional[str] = None) -> Optional["CategoryCodec"]:
+        classes = getattr(encoder, 'classes_', None)
+        return cls(classes, unknown) if classes is not None else None
+
+    def __len__(self) -> int:
+        return len(self.classes)
+
+    def encode(self, label: Any) -> Optional[int]:
+        code = self.codes.get(str(label))
+        return self.unknown_code if code is None else code
+
+    def encode_many(self, labels: Sequence[Any]) -> np.ndarray:
+        """Vectorized encode: each distinct label is looked up once; unknown -> MISSING."""
+        if not len(labels):
+            return np.empty(0, dtype=np.int64)
+        uniq, inverse = np.unique(np.asarray([str(v) for v in labels]), return_inverse=True)
+        missing = self.MISSING if self.unknown_code is None else self.unknown_code
+        table = np.fromiter((self.codes.get(u, missing) for u in uniq.tolist()), dtype=np.int64, count=len(uniq))
+        return table[inverse.ravel()]
+
+    def decode(self, code: int) -> Any:
+        return self.classes[int(code)]
+
+
+class Encoded(Column):
+    """A categorical input mapped through an encoder saved in the package.
+
+    `encoder` is the path of the encoder inside the package, e.g.
+    ``('encoders', 'origin')``; it is compiled into a ``CategoryCodec``. Values
+    the encoder does not know map to the code of `unknown` (if given and known),
+    else to ``fallback(params)``. A missing value maps to the first class.
+    """
+
+    # por debajo de este tamaño de lote el dict directo es más rápido que np.unique
+    VECTORIZE_MIN_ROWS = 32
+
+    def __init__(self, name: str, *aliases: str, encoder: Sequence[str], default: Any = None,
+                 unknown: Optional[str] = None, fallback: Callable[[Dict[str, Any]], int] = lambda p: 0,
+                 convert: Callable[[Any], Any] = str):
+        super().__init__(name, *aliases, default=default, convert=convert)
+        self.encoder_path = tuple(encoder)
+        self.unknown = unknown
+        self.fallback = fallback
+
+    def codec(self, package: Any) -> Optional[CategoryCodec]:
+        enc = package
+        for key in self.encoder_path:
+            enc = enc.get(key) if isinstance(enc, dict) else None
+        return CategoryCodec.from_encoder(enc, self.unknown)
+
+    def compile(self, package, model_obj):
+        codec = self.codec(package)
+
+        def column(params_list, _cols):
+            raws = [self.raw(p) for p in params_list]
+            if codec is None or not len(codec):
+                return np.array([self.fallback(p) for p in params_list], dtype=np.float64)
+            if len(params_list) >= self.VECTORIZE_MIN_ROWS:
+                codes = codec.encode_many([0 if r is None else self.convert(r) for r in raws])
+                codes[[r is None for r in raws]] = 0
+                out = codes.astype(np.float64)
+                for i in np.flatnonzero(codes == CategoryCodec.MISSING):
+                    out[i] = self.fallback(params_list[i])
+                return out
+            out = np.empty(len(params_list), dtype=np.float64)
+            for i, (p, raw) in enumerate(zip(params_list, raws)):
+                code = 0 if raw is None else codec.encode(self.convert(raw))
+                out[i] = self.fallback(p) if code is None else code
+            return out
+        return column
+
+
+class Derived:
+    """A column computed (vectorized) from the columns before it."""
+
+    def __init__(self, name: str, fn: Callable[[Dict[str, np.ndarray]], Any]):
+        self.name = name
+        self.fn = fn
+
+    def compile(self, package, model_obj):
+        def column(params_list, cols):
+            return np.broadcast_to(np.asarray(self.fn(cols), dtype=np.float64), (len(params_list),))
+        return column
+
+
+def Const(name: str, value: float) -> Derived:
+    return Derived(name, lambda cols: value)
+
+
+# ---------------------------------------------------------------- specs
+
+class FeatureSpec:
+    """Columns in the trainer's feature_cols order.
+
+    `compact` maps a feature count to a shorter column list, for older
+    artifacts trained on fewer features (model.n_features_in_).
+    """
+
+    def __init__(self, columns: List[Any], compact: Optional[Dict[int, List[str]]] = None):
+        self.columns = columns
+        self.compact = compact or {}
+
+    @property
+    def names(self) -> List[str]:
+        return [c.name for c in self.columns]
+
+    def resolve(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Raw value of every input column (defaults applied, before conversion/encoding)."""
+        return {c.name: c.raw(params) for c in self.columns if isinstance(c, Column)}
+
+    def compile(self, package: Any, derived: Optional[Dict[str, Any]] = None) -> CompiledSpec:
+        model_obj = package.get('model') if isinstance(package, dict) else package
+        compiled = [(c.name, c.compile(package, model_obj)) for c in self.columns]
+        keep = self.compact.get(int(getattr(model_obj, 'n_features_in_', 0) or 0))
+
+        def build(params_list: List[Dict[str, Any]]) -> np.ndarray:
+            cols: Dict[str, np.ndarray] = {}
+            for name, column in compiled:
+                cols[name] = column(params_list, cols)
+            names = keep or [name for name, _ in compiled]
+            return np.column_stack([cols[n] for n in names]) if params_list else np.empty((0, len(names)))
+        return build
+
+
+class HorizonSpec:
+    """Time-series models: the only input is the horizon (days or months).
+
+    Rows inside the precomputed forecast curve are copied from it; the rest are
+    built with `features(horizon)`.
+    """
+
+    def __init__(self, unit: str, features: Callable[[int], List[float]]):
+        self.unit = unit
+        self.features = features
+
+    def horizon(self, params: Optional[Dict[str, Any]]) -> int:
+        return horizon_months(params) if self.unit == 'months' else horizon_days(params)
+
+    def resolve(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return {self.unit: self.horizon(params)}
+
+    def compile(self, package: Any, derived: Optional[Dict[str, Any]] = None) -> CompiledSpec:
+        curve = (derived or {}).get("curve")
+
+        def build(params_list: List[Dict[str, Any]]) -> np.ndarray:
+            horizons = [self.horizon(p) for p in params_list]
+            if curve is not None and all(curve.covers(h) for h in horizons):
+                return curve.X[np.asarray(horizons, dtype=np.int64) - 1]
+            rows = [curve.features(h) if curve is not None and curve.covers(h) else self.features(h)
+                    for h in horizons]
+            return np.array(rows, dtype=np.float64).reshape(len(rows), -1)
+        return build
+
+
+def _model_year(cols):
+    return 2025 - cols['Year']
+
+
+CAR_SPEC = FeatureSpec([
+    # Year, Present_Price, Kms_Driven, Fuel_Type_encoded, Seller_Type_encoded, Transmission_encoded, Owner
+    Column('Year', 'year', default=2015),
+    # Estimamos el precio presente basado en el año (autos más nuevos valen más)
+    Derived('Present_Price', lambda c: np.maximum(1.0, 10.0 - _model_year(c) * 0.5)),
+    Column('Kms_Driven', 'km', default=50000),
+    Const('fuel_enc', 0),     # 0=Petrol, 1=Diesel, 2=CNG
+    Const('seller_enc', 0),   # 0=Dealer, 1=Individual
+    Const('trans_enc', 0),    # 0=Manual, 1=Automatic
+    # Estimamos dueños previos basado en edad del carro
+    Derived('Owner', lambda c: np.minimum(3, np.trunc(_model_year(c) / 5))),
+])
+
+BMI_SPEC = FeatureSpec([
+    # espera {'height': 1.78, 'weight': 78, 'age': 30}
+    Column('height'),
+    Column('weight'),
+    Column('age', default=30),
+])
+
+LONDON_SPEC = FeatureSpec([
+    # ['month','day_of_week','borough_le']
+    Column('month', default=10, convert=int),
+    Column('day_of_week', 'day', convert=day_index),
+    Encoded('borough', 'borough_le', 'borough_name', encoder=('encoder',),
+            fallback=lambda p: int(p.get('borough_le', 0) or 0)),
+])
+
+CHICAGO_SPEC = FeatureSpec([
+    # dow0 (0=Monday), month, community_area
+    Column('day_of_week', 'day', convert=day_index),
+    Column('month', default=10, convert=int),
+    Column('community_area', 'district', default=-1, convert=int),
+], compact={1: ['day_of_week']})
+
+AIRLINE_SPEC = FeatureSpec([
+    # mismo orden que feature_cols de scripts/train_airline_delay_model.py
+    Column('Month', 'month', 'm', default=6),
+    Column('DayofMonth', 'day', 'd', default=15),
+    Column('DayOfWeek', 'day_of_week', 'dow', default=3),
+    Column('CRSDepTime', 'crs_dep_time', 'dep_time', default=1200),
+    Column('CRSArrTime', 'crs_arr_time', 'arr_time', default=1400),
+    Column('CRSElapsedTime', 'crs_elapsed', default=120),
+    Column('Distance', 'distance', 'dist', default=500),
+    Encoded('Origin', 'origin', 'orig', encoder=('encoders', 'origin'), default='OTHER', unknown='OTHER'),
+    Encoded('Dest', 'dest', 'destination', encoder=('encoders', 'dest'), default='OTHER', unknown='OTHER'),
+    Encoded('UniqueCarrier', 'carrier', 'unique_carrier', encoder=('encoders', 'carrier'), default='XX'),
+])
+
+
+def _sex_fallback(params: Dict[str, Any]) -> int:
+    sex = params.get('Sex', params.get('sex', 'U'))
+    return 1 if str(sex).strip().upper() in ('M', 'MALE') else 0
+
+
+CIRRHOSIS_SPEC = FeatureSpec([
+    # cols_num + bools (_bin) + Sex_le, Drug_le: mismo orden que el trainer (17 features)
+    Column('N_Days', 'n_days', default=1000),
+    Column('Age', 'age', default=18250),  # edad en días
+    Column('Bilirubin', 'bilirubin', default=1.5),
+    Column('Cholesterol', 'cholesterol', default=280),
+    Column('Albumin', 'albumin', default=3.5),
+    Column('Copper', 'copper', default=70),
+    Column('Alk_Phos', 'alk_phos', default=1200),
+    Column('SGOT', 'sgot', default=100),
+    Column('Tryglicerides', 'tryglicerides', default=100),
+    Column('Platelets', 'platelets', default=250),
+    Column('Prothrombin', 'prothrombin', default=11),
+    Column('Ascites', 'ascites', default=0, convert=to_bin),
+    Column('Hepatomegaly', 'hepatomegaly', default=0, convert=to_bin),
+    Column('Spiders', 'spiders', default=0, convert=to_bin),
+    # Edema en el dataset: '0','S','Y'
+    Column('Edema', 'edema', default=0, convert=to_bin),
+    Encoded('Sex', 'sex', encoder=('encoders', 'sex'), default='U', fallback=_sex_fallback),
+    Encoded('Drug', 'drug', encoder=('encoders', 'drug'), default='Unknown'),
+])
+
+# Registro por nombre de artefacto (y nombres legacy): despacho O(1)
+FEATURE_SPECS: Dict[str, Any] = {
+    'car_price': CAR_SPEC,
+    'car_model': CAR_SPEC,
+    'bmi_model': BMI_SPEC,
+    'bitcoin_model': HorizonSpec('days', bitcoin_features),
+    'sp500_model': HorizonSpec('days', sp500_features),
+    'avocado_model': HorizonSpec('months', avocado_features),
+    'avocado_price': HorizonSpec('months', avocado_features),
+    'london_crime_model': LONDON_SPEC,
+    'london_crime': LONDON_SPEC,
+    'chicago_crime': CHICAGO_SPEC,
+    'chicago_crime_model': CHICAGO_SPEC,
+    'airline_delay_model': AIRLINE_SPEC,
+    'airline_delay': AIRLINE_SPEC,
+    'cirrhosis_model': CIRRHOSIS_SPEC,
+    'cirrhosis_classifier': CIRRHOSIS_SPEC,
+}
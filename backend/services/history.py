@@ -0,0 +1,177 @@
+"""Historical OHLCV range queries for the S&P 500 tickers and bitcoin.
+
+Every symbol is a sorted int64 day array (days since 1970-01-01) plus an
+(n, 5) float64 open/high/low/close/volume array. S&P 500 tickers are slices
+of the memory-mapped index of the ticker store (services/ticker_index.py).
+Bitcoin (``BTC``) is parsed once from the training and test CSVs, newest file
+wins per day, and re-read when one of them changes. A date range is two binary
+searches (``np.searchsorted``) on the day array. Downsampling to N points
+splits the slice into N buckets and keeps, per bucket, the first date and open,
+the max high, the min low, the last close and the summed volume.
+
+``encode_json`` / ``encode_binary`` yield the result column by column, for a
+streaming response.
+"""
+from __future__ import annotations
+
+import json
+import math
+import os
+import struct
+import threading
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from services.datasets import DATASET_DIR, load_dataset
+from services.ticker_store import COLUMNS
+
+BTC_SOURCES = [
+    DATASET_DIR / "bitcoin" / "bitcoin_price_Training - Training.csv",
+    DATASET_DIR / "bitcoin" / "bitcoin_price_1week_Test - Test.csv",
+]
+BTC_SYMBOLS = {"BTC", "BITCOIN", "BTC-USD"}
+# Filas máximas por respuesta (con o sin downsampling)
+HISTORY_MAX_ROWS = int(os.getenv("HISTORY_MAX_ROWS", "100000") or 100000)
+BINARY_MAGIC = b"OHLC"
+
+
+class History(NamedTuple):
+    symbol: str
+    dates: np.ndarray   # (n,) int64 días
+    ohlcv: np.ndarray   # (n, 5) float64
+
+
+def to_day(value: Any) -> int:
+    """Date-like (ISO string, datetime, int days) -> int64 days since 1970-01-01."""
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    import pandas as pd
+
+    return int(pd.Timestamp(value).to_datetime64().astype("datetime64[D]").astype(np.int64))
+
+
+def downsample(dates: np.ndarray, ohlcv: np.ndarray, points: int) -> Tuple[np.ndarray, np.ndarray]:
+    """At most `points` buckets: first date/open, max high, min low, last close, summed volume."""
+    n = len(dates)
+    if points <= 0 or n <= points:
+        return dates, ohlcv
+    starts = np.unique(np.linspace(0, n, points, endpoint=False).astype(np.int64))
+    ends = np.append(starts[1:], n) - 1
+    o, h, l, c, v = (ohlcv[:, i] for i in range(len(COLUMNS)))
+    out = np.empty((len(starts), len(COLUMNS)), dtype=np.float64)
+    out[:, 0] = o[starts]
+    out[:, 1] = np.fmax.reduceat(h, starts)   # fmax/fmin ignoran NaN
+    out[:, 2] = np.fmin.reduceat(l, starts)
+    out[:, 3] = c[ends]
+    out[:, 4] = np.add.reduceat(np.nan_to_num(v), starts)
+    return dates[starts], out
+
+
+class HistoryStore:
+    def __init__(self, ticker_index: Callable[[], Any]):
+        # callable -> TickerIndex actual (ModelRunner.ticker_index: se reabre tras cada ingesta)
+        self._ticker_index = ticker_index
+        self._btc: Optional[Tuple[tuple, History]] = None
+        self._lock = threading.Lock()
+
+    def symbols(self) -> List[str]:
+        index = self._ticker_index()
+        names = sorted(index.tickers()) if index is not None else []
+        if any(p.exists() for p in BTC_SOURCES):
+            names.insert(0, "BTC")
+        return names
+
+    def series(self, symbol: str) -> History:
+        key = str(symbol).strip().upper()
+        if key in BTC_SYMBOLS:
+            return self._bitcoin()
+        index = self._ticker_index()
+        if index is None or key not in index:
+            raise KeyError(f"Símbolo '{symbol}' no encontrado")
+        dates, ohlcv = index.slice(key)
+        return History(key, dates, ohlcv)
+
+    def query(self, symbol: str, start: Any = None, end: Any = None, points: Optional[int] = None) -> History:
+        """Rows of `symbol` with start <= date <= end (inclusive), optionally downsampled to `points`."""
+        series = self.series(symbol)
+        lo = 0 if start is None else int(np.searchsorted(series.dates, to_day(start), side="left"))
+        hi = len(series.dates) if end is None else int(np.searchsorted(series.dates, to_day(end), side="right"))
+        dates, ohlcv = series.dates[lo:max(lo, hi)], series.ohlcv[lo:max(lo, hi)]
+        if points is not None and int(points) > 0:
+            dates, ohlcv = downsample(np.asarray(dates), np.asarray(ohlcv), int(points))
+        # también con points <= 0 o points mayor que el límite: downsample devuelve el rango completo
+        if len(dates) > HISTORY_MAX_ROWS:
+            raise ValueError(f"{len(dates)} filas en la respuesta: usa 'points' <= {HISTORY_MAX_ROWS}")
+        return History(series.symbol, np.ascontiguousarray(dates), np.ascontiguousarray(ohlcv))
+
+    def _bitcoin(self) -> History:
+        version = tuple((p.stat().st_mtime_ns, p.stat().st_size) if p.exists() else None for p in BTC_SOURCES)
+        cached = self._btc
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        with self._lock:
+            cached = self._btc
+            if cached is None or cached[0] != version:
+                cached = (version, _load_bitcoin())
+                self._btc = cached
+        return cached[1]
+
+
+def _load_bitcoin() -> History:
+    import pandas as pd
+
+    frames = [load_dataset(p) for p in BTC_SOURCES if p.exists()]
+    if not frames:
+        raise KeyError("Símbolo 'BTC' no disponible: faltan los CSV de datasets/bitcoin")
+    df = pd.concat(frames, ignore_index=True)
+    df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
+    df = df.dropna(subset=["Date"]).drop_duplicates("Date", keep="last").sort_values("Date")
+    values = np.empty((len(df), len(COLUMNS)), dtype=np.float64)
+    for i, col in enumerate(COLUMNS):
+        raw = df[col.capitalize()]
+        if not pd.api.types.is_numeric_dtype(raw):
+            raw = raw.str.replace(",", "")  # "860,575,000"; "-" -> NaN
+        values[:, i] = pd.to_numeric(raw, errors="coerce").to_numpy(dtype=np.float64)
+    dates = df["Date"].to_numpy(dtype="datetime64[D]").astype(np.int64)
+    return History("BTC", dates, values)
+
+
+# ---------------------------------------------------------------- encoders
+
+def encode_json(history: History) -> Iterator[bytes]:
+    """Columnar JSON: {"symbol", "rows", "date": [ISO...], "open": [...], ...}; NaN -> null."""
+    yield (f'{{"symbol":{json.dumps(history.symbol)},"rows":{len(history.dates)},"date":').encode()
+    yield json.dumps(history.dates.astype("datetime64[D]").astype(str).tolist()).encode()
+    for i, col in enumerate(COLUMNS):
+        values = history.ohlcv[:, i]
+        items = values.tolist()
+        if not np.isfinite(values).all():
+            items = [x if math.isfinite(x) else None for x in items]
+        yield f',"{col}":'.encode() + json.dumps(items, separators=(",", ":")).encode()
+    yield b"}"
+
+
+def binary_header(history: History) -> Dict[str, Any]:
+    n = len(history.dates)
+    columns = [{"name": "date", "dtype": "<i8", "unit": "days since 1970-01-01"}]
+    columns += [{"name": col, "dtype": "<f8"} for col in COLUMNS]
+    offset = 0
+    for c in columns:
+        c["offset"], c["nbytes"] = offset, 8 * n
+        offset += 8 * n
+    return {"symbol": history.symbol, "rows": n, "columns": columns}
+
+
+def encode_binary(history: History) -> Iterator[bytes]:
+    """b"OHLC" + uint32 header length + JSON header + little-endian columns back to back.
+
+    Each column is ``rows`` values: date as int64 days since 1970-01-01, then
+    open/high/low/close/volume as float64 (NaN = missing); the header lists
+    each column's offset from the end of the header.
+    """
+    header = json.dumps(binary_header(history), separators=(",", ":")).encode()
+    yield BINARY_MAGIC + struct.pack("<I", len(header)) + header
+    yield history.dates.astype("<i8").tobytes()
+    for i in range(len(COLUMNS)):
+        yield np.ascontiguousarray(history.ohlcv[:, i], dtype="<f8").tobytes()
@@ -0,0 +1,171 @@
+"""Executor layer that keeps blocking inference off the asyncio event loop.
+
+Endpoints are ``async def``; calling sklearn, DeepFace or a speech SDK directly
+inside them blocks the worker's event loop, so one slow request stalls every
+other request it is serving. ``InferenceExecutor`` runs that work in pools:
+
+- a shared thread pool (default) for work that releases the GIL: numpy/sklearn
+  tree traversal, TensorFlow, network calls to the speech services;
+- worker processes for pure-Python-heavy model work (feature building, small
+  forests where the GIL dominates): ``services.inference_workers.WorkerPool``,
+  fed through shared-memory buffers.
+
+Pools are assigned per name (a model name, or ``emotion`` / ``stt`` /
+``command``) with ``INFERENCE_POOLS``, e.g.
+``airline_delay_model=process,cirrhosis_model=process,emotion=thread:2``;
+``kind:N`` gives the name a dedicated pool of N workers instead of the shared one.
+Only model predictions can go to a process pool; other work always uses threads.
+"""
+from __future__ import annotations
+
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+def parse_pools(spec: str) -> Dict[str, Tuple[str, int]]:
+    """'a=process,b=thread:2' -> {'a': ('process', 0), 'b': ('thread', 2)} (0 = shared pool)."""
+    pools: Dict[str, Tuple[str, int]] = {}
+    for item in (spec or "").split(","):
+        if "=" not in item:
+            continue
+        name, _, value = item.partition("=")
+        kind, _, size = value.strip().lower().partition(":")
+        if kind not in ("thread", "process"):
+            print(f"[Inference] tipo de pool desconocido para {name.strip()}: {kind!r} (se usa thread)")
+            kind = "thread"
+        try:
+            workers = max(0, int(size)) if size else 0
+        except ValueError:
+            workers = 0
+        pools[name.strip()] = (kind, workers)
+    return pools
+
+
+class InferenceExecutor:
+    def __init__(self, runner, threads: Optional[int] = None, processes: Optional[int] = None,
+                 pools: Optional[Dict[str, Tuple[str, int]]] = None):
+        if threads is None:
+            threads = int(os.getenv("INFERENCE_THREADS", "0") or 0) or min(32, (os.cpu_count() or 1) + 4)
+        if processes is None:
+            processes = int(os.getenv("INFERENCE_PROCESSES", "0") or 0) or (os.cpu_count() or 1)
+        if pools is None:
+            pools = parse_pools(os.getenv("INFERENCE_POOLS", ""))
+        self.runner = runner
+        self.threads = max(1, threads)
+        self.processes = max(1, processes)
+        self.pools = pools
+        self._thread_pool = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="inference")
+        # los pools de procesos (y los dedicados) se crean dentro del worker de
+        # gunicorn/uvicorn que los va a usar: en start() o en el primer uso
+        self._process_pool = None
+        self._dedicated: Dict[str, Any] = {}
+        self._counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def kind_for(self, name: str) -> str:
+        return self.pools.get(name, ("thread", 0))[0]
+
+    def _new_process_pool(self, workers: int, name: str, models: List[str]):
+        from services.inference_workers import WorkerPool
+
+        return WorkerPool(self.runner, workers, name=name, models=models)
+
+    def start(self) -> None:
+        """Start the worker processes of every name assigned to a process pool."""
+        for name, (kind, _) in self.pools.items():
+            if kind == "process":
+                self._executor_for(name, allow_process=True)[1].start()
+
+    def thread_pool(self, name: str) -> Executor:
+        """Thread pool assigned to `name`, for services that submit work themselves."""
+        return self._executor_for(name, allow_process=False)[1]
+
+    def _executor_for(self, name: str, allow_process: bool) -> Tuple[str, Any]:
+        kind, workers = self.pools.get(name, ("thread", 0))
+        if kind == "process" and not allow_process:
+            kind, workers = "thread", 0
+        with self._lock:
+            if workers:
+                key = f"{name}:{kind}"
+                pool = self._dedicated.get(key)
+                if pool is None:
+                    if kind == "process":
+                        pool = self._new_process_pool(workers, name, [name])
+                    else:
+                        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"inference-{name}")
+                    self._dedicated[key] = pool
+                return kind, pool
+            if kind == "process":
+                if self._process_pool is None:
+                    shared = [n for n, (k, w) in self.pools.items() if k == "process" and not w]
+                    self._process_pool = self._new_process_pool(self.processes, "shared", shared)
+                return kind, self._process_pool
+            return kind, self._thread_pool
+
+    async def run(self, name: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a blocking callable in the thread pool assigned to `name`."""
+        _, pool = self._executor_for(name, allow_process=False)
+        self._count(name)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(pool, functools.partial(fn, *args, **kwargs))
+
+    async def predict(self, model_name: str, features: Optional[List[float]] = None,
+                      params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """ModelRunner.predict in the pool configured for model_name."""
+        return await self._call_model("predict", model_name, features, params)
+
+    async def predict_batch(self, model_name: str, features: Optional[List[List[float]]] = None,
+                            params: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+        """ModelRunner.predict_batch in the pool configured for model_name."""
+        return await self._call_model("predict_batch", model_name, features, params)
+
+    async def _call_model(self, method: str, model_name: str, features: Any, params: Any) -> Any:
+        kind, pool = self._executor_for(model_name, allow_process=True)
+        self._count(model_name)
+        loop = asyncio.get_running_loop()
+        if kind == "process":
+            # el hilo solo espera la respuesta del worker (sin el GIL)
+            call = functools.partial(getattr(pool, method), model_name, features=features, params=params)
+            return await loop.run_in_executor(self._thread_pool, call)
+        call = functools.partial(getattr(self.runner, method), model_name, features=features, params=params)
+        return await loop.run_in_executor(pool, call)
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counts[name] = self._counts.get(name, 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            workers = {}
+            if self._process_pool is not None:
+                workers["shared"] = self._process_pool.health()
+            for key, pool in self._dedicated.items():
+                if hasattr(pool, "health"):
+                    workers[key] = pool.health()
+            return {
+                "threads": self.threads,
+                "processes": self.processes,
+                "pools": {name: f"{kind}:{workers}" if workers else kind
+                          for name, (kind, workers) in self.pools.items()},
+                "dedicated_pools": sorted(self._dedicated),
+                "workers": workers,
+                "calls": dict(self._counts),
+            }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pools = [self._process_pool, *self._dedicated.values()]
+            self._dedicated.clear()
+            self._process_pool = None
+        self._thread_pool.shutdown(wait=False, cancel_futures=True)
+        for pool in pools:
+            if pool is None:
+                continue
+            if isinstance(pool, ThreadPoolExecutor):
+                pool.shutdown(wait=False, cancel_futures=True)
+            else:
+                pool.shutdown()
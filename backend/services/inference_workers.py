@@ -0,0 +1,451 @@
+"""Inference worker processes fed through shared-memory buffers.
+
+RandomForest ``predict`` on small batches and the per-row feature building in
+``ModelRunner._to_features_for_model`` hold the GIL, so threads cannot spread
+them over cores. ``WorkerPool`` starts N worker processes that each hold the
+models and exchange data with the API process through two ``SharedMemory``
+buffers per worker:
+
+- request buffer: the float64 feature matrix (API -> worker); for params
+  requests the worker writes back the feature rows it built, which the API
+  echoes as ``input``;
+- response buffer: predictions followed by ``predict_proba`` (worker -> API).
+
+Only a small control tuple travels over the worker's pipe, so a 10k-row batch
+is not pickled. Inputs that do not fit numeric buffers (the movie recommender,
+param dicts, string labels) fall back to pickling over the pipe.
+
+Workers never fork the API process itself: by then it runs executor threads,
+the health monitor and request threads, and a lock held by any of them at fork
+time (model runner, dataset store, ticker index, OpenMP/BLAS pools) would stay
+locked forever in the child. They are started from a ``forkserver`` (a
+single-threaded process that has only imported the services; ``spawn`` where
+it does not exist), build their own lazy ``ModelRunner`` and load the models
+of their pool before reporting ready. They reload an artifact when the API
+reports a newer version.
+
+Routing: each request takes an idle worker from a queue (waiting if all are
+busy) and holds it until its response has been copied out of shared memory.
+Health: a worker that dies or exceeds ``INFERENCE_WORKER_TIMEOUT`` is killed
+and restarted; a monitor thread pings idle workers every
+``INFERENCE_WORKER_HEALTH_INTERVAL`` seconds.
+"""
+from __future__ import annotations
+
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# filas de params que se envían por mensaje (se convierten en el worker)
+PARAMS_CHUNK = 4096
+
+
+class WorkerError(RuntimeError):
+    """The worker died or stopped answering; it has been restarted."""
+
+    def __init__(self, message: str, timed_out: bool = False):
+        super().__init__(message)
+        self.timed_out = timed_out
+
+
+# ---------------------------------------------------------------- worker side
+
+def _worker_main(conn, req_shm, resp_shm, model_dir: str, mmap_mode: Optional[str], preload: List[str]) -> None:
+    from services.model_runner import ModelRunner
+
+    runner = ModelRunner(model_dir, lazy=True, mmap_mode=mmap_mode)
+    for name in preload:
+        # el resto de modelos se carga en su primer uso
+        try:
+            runner.get_package(name)
+        except Exception as e:
+            print(f"[Inference] WARN worker {os.getpid()} no pudo cargar {name}: {e}")
+    req = np.ndarray((req_shm.size // 8,), dtype=np.float64, buffer=req_shm.buf)
+    resp = np.ndarray((resp_shm.size // 8,), dtype=np.float64, buffer=resp_shm.buf)
+    conn.send(("ready", os.getpid()))
+    while True:
+        try:
+            msg = conn.recv()
+        except (EOFError, OSError):
+            break
+        if msg[0] == "stop":
+            break
+        try:
+            conn.send(("ok", _handle(runner, req, resp, msg)))
+        except Exception as e:
+            conn.send(("error", type(e).__name__, str(e)))
+    del req, resp
+
+
+def _handle(runner, req: np.ndarray, resp: np.ndarray, msg: tuple) -> Any:
+    op, name, version, payload = msg
+    if op == "ping":
+        return os.getpid()
+    loaded = runner.artifact_version(name)
+    if version is not None and loaded is not None and version[0] > loaded[0]:
+        # la API ya sirve un artefacto más nuevo (mtime_ns): alinear este proceso. Si el
+        # worker tiene uno más nuevo (se reinició o cargó después de que cambió el archivo
+        # y la API aún no recargó), se sirve el cargado: recargar no lo acercaría a la API
+        runner.reload_model(name)
+    if op == "call":
+        method, features, params = payload
+        return getattr(runner, method)(name, features=features, params=params)
+
+    meta: Dict[str, Any] = {}
+    if op == "features":
+        rows, cols = payload
+        X = req[:rows * cols].reshape(rows, cols)
+    else:  # "params"
+        X = np.asarray(runner.batch_features(name, payload), dtype=np.float64)
+        if X.ndim != 2:
+            raise ValueError(f"Todas las filas deben tener el mismo número de features para {name}")
+        if X.size <= req.size:
+            req[:X.size] = X.ravel()
+            meta["cols"] = X.shape[1]
+        else:
+            meta["X"] = X
+    pred, proba = runner.score(name, X)
+    rows = X.shape[0]
+    meta["rows"] = rows
+    used = 0
+    if pred.dtype.kind in "biuf" and pred.ndim == 1 and rows <= resp.size:
+        resp[:rows] = pred
+        meta["pred_dtype"] = pred.dtype.str
+        used = rows
+    else:
+        meta["pred"] = pred
+    if proba is not None:
+        proba = np.asarray(proba)
+        if proba.ndim == 2 and used + proba.size <= resp.size:
+            resp[used:used + proba.size] = proba.ravel()
+            meta["proba_cols"] = proba.shape[1]
+        else:
+            meta["proba"] = proba
+    return meta
+
+
+# ---------------------------------------------------------------- API side
+
+class _Worker:
+    def __init__(self, index: int, ctx, nbytes: int):
+        self.index = index
+        self.ctx = ctx
+        self.req_shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        self.resp_shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        self.req = np.ndarray((nbytes // 8,), dtype=np.float64, buffer=self.req_shm.buf)
+        self.resp = np.ndarray((nbytes // 8,), dtype=np.float64, buffer=self.resp_shm.buf)
+        self.process = None
+        self.conn = None
+        self.pid: Optional[int] = None
+        self.restarts = -1  # el primer start no cuenta como reinicio
+        self.served = 0
+        self.last_error: Optional[str] = None
+        self.started_at: Optional[float] = None
+
+    def start(self, runner, timeout: float, preload: List[str]) -> None:
+        parent_conn, child_conn = self.ctx.Pipe()
+        process = self.ctx.Process(
+            target=_worker_main,
+            args=(child_conn, self.req_shm, self.resp_shm, runner.model_dir, runner.mmap_mode, list(preload)),
+            name=f"inference-worker-{self.index}",
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        self.process, self.conn = process, parent_conn
+        self.restarts += 1
+        self.started_at = time.time()
+        status, pid = self._receive(timeout)
+        if status != "ready":
+            raise WorkerError(f"worker {self.index}: respuesta inesperada al iniciar: {status}")
+        self.pid = pid
+
+    def request(self, msg: tuple, timeout: float) -> tuple:
+        try:
+            self.conn.send(msg)
+        except (BrokenPipeError, OSError) as e:
+            raise WorkerError(f"worker {self.index} no disponible: {e}")
+        return self._receive(timeout)
+
+    def _receive(self, timeout: float) -> tuple:
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                if self.conn.poll(min(0.5, max(0.0, deadline - time.monotonic()))):
+                    return self.conn.recv()
+            except (EOFError, OSError) as e:
+                raise WorkerError(f"worker {self.index} terminó: {e}")
+            if not self.process.is_alive():
+                raise WorkerError(f"worker {self.index} terminó (exit {self.process.exitcode})")
+            if time.monotonic() >= deadline:
+                raise WorkerError(f"worker {self.index} no respondió en {timeout:g}s", timed_out=True)
+
+    def alive(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+    def stop(self, kill: bool = False) -> None:
+        if self.process is None:
+            return
+        if not kill and self.process.is_alive():
+            try:
+                self.conn.send(("stop",))
+            except Exception:
+                pass
+            self.process.join(2)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join(2)
+        try:
+            self.conn.close()
+        except Exception:
+            pass
+        self.process = None
+
+    def close(self) -> None:
+        self.stop()
+        del self.req, self.resp
+        for shm in (self.req_shm, self.resp_shm):
+            try:
+                shm.close()
+                shm.unlink()
+            except Exception:
+                pass
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "index": self.index,
+            "pid": self.pid,
+            "alive": self.alive(),
+            "served": self.served,
+            "restarts": max(0, self.restarts),
+            "uptime_seconds": round(time.time() - self.started_at, 1) if self.started_at else None,
+            "last_error": self.last_error,
+        }
+
+
+class WorkerPool:
+    """N inference processes sharing numpy buffers with the API process."""
+
+    def __init__(self, runner, workers: int, buffer_mb: Optional[float] = None,
+                 timeout: Optional[float] = None, health_interval: Optional[float] = None,
+                 name: str = "inference", models: Optional[List[str]] = None,
+                 start_timeout: Optional[float] = None):
+        if buffer_mb is None:
+            buffer_mb = float(os.getenv("INFERENCE_SHM_MB", "4") or 4)
+        if timeout is None:
+            timeout = float(os.getenv("INFERENCE_WORKER_TIMEOUT", "30") or 30)
+        if health_interval is None:
+            health_interval = float(os.getenv("INFERENCE_WORKER_HEALTH_INTERVAL", "10") or 10)
+        if start_timeout is None:
+            start_timeout = float(os.getenv("INFERENCE_WORKER_START_TIMEOUT", "120") or 120)
+        self.runner = runner
+        self.name = name
+        self.size = max(1, int(workers))
+        self.nbytes = max(8, int(buffer_mb * 1024 * 1024) // 8 * 8)
+        self.timeout = timeout
+        self.health_interval = health_interval
+        # el worker carga estos modelos al arrancar (y tras cada reinicio)
+        self.models = list(models or [])
+        self.start_timeout = max(timeout, start_timeout)
+        # nunca fork del proceso API (tiene hilos): forkserver arranca cada worker
+        # desde un proceso de un solo hilo con los servicios ya importados
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            self._ctx = multiprocessing.get_context("forkserver")
+            self._ctx.set_forkserver_preload(["__main__", "services.model_runner"])
+        else:
+            self._ctx = multiprocessing.get_context("spawn")
+        self._workers: List[_Worker] = []
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._started = False
+        self._closed = False
+        self._monitor_stop = threading.Event()
+
+    # ------------------------------------------------------------ lifecycle
+    def start(self) -> None:
+        with self._lock:
+            if self._started:
+                return
+            t0 = time.perf_counter()
+            for i in range(self.size):
+                worker = _Worker(i, self._ctx, self.nbytes)
+                worker.start(self.runner, self.start_timeout, self.models)
+                self._workers.append(worker)
+                self._idle.put(worker)
+            self._started = True
+            print(f"[Inference] {self.size} workers '{self.name}' iniciados en {time.perf_counter() - t0:.2f}s "
+                  f"(buffers {self.nbytes / 1e6:.1f} MB)")
+            if self.health_interval > 0:
+                threading.Thread(target=self._monitor, name=f"{self.name}-health", daemon=True).start()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._closed = True
+            self._monitor_stop.set()
+            for worker in self._workers:
+                worker.close()
+            self._workers = []
+
+    def _restart(self, worker: _Worker, reason: str) -> None:
+        print(f"[Inference] reiniciando worker {self.name}/{worker.index}: {reason}")
+        worker.last_error = reason
+        worker.stop(kill=True)
+        if self._closed:
+            return
+        try:
+            worker.start(self.runner, self.start_timeout, self.models)
+        except Exception as e:
+            worker.last_error = f"{reason}; reinicio falló: {e}"
+            print(f"[Inference] ERROR reiniciando worker {self.name}/{worker.index}: {e}")
+
+    # ------------------------------------------------------------ routing
+    def _acquire(self) -> _Worker:
+        if not self._started:
+            self.start()
+        try:
+            worker = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise RuntimeError(f"ningún worker '{self.name}' libre en {self.timeout:g}s")
+        if not worker.alive():
+            self._restart(worker, "proceso no activo")
+        return worker
+
+    def _call(self, msg: tuple, load: Optional[np.ndarray] = None, retry: bool = True) -> Tuple[tuple, _Worker]:
+        """Send msg to an idle worker; the caller must release the worker after reading its buffers."""
+        worker = self._acquire()
+        try:
+            if load is not None:
+                worker.req[:load.size] = load.ravel()
+            reply = worker.request(msg, self.timeout)
+        except WorkerError as e:
+            self._restart(worker, str(e))
+            self._idle.put(worker)
+            # las predicciones no tienen efectos secundarios: reintentar una vez si el
+            # worker murió (no si se agotó el tiempo: la petición misma puede ser la causa)
+            if retry and not e.timed_out:
+                return self._call(msg, load, retry=False)
+            raise
+        if reply[0] == "error":
+            self._idle.put(worker)
+            _, kind, message = reply
+            raise (ValueError if kind == "ValueError" else RuntimeError)(message)
+        worker.served += 1
+        return reply, worker
+
+    # ------------------------------------------------------------ API
+    def predict(self, model_name: str, features: Optional[List[float]] = None,
+                params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """ModelRunner.predict in a worker (features go through shared memory)."""
+        if features is not None:
+            try:
+                row = np.asarray(features, dtype=np.float64)
+            except (TypeError, ValueError):
+                row = None
+            if row is not None and row.ndim == 1:
+                return self.predict_batch(model_name, features=[features])[0]
+        # params (o features anidados): ModelRunner.predict en el worker, por el pipe
+        return self._pickled("predict", model_name, features, params)
+
+    def predict_batch(self, model_name: str, features: Optional[List[List[float]]] = None,
+                      params: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+        """ModelRunner.predict_batch in the workers, one vectorized call per buffer-sized chunk."""
+        name = self.runner._resolve_name(model_name)
+        if name == "movie_recommender" or (features is None and params is None):
+            return self._pickled("predict_batch", model_name, features, params)
+        if name not in self.runner._artifacts:
+            raise ValueError(f"Modelo '{model_name}' no cargado. Modelos disponibles: {self.runner.get_available_models()}")
+        version = self.runner.artifact_version(name)
+        results: List[Dict[str, Any]] = []
+        if features is not None:
+            inputs = [list(r) for r in features]
+            if not inputs:
+                return []
+            try:
+                X = np.asarray(inputs, dtype=np.float64)
+            except (TypeError, ValueError):
+                return self._pickled("predict_batch", model_name, features, params)
+            if X.ndim != 2:
+                raise ValueError(f"Todas las filas deben tener el mismo número de features para {name}")
+            chunk = max(1, (self.nbytes // 8) // max(1, X.shape[1]))
+
+            def score(part: np.ndarray) -> tuple:
+                pred, proba, _ = self._scored(("features", name, version, part.shape), load=part)
+                return pred, proba
+
+            for start in range(0, X.shape[0], chunk):
+                # las filas ya en la caché de resultados del proceso API no se envían al worker
+                results.extend(self.runner.predict_with_cache(
+                    name, X[start:start + chunk], inputs[start:start + chunk], version, score))
+            return results
+        for start in range(0, len(params), PARAMS_CHUNK):
+            part = params[start:start + PARAMS_CHUNK]
+            pred, proba, X = self._scored(("params", name, version, part))
+            results.extend(self.runner.format_predictions(name, pred, proba, X.tolist()))
+        return results
+
+    def _scored(self, msg: tuple, load: Optional[np.ndarray] = None) -> tuple:
+        """Run a features/params request and copy its outputs out of shared memory."""
+        (_, meta), worker = self._call(msg, load)
+        try:
+            rows = meta["rows"]
+            if "pred" in meta:
+                pred = np.asarray(meta["pred"])
+                used = 0
+            else:
+                pred = worker.resp[:rows].astype(np.dtype(meta["pred_dtype"]))
+                used = rows
+            proba = meta.get("proba")
+            if "proba_cols" in meta:
+                k = meta["proba_cols"]
+                proba = worker.resp[used:used + rows * k].reshape(rows, k).copy()
+            X = meta.get("X")
+            if X is None and "cols" in meta:
+                X = worker.req[:rows * meta["cols"]].reshape(rows, meta["cols"]).copy()
+            return pred, proba, X
+        finally:
+            self._idle.put(worker)
+
+    def _pickled(self, method: str, model_name: str, features: Any, params: Any) -> Any:
+        name = self.runner._resolve_name(model_name)
+        msg = ("call", model_name, self.runner.artifact_version(name), (method, features, params))
+        (_, result), worker = self._call(msg)
+        self._idle.put(worker)
+        return result
+
+    # ------------------------------------------------------------ health
+    def check_health(self, timeout: float = 5.0) -> List[Dict[str, Any]]:
+        """Ping every idle worker and restart the ones that are dead or unresponsive."""
+        if not self._started:
+            return []
+        checked = []
+        for _ in range(len(self._workers)):
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break  # el resto está atendiendo peticiones
+            try:
+                if not worker.alive():
+                    raise WorkerError("proceso no activo")
+                worker.request(("ping", None, None, None), timeout)
+            except WorkerError as e:
+                self._restart(worker, str(e))
+            checked.append(worker)
+        for worker in checked:
+            self._idle.put(worker)
+        return self.health()
+
+    def health(self) -> List[Dict[str, Any]]:
+        return [w.info() for w in self._workers]
+
+    def _monitor(self) -> None:
+        while not self._monitor_stop.wait(self.health_interval):
+            try:
+                self.check_health()
+            except Exception as e:
+                print(f"[Inference] ERROR revisando workers {self.name}: {e}")
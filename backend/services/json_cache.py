@@ -0,0 +1,93 @@
+"""Serialized JSON payloads cached per source version, with ETags.
+
+Metadata endpoints (movie genres/years, airports, carriers) derive their
+payload from a model artifact or a dataset that changes only when the file
+changes. ``VersionedJsonCache`` keeps the serialized body and a content hash
+(ETag) per name and rebuilds only when the caller's version key (artifact
+``(mtime_ns, size)``, dataset stat, ...) changes. The ETag is computed from the
+bytes, so every worker process hands out the same one and a client that
+revalidates with If-None-Match gets a 304 without a body.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from typing import Any, Callable, Dict, Hashable, NamedTuple, Optional
+
+
+class JsonEntry(NamedTuple):
+    version: Hashable
+    body: bytes
+    etag: str
+
+
+def dumps(payload: Any) -> bytes:
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def etag_for(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check (weak comparison, lists and '*' supported)."""
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or (tag[2:] if tag.startswith("W/") else tag) == etag:
+            return True
+    return False
+
+
+class VersionedJsonCache:
+    def __init__(self):
+        self._entries: Dict[str, JsonEntry] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "builds": 0, "not_modified": 0}
+
+    def peek(self, name: str, version: Hashable) -> Optional[JsonEntry]:
+        """Cached entry of `name` if it was built for `version` (None never matches)."""
+        entry = self._entries.get(name)
+        if entry is None or version is None or entry.version != version:
+            return None
+        with self._lock:
+            self._stats["hits"] += 1
+        return entry
+
+    def get(self, name: str, version_fn: Callable[[], Hashable], build: Callable[[], Any]) -> JsonEntry:
+        """Cached entry, rebuilt with build() when the version changed.
+
+        The version is read before building: if the source changes meanwhile,
+        the entry is stored under the old version and rebuilt on the next call.
+        A None version (source not loaded yet) is built but not stored.
+        """
+        version = version_fn()
+        entry = self.peek(name, version)
+        if entry is not None:
+            return entry
+        body = dumps(build())
+        entry = JsonEntry(version, body, etag_for(body))
+        with self._lock:
+            self._stats["builds"] += 1
+            if version is not None:
+                self._entries[name] = entry
+        return entry
+
+    def count_not_modified(self) -> None:
+        with self._lock:
+            self._stats["not_modified"] += 1
+
+    def invalidate(self, name: Optional[str] = None) -> None:
+        with self._lock:
+            if name is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(name, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            s: Dict[str, Any] = dict(self._stats)
+            s["entries"] = {name: {"bytes": len(e.body), "etag": e.etag} for name, e in self._entries.items()}
+        return s
@@ -0,0 +1,138 @@
+"""Dense lookup tables for models with a small, integer input domain.
+
+When every feature of a model takes a handful of integer values (London crime:
+month x weekday x borough; Chicago crime: weekday x month x community area),
+the whole input space can be scored once with a single vectorized ``predict``
+and kept as an n-dimensional numpy array. Requests inside the domain are then
+answered by indexing instead of walking the forest.
+
+The time-series models (bitcoin, sp500, avocado) only vary with the forecast
+horizon, so ``ForecastCurve`` keeps their prediction for every horizon 1..N;
+a "price in N days" query, or a whole range, is a slice of that array.
+"""
+from __future__ import annotations
+
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class LookupTable:
+    def __init__(self, axes: Sequence[Tuple[int, int]], pred: np.ndarray, proba: Optional[np.ndarray] = None):
+        self.axes = [(int(lo), int(hi)) for lo, hi in axes]
+        self.lows = np.array([lo for lo, _ in self.axes], dtype=np.int64)
+        self.highs = np.array([hi for _, hi in self.axes], dtype=np.int64)
+        self.shape = tuple(int(hi - lo + 1) for lo, hi in self.axes)
+        self.pred = pred.reshape(self.shape)
+        self.proba = proba.reshape(self.shape + (proba.shape[-1],)) if proba is not None else None
+
+    @property
+    def cells(self) -> int:
+        return int(np.prod(self.shape))
+
+    @property
+    def nbytes(self) -> int:
+        return self.pred.nbytes + (self.proba.nbytes if self.proba is not None else 0)
+
+    @classmethod
+    def build(cls, model_obj: Any, axes: Sequence[Tuple[int, int]]) -> "LookupTable":
+        """Score every point of the integer grid `axes` ([(min, max)] inclusive) in one call."""
+        ranges = [np.arange(lo, hi + 1, dtype=np.float64) for lo, hi in axes]
+        grid = np.stack(np.meshgrid(*ranges, indexing="ij"), axis=-1).reshape(-1, len(ranges))
+        pred = np.asarray(model_obj.predict(grid))
+        proba = np.asarray(model_obj.predict_proba(grid)) if hasattr(model_obj, "predict_proba") else None
+        return cls(axes, pred, proba)
+
+    def lookup(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]:
+        """(in_domain mask, pred, proba) for the rows of X that fall on the grid."""
+        Xf = np.asarray(X, dtype=np.float64)
+        if Xf.ndim != 2 or Xf.shape[1] != len(self.axes):
+            return np.zeros(len(Xf), dtype=bool), self.pred.ravel()[:0], None
+        Xi = np.rint(Xf)
+        mask = np.all((Xi == Xf) & (Xi >= self.lows) & (Xi <= self.highs), axis=1)
+        idx = tuple((Xi[mask, j].astype(np.int64) - self.lows[j]) for j in range(len(self.axes)))
+        pred = self.pred[idx]
+        proba = self.proba[idx] if self.proba is not None else None
+        return mask, pred, proba
+
+    def describe(self) -> dict:
+        return {"axes": self.axes, "cells": self.cells, "bytes": self.nbytes}
+
+
+class ForecastCurve:
+    def __init__(self, unit: str, X: np.ndarray, pred: np.ndarray, proba: Optional[np.ndarray] = None):
+        self.unit = unit
+        self.X = X          # fila i = features del horizonte i + 1
+        self.pred = pred
+        self.proba = proba
+
+    @property
+    def max_horizon(self) -> int:
+        return len(self.pred)
+
+    @property
+    def cells(self) -> int:
+        return self.max_horizon
+
+    @property
+    def nbytes(self) -> int:
+        return self.X.nbytes + self.pred.nbytes + (self.proba.nbytes if self.proba is not None else 0)
+
+    @classmethod
+    def build(cls, model_obj: Any, unit: str, max_horizon: int,
+              features: Callable[[int], List[float]]) -> "ForecastCurve":
+        """Score horizons 1..max_horizon (features(h) -> row) in one call."""
+        X = np.array([features(h) for h in range(1, max_horizon + 1)], dtype=np.float64)
+        pred = np.asarray(model_obj.predict(X))
+        proba = np.asarray(model_obj.predict_proba(X)) if hasattr(model_obj, "predict_proba") else None
+        return cls(unit, X, pred, proba)
+
+    def covers(self, horizon: int) -> bool:
+        return 1 <= horizon <= self.max_horizon
+
+    def features(self, horizon: int) -> List[float]:
+        return self.X[horizon - 1].tolist()
+
+    def at(self, horizon: int) -> Any:
+        return self.pred[horizon - 1]
+
+    def range(self, start: int, end: int, step: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """(horizons, predictions) for start..end inclusive, clipped to the curve."""
+        start, end, step = max(1, int(start)), min(self.max_horizon, int(end)), max(1, int(step))
+        if end < start:
+            return np.empty(0, dtype=np.int64), self.pred[:0]
+        return np.arange(start, end + 1, step, dtype=np.int64), self.pred[start - 1:end:step]
+
+    def lookup(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]:
+        """(mask, pred, proba) for the rows of X that are exactly a precomputed row.
+
+        The horizon is the last feature; rows built with other inputs (explicit
+        'features' from a client) do not match and go to the model.
+        """
+        Xf = np.asarray(X, dtype=np.float64)
+        if Xf.ndim != 2 or Xf.shape[1] != self.X.shape[1]:
+            return np.zeros(len(Xf), dtype=bool), self.pred[:0], None
+        h = Xf[:, -1]
+        mask = (h == np.rint(h)) & (h >= 1) & (h <= self.max_horizon)
+        idx = h[mask].astype(np.int64) - 1
+        mask[mask] = np.all(self.X[idx] == Xf[mask], axis=1)
+        idx = Xf[mask, -1].astype(np.int64) - 1
+        return mask, self.pred[idx], (self.proba[idx] if self.proba is not None else None)
+
+    def describe(self) -> dict:
+        return {"unit": self.unit, "max_horizon": self.max_horizon, "bytes": self.nbytes}
+
+
+def merge_scores(mask: np.ndarray, table_pred: np.ndarray, table_proba: Optional[np.ndarray],
+                 model_pred: np.ndarray, model_proba: Optional[np.ndarray]) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """Interleave table rows (mask True) and model rows (mask False) back into input order."""
+    pred = np.empty(mask.shape[0], dtype=np.result_type(table_pred, model_pred))
+    pred[mask] = table_pred
+    pred[~mask] = model_pred
+    proba = None
+    if table_proba is not None and model_proba is not None:
+        proba = np.empty((mask.shape[0], table_proba.shape[-1]), dtype=np.result_type(table_proba, model_proba))
+        proba[mask] = table_proba
+        proba[~mask] = model_proba
+    return pred, proba
+
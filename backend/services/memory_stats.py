@@ -0,0 +1,128 @@
+"""Process memory helpers used to size model footprints.
+
+Reads Linux /proc counters directly so the common path has no extra
+dependencies; psutil is used as a fallback when it happens to be installed.
+"""
+from __future__ import annotations
+
+import os
+
+
+def current_rss_bytes() -> int:
+    """Return the resident set size of this process in bytes (0 if unknown)."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE")
+    except Exception:
+        pass
+    try:
+        import psutil
+
+        return int(psutil.Process().memory_info().rss)
+    except Exception:
+        return 0
+
+
+def is_memory_mapped(arr) -> bool:
+    """True if a numpy array (or the array it views) is backed by a file mapping."""
+    import mmap
+    import sys
+
+    np = sys.modules.get("numpy")
+    base = arr
+    while base is not None:
+        if (np is not None and isinstance(base, np.memmap)) or isinstance(base, mmap.mmap):
+            return True
+        base = getattr(base, "base", None)
+    return False
+
+
+def estimate_nbytes(obj, _seen=None) -> int:
+    """Approximate the memory held by a loaded model package.
+
+    Walks containers and object attributes, counting numpy buffers by their
+    ``nbytes`` (memory-mapped ones excluded) and pandas objects by their deep
+    memory usage. sklearn trees
+    keep their nodes in C buffers, so they are measured through the arrays
+    returned by ``__getstate__``.
+    """
+    if _seen is None:
+        # id -> object; holding the objects keeps ids of temporaries unique
+        _seen = {}
+    if id(obj) in _seen:
+        return 0
+    _seen[id(obj)] = obj
+
+    import sys
+
+    np = sys.modules.get("numpy")
+    pd = sys.modules.get("pandas")
+    if np is not None and isinstance(obj, np.ndarray):
+        if is_memory_mapped(obj):
+            # file-backed pages live in the shared page cache, not in this process
+            return 0
+        if obj.dtype == object:
+            return obj.nbytes + sum(estimate_nbytes(v, _seen) for v in obj.ravel())
+        # views share their base buffer; count it once
+        return 0 if isinstance(obj.base, np.ndarray) and id(obj.base) in _seen else obj.nbytes
+    if pd is not None and isinstance(obj, pd.DataFrame):
+        return estimate_nbytes(obj.index, _seen) + sum(
+            estimate_nbytes(obj.iloc[:, i], _seen) for i in range(obj.shape[1])
+        )
+    if pd is not None and isinstance(obj, pd.Series):
+        values = obj.values
+        if np is not None and isinstance(values, np.ndarray) and is_memory_mapped(values):
+            return 0
+        return int(obj.memory_usage(deep=True, index=False))
+    if pd is not None and isinstance(obj, pd.Index):
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(
+            estimate_nbytes(k, _seen) + estimate_nbytes(v, _seen) for k, v in obj.items()
+        )
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return sys.getsizeof(obj) + sum(estimate_nbytes(v, _seen) for v in obj)
+    if type(obj).__name__ == "Tree" and type(obj).__module__.startswith("sklearn.tree"):
+        try:
+            return estimate_nbytes(obj.__getstate__(), _seen)
+        except Exception:
+            pass
+    if hasattr(obj, "__dict__") and not isinstance(obj, type):
+        return sys.getsizeof(obj) + estimate_nbytes(vars(obj), _seen)
+    return sys.getsizeof(obj)
+
+
+def process_memory() -> dict:
+    """Unique vs shared memory of this process, in bytes.
+
+    ``uss`` (private pages) is what the process would free on exit; ``shared``
+    counts pages also mapped by other processes, e.g. model data a forked
+    worker still shares copy-on-write with its master. ``pss`` splits shared
+    pages evenly across the processes mapping them. Linux only; other
+    platforms report just ``rss``.
+    """
+    fields = {
+        "Rss": "rss",
+        "Pss": "pss",
+        "Shared_Clean": "shared_clean",
+        "Shared_Dirty": "shared_dirty",
+        "Private_Clean": "private_clean",
+        "Private_Dirty": "private_dirty",
+    }
+    values = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in fields:
+                    values[fields[key]] = int(rest.split()[0]) * 1024
+    except Exception:
+        return {"pid": os.getpid(), "rss": current_rss_bytes()}
+    return {
+        "pid": os.getpid(),
+        "rss": values.get("rss", 0),
+        "pss": values.get("pss", 0),
+        "uss": values.get("private_clean", 0) + values.get("private_dirty", 0),
+        "shared": values.get("shared_clean", 0) + values.get("shared_dirty", 0),
+    }
@@ -0,0 +1,115 @@
+"""Micro-batching of concurrent single-row predictions.
+
+Requests for the same model that arrive within ``max_wait_ms`` of each other
+(or until ``max_batch_size`` rows are queued) are scored together with one
+``ModelRunner.predict_batch`` call, and each caller gets back its own row.
+sklearn pays its input validation and per-estimator dispatch once per call,
+so a forest scores 64 rows in roughly the time it takes to score one.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+
+class MicroBatcher:
+    """Groups awaiting predictions per (model, input kind) and flushes them together.
+
+    ``predict_batch(model_name, features=None, params=None)`` is a coroutine
+    returning one result per row, in order (``InferenceExecutor.predict_batch``,
+    which runs ``ModelRunner.predict_batch`` off the event loop).
+    """
+
+    def __init__(self, predict_batch: Callable[..., Awaitable[List[Dict[str, Any]]]],
+                 max_wait_ms: Optional[float] = None, max_batch_size: Optional[int] = None):
+        if max_wait_ms is None:
+            max_wait_ms = float(os.getenv("MICROBATCH_MAX_WAIT_MS", "5") or 5)
+        if max_batch_size is None:
+            max_batch_size = int(os.getenv("MICROBATCH_MAX_SIZE", "64") or 64)
+        self.predict_batch = predict_batch
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.max_batch_size = max(1, max_batch_size)
+        self._pending: Dict[Tuple[str, str], List[Tuple[Any, asyncio.Future]]] = {}
+        self._timers: Dict[Tuple[str, str], asyncio.TimerHandle] = {}
+        # el loop solo guarda referencias débiles a las tareas: sin esta, un lote
+        # en curso podría ser recolectado y dejar a sus clientes esperando para siempre
+        self._tasks: Set[asyncio.Task] = set()
+        self._stats = {"batches": 0, "rows": 0, "max_batch": 0, "fallbacks": 0}
+
+    async def predict(self, model_name: str, features: Optional[List[float]] = None,
+                      params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Queue one row and wait for its result (same shape as ModelRunner.predict)."""
+        if features is None and params is None:
+            raise ValueError("Debe proveer 'features' (lista) o 'params' (dict) para predecir.")
+        loop = asyncio.get_running_loop()
+        kind = "features" if features is not None else "params"
+        key = (model_name, kind)
+        fut = loop.create_future()
+        queue = self._pending.setdefault(key, [])
+        queue.append((features if features is not None else params, fut))
+        if len(queue) >= self.max_batch_size:
+            self._flush(key)
+        elif len(queue) == 1:
+            self._timers[key] = loop.call_later(self.max_wait, self._flush, key)
+        return await fut
+
+    def stats(self) -> Dict[str, Any]:
+        s = dict(self._stats)
+        s["avg_batch"] = round(s["rows"] / s["batches"], 2) if s["batches"] else 0.0
+        s["max_wait_ms"] = self.max_wait * 1000.0
+        s["max_batch_size"] = self.max_batch_size
+        return s
+
+    def _flush(self, key: Tuple[str, str]) -> None:
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        items = self._pending.pop(key, None)
+        if items:
+            task = asyncio.ensure_future(self._run(key, items))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def close(self) -> None:
+        """Flush the queued rows and wait for every running batch (app shutdown)."""
+        for key in list(self._pending):
+            self._flush(key)
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    async def _run(self, key: Tuple[str, str], items: List[Tuple[Any, asyncio.Future]]) -> None:
+        model_name, kind = key
+        rows = [row for row, _ in items]
+        self._stats["batches"] += 1
+        self._stats["rows"] += len(rows)
+        self._stats["max_batch"] = max(self._stats["max_batch"], len(rows))
+        try:
+            results = await self.predict_batch(model_name, **{kind: rows})
+            if len(results) != len(items):
+                raise RuntimeError(f"predict_batch devolvió {len(results)} resultados para {len(items)} filas")
+        except Exception as e:
+            if len(items) == 1:
+                self._set_exception(items[0][1], e)
+                return
+            # una fila inválida no debe tumbar al resto del lote: reintentar fila a fila
+            self._stats["fallbacks"] += 1
+            for row, fut in items:
+                try:
+                    res = await self.predict_batch(model_name, **{kind: [row]})
+                    self._set_result(fut, res[0])
+                except Exception as row_error:
+                    self._set_exception(fut, row_error)
+            return
+        for (_, fut), res in zip(items, results):
+            self._set_result(fut, res)
+
+    @staticmethod
+    def _set_result(fut: asyncio.Future, value: Any) -> None:
+        if not fut.done():  # el cliente pudo haber cancelado
+            fut.set_result(value)
+
+    @staticmethod
+    def _set_exception(fut: asyncio.Future, exc: BaseException) -> None:
+        if not fut.done():
+            fut.set_exception(exc)
@@ -1,10 +1,25 @@
 # backend/services/model_runner.py
 import os
+import gc
 import joblib
 import numpy as np
+import threading
+import time
 import traceback
-import random
-from typing import List, Dict, Any, Optional
+import sys
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Dict, Any, Optional
+
+from services.memory_stats import current_rss_bytes, estimate_nbytes
+from services.prediction_cache import PredictionCache
+from services.lookup_tables import ForecastCurve, LookupTable, merge_scores
+from services.movie_catalog import MovieCatalog
+from services.movie_index import MovieIndex
+from services.ticker_index import TickerIndex
+from services.ticker_store import STORE_DIR as TICKER_STORE_DIR
+from services.datasets import load_dataset
+from services.feature_specs import FEATURE_SPECS, avocado_features, bitcoin_features, bitcoin_latest_state, sp500_features
 
 MODEL_DIR = os.path.join(os.path.dirname(__file__), "..", "models")
 # Compatibility aliases: map legacy model names to current saved artifacts
@@ -12,53 +27,532 @@ ALIASES = {
     'car_model': 'car_price',
 }
 
+# Dominio entero de cada feature (min, max inclusive) de los modelos de baja
+# cardinalidad, en el orden de sus feature_cols. "encoder" = 0..len(classes_)-1
+# del encoder del paquete. Se materializan como tablas densas al cargar.
+LOOKUP_DOMAINS: Dict[str, List[Any]] = {
+    'london_crime_model': [(1, 12), (0, 6), 'encoder'],   # month, day_of_week, borough_le
+    'chicago_crime': [(0, 6), (1, 12), (-1, 77)],         # dow0, month, community_area
+}
+LOOKUP_MAX_CELLS = 1_000_000
+
+# Modelos de series de tiempo: solo varían con el horizonte, así que al cargar se
+# precalcula la curva completa 1..max (unidad, horizonte máximo, constructor de features).
+FORECAST_MODELS: Dict[str, tuple] = {
+    'bitcoin_model': ('days', int(os.getenv("FORECAST_MAX_DAYS", "3650") or 0), bitcoin_features),
+    'sp500_model': ('days', int(os.getenv("FORECAST_MAX_DAYS", "3650") or 0), sp500_features),
+    'avocado_model': ('months', int(os.getenv("FORECAST_MAX_MONTHS", "120") or 0), avocado_features),
+}
+# Puntos máximos por llamada a ModelRunner.forecast
+FORECAST_MAX_POINTS = int(os.getenv("FORECAST_MAX_POINTS", "10000") or 10000)
+
+# Último estado de la serie (lags, medias móviles) que el trainer guarda en el
+# paquete como 'latest_features'. Para artefactos sin él se recalcula del CSV
+# (ruta, función DataFrame -> estado), cacheado por (mtime_ns, size) del archivo.
+DATASET_DIR = os.path.join(os.path.dirname(__file__), "..", "datasets")
+LATEST_STATE_SOURCES: Dict[str, tuple] = {
+    'bitcoin_model': (os.path.join(DATASET_DIR, "bitcoin", "bitcoin_price_Training - Training.csv"), bitcoin_latest_state),
+}
+
+# Modelo por ticker del S&P 500 (scripts/train_sp500_ticker_model.py) sobre el
+# índice OHLCV del store; se guardan los pronósticos de todos los tickers de los
+# últimos TICKER_FORECAST_CACHE horizontes pedidos. El horizonte máximo es el mayor
+# entrenado ('horizons' del paquete); más allá el modelo solo extrapolaría.
+TICKER_MODEL = 'sp500_ticker_model'
+TICKER_MAX_HORIZON = 252  # paquetes sin 'horizons'
+TICKER_FORECAST_CACHE = int(os.getenv("TICKER_FORECAST_CACHE", "64") or 0)
+
+# Parámetros sintéticos para el warm-up: recorren el mismo camino que una petición
+# real (conversión de params, encoders, predict/predict_proba).
+WARMUP_PARAMS: Dict[str, Dict[str, Any]] = {
+    'car_price': {'year': 2015, 'km': 50000},
+    'bmi_model': {'height': 1.75, 'weight': 70, 'age': 30},
+    'bitcoin_model': {'days': 1},
+    'sp500_model': {'days': 1},
+    'avocado_model': {'months': 1},
+    'london_crime_model': {'day_of_week': 'viernes'},
+    'chicago_crime': {'day_of_week': 'viernes'},
+    'cirrhosis_model': {'Sex': 'F', 'Drug': 'Placebo'},
+    'airline_delay_model': {'month': 6, 'day': 15},
+    'movie_recommender': {'top_k': 1, 'genre': 'Drama', 'year': 1995},
+}
+
 class ModelRunner:
     """
     Carga modelos .joblib desde backend/models/ al inicializarse.
     Provee:
       - get_available_models()
+      - get_package(model_name)  # paquete cargado (carga bajo demanda en modo lazy)
       - predict(model_name, features=None, params=None)
       - run_model(command_text)  # mapeo rápido de texto -> modelo
+
+    Modo de carga (env MODEL_LOAD_MODE):
+      - "eager" (default): todos los artefactos se cargan al inicializar, en paralelo
+        con MODEL_LOAD_WORKERS hilos (joblib libera el GIL al leer los buffers numpy).
+      - "lazy": cada modelo se carga en su primer uso. Si MODEL_MEMORY_BUDGET_MB > 0,
+        los modelos menos usados recientemente se descargan cuando la suma de sus
+        huellas RSS supera el presupuesto.
+
+    Con MODEL_MMAP_MODE=r los artefactos sin comprimir se abren con
+    joblib.load(mmap_mode='r'): los arrays numpy (columnas del DataFrame de
+    movie_recommender, encoders, etc.) quedan en el page cache compartido entre
+    workers. Los árboles de sklearn copian sus nodos al deserializar, así que
+    para ellos el ahorro viene de cargarlos antes de hacer fork de los workers.
     """
 
-    def __init__(self, model_dir: str = MODEL_DIR):
+    def __init__(self, model_dir: str = MODEL_DIR, lazy: Optional[bool] = None,
+                 memory_budget_mb: Optional[float] = None, load_workers: Optional[int] = None,
+                 mmap_mode: Optional[str] = None):
         self.model_dir = os.path.abspath(model_dir)
+        if lazy is None:
+            lazy = os.getenv("MODEL_LOAD_MODE", "eager").strip().lower() == "lazy"
+        if memory_budget_mb is None:
+            memory_budget_mb = float(os.getenv("MODEL_MEMORY_BUDGET_MB", "0") or 0)
+        if load_workers is None:
+            load_workers = int(os.getenv("MODEL_LOAD_WORKERS", "0") or 0) or min(8, os.cpu_count() or 1)
+        if mmap_mode is None:
+            mmap_mode = os.getenv("MODEL_MMAP_MODE", "").strip() or None
+        self.lazy = bool(lazy)
+        self.mmap_mode = mmap_mode
+        self.load_workers = max(1, int(load_workers))
+        self.memory_budget_bytes = int(memory_budget_mb * 1024 * 1024)
         self.models: Dict[str, Any] = {}
-        self._load_all_models()
+        # nombre -> ruta del artefacto de cada .joblib encontrado en disco (cargado o no)
+        self._artifacts: Dict[str, str] = {}
+        # nombre -> bytes de RSS atribuidos al modelo cargado
+        self._footprints: Dict[str, int] = {}
+        # orden de uso de los modelos cargados (el más antiguo primero) para desalojo LRU
+        self._lru: "OrderedDict[str, None]" = OrderedDict()
+        # nombre -> {load_seconds, file_bytes, memory_bytes} de la última carga
+        self.load_stats: Dict[str, Dict[str, Any]] = {}
+        self.startup_seconds: Optional[float] = None
+        # nombre -> (mtime_ns, size) del artefacto del que salió el modelo cargado
+        self._versions: Dict[str, tuple] = {}
+        self._watcher: Optional[threading.Thread] = None
+        self._watcher_stop = threading.Event()
+        self._lock = threading.RLock()
+        # nombre -> lock de carga: una sola carga por modelo a la vez, sin bloquear a los demás
+        self._load_locks: Dict[str, threading.Lock] = {}
+        # resultados por fila, clave (modelo, versión del artefacto, features)
+        self.prediction_cache = PredictionCache()
+        # nombre -> estructuras derivadas del paquete (tablas de consulta...), se
+        # reconstruyen en cada carga y se intercambian junto con el paquete
+        self._derived: Dict[str, Dict[str, Any]] = {}
+        self.lookup_tables_enabled = os.getenv("MODEL_LOOKUP_TABLES", "1") != "0"
+        # nombre -> ((mtime_ns, size) del CSV, estado) para paquetes sin 'latest_features'
+        self._latest_states: Dict[str, tuple] = {}
+        self._latest_lock = threading.Lock()
+        # ((mtime_ns, size) de index.json, TickerIndex) del store S&P 500
+        self._ticker_index: Optional[tuple] = None
+        # (versión del modelo, generación del índice, horizonte) -> cambio previsto por ticker
+        self._ticker_forecasts: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+        self._discover_artifacts()
+        if not self.lazy:
+            self._load_all_models()
 
-    def _load_all_models(self):
+    def _discover_artifacts(self):
         if not os.path.isdir(self.model_dir):
             print(f"[ModelRunner] directorio de modelos no encontrado: {self.model_dir}")
             return
         for f in os.listdir(self.model_dir):
             if f.endswith(".joblib"):
                 name = f.replace(".joblib", "")
-                path = os.path.join(self.model_dir, f)
+                self._artifacts[name] = os.path.join(self.model_dir, f)
+
+    def _load_all_models(self):
+        t0 = time.perf_counter()
+        names = list(self._artifacts)
+        workers = min(self.load_workers, len(names))
+        if workers > 1:
+            # con cargas concurrentes el delta de RSS no significa nada: se mide la estructura del modelo
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="model-load") as pool:
+                results = list(pool.map(self._load_model, names))
+        else:
+            results = [self._load_model(n, measure_rss=True) for n in names]
+        for name, ok in zip(names, results):
+            if not ok:
+                # en modo eager un artefacto roto no se anuncia como disponible
+                self._artifacts.pop(name, None)
+        self.startup_seconds = time.perf_counter() - t0
+        self._print_load_report(workers)
+
+    def _load_model(self, name: str, measure_rss: bool = False) -> bool:
+        """Carga un artefacto, registra su huella y tiempos y aplica el presupuesto de memoria.
+
+        measure_rss solo en la carga eager secuencial: las cargas lazy (un lock por modelo)
+        y las recargas del watcher pueden solaparse con otras, y el delta de RSS del
+        proceso incluiría lo que cargan los demás hilos; ahí se usa estimate_nbytes.
+        """
+        path = self._artifacts[name]
+        try:
+            st = os.stat(path)
+            modules_before = len(sys.modules)
+            rss_before = current_rss_bytes() if measure_rss else 0
+            t0 = time.perf_counter()
+            pkg = joblib.load(path, mmap_mode=self.mmap_mode)
+            load_seconds = time.perf_counter() - t0
+            footprint = current_rss_bytes() - rss_before if measure_rss else 0
+        except Exception as e:
+            print(f"[ModelRunner] ERROR cargando {os.path.basename(path)}: {e}")
+            traceback.print_exc()
+            return False
+        if not measure_rss or footprint <= 0 or len(sys.modules) != modules_before:
+            # el RSS no creció (páginas reutilizadas del allocator) o la carga también
+            # importó librerías (sklearn, pandas...) cuyo costo no es del modelo.
+            footprint = estimate_nbytes(pkg)
+        t0 = time.perf_counter()
+        derived = self._build_derived(name, pkg)
+        derive_seconds = time.perf_counter() - t0
+        footprint += sum(getattr(v, "nbytes", 0) for v in derived.values())
+        with self._lock:
+            # una sola asignación por dict: los lectores ven el paquete viejo o el nuevo
+            self.models[name] = pkg
+            self._derived[name] = derived
+            self._versions[name] = (st.st_mtime_ns, st.st_size)
+            self._footprints[name] = footprint
+            self.load_stats[name] = {
+                "load_seconds": load_seconds,
+                "derive_seconds": derive_seconds,
+                "file_bytes": os.path.getsize(path),
+                "memory_bytes": footprint,
+            }
+            self._lru[name] = None
+            self._lru.move_to_end(name)
+            self._enforce_memory_budget(keep=name)
+        # las claves llevan la versión, pero no tiene sentido conservar las de la anterior
+        self.prediction_cache.invalidate(name)
+        print(f"[ModelRunner] cargado modelo: {name} ({footprint / 1e6:.1f} MB, {load_seconds:.2f}s)")
+        return True
+
+    def _build_derived(self, name: str, pkg: Any) -> Dict[str, Any]:
+        """Estructuras precalculadas a partir del paquete recién cargado (antes del swap)."""
+        derived: Dict[str, Any] = {}
+        if self.lookup_tables_enabled and name in LOOKUP_DOMAINS:
+            try:
+                table = self._build_lookup_table(name, pkg)
+                if table is not None:
+                    derived["lookup"] = table
+                    print(f"[ModelRunner] tabla de consulta {name}: {table.cells} celdas ({table.nbytes / 1e3:.0f} KB)")
+            except Exception as e:
+                print(f"[ModelRunner] WARN sin tabla de consulta para {name}: {e}")
+        if self.lookup_tables_enabled and name in FORECAST_MODELS:
+            unit, max_horizon, build = FORECAST_MODELS[name]
+            model_obj = pkg.get('model') if isinstance(pkg, dict) else pkg
+            try:
+                if max_horizon > 0 and model_obj is not None:
+                    derived["curve"] = ForecastCurve.build(model_obj, unit, max_horizon, build)
+                    print(f"[ModelRunner] curva de pronóstico {name}: 1..{max_horizon} {unit}")
+            except Exception as e:
+                print(f"[ModelRunner] WARN sin curva de pronóstico para {name}: {e}")
+        if isinstance(pkg, dict) and ('catalog' in pkg or 'movies' in pkg):
+            try:
+                catalog = MovieCatalog.from_package(pkg)
+                if catalog is not None:
+                    derived["movie_index"] = MovieIndex(catalog)
+            except Exception as e:
+                print(f"[ModelRunner] WARN sin índice de películas para {name}: {e}")
+        spec = FEATURE_SPECS.get(name)
+        if spec is not None:
+            # encoders y curva del paquete recién cargado, resueltos una sola vez
+            derived["features"] = spec.compile(pkg, derived)
+        return derived
+
+    def _build_lookup_table(self, name: str, pkg: Any) -> Optional[LookupTable]:
+        model_obj = pkg.get('model') if isinstance(pkg, dict) else pkg
+        axes = []
+        for axis in LOOKUP_DOMAINS[name]:
+            if axis == 'encoder':
+                classes = getattr(pkg.get('encoder') if isinstance(pkg, dict) else None, 'classes_', None)
+                if classes is None:
+                    return None
+                axis = (0, len(classes) - 1)
+            axes.append(axis)
+        n_features = getattr(model_obj, 'n_features_in_', len(axes))
+        cells = int(np.prod([hi - lo + 1 for lo, hi in axes]))
+        if n_features != len(axes) or cells > LOOKUP_MAX_CELLS:
+            return None
+        return LookupTable.build(model_obj, axes)
+
+    def get_load_report(self) -> Dict[str, Any]:
+        """Tiempo de carga, tamaño del artefacto y en memoria por modelo, el más lento primero."""
+        with self._lock:
+            rows = []
+            for name in self._artifacts:
+                stats = self.load_stats.get(name, {})
+                rows.append({
+                    "model": name,
+                    "loaded": name in self.models,
+                    "load_seconds": stats.get("load_seconds"),
+                    "file_bytes": stats.get("file_bytes", os.path.getsize(self._artifacts[name])),
+                    "memory_bytes": self._footprints.get(name),
+                    "derived": {k: v.describe() for k, v in self._derived.get(name, {}).items()
+                                if hasattr(v, "describe")},
+                })
+        rows.sort(key=lambda r: r["load_seconds"] or 0.0, reverse=True)
+        return {
+            "mode": "lazy" if self.lazy else "eager",
+            "mmap_mode": self.mmap_mode,
+            "load_workers": self.load_workers,
+            "startup_seconds": self.startup_seconds,
+            "loaded_memory_bytes": sum(self._footprints.values()),
+            "memory_budget_bytes": self.memory_budget_bytes or None,
+            "models": rows,
+        }
+
+    def _print_load_report(self, workers: int):
+        report = self.get_load_report()
+        print(f"[ModelRunner] {len(self.models)} modelos cargados en {self.startup_seconds:.2f}s ({workers} hilos)")
+        for r in report["models"]:
+            if r["load_seconds"] is None:
+                continue
+            print(f"[ModelRunner]   {r['model']:<24} {r['load_seconds']:>7.2f}s "
+                  f"archivo {r['file_bytes'] / 1e6:>8.1f} MB  memoria {r['memory_bytes'] / 1e6:>8.1f} MB")
+
+    def warm_up(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Ejecuta una predicción sintética por cada modelo cargado para pagar los
+        costos de la primera llamada (validación de sklearn, buffers numpy,
+        encoders) antes de recibir tráfico real. En modo lazy solo calienta los
+        modelos ya cargados. Devuelve {modelo: {ok, seconds[, error]}}.
+        """
+        results: Dict[str, Dict[str, Any]] = {}
+        for name in list(self.models):
+            t0 = time.perf_counter()
+            try:
+                params = WARMUP_PARAMS.get(name)
+                if params is not None:
+                    self.predict(name, params=dict(params))
+                else:
+                    n_features = getattr(self._get_model_object(name), 'n_features_in_', None)
+                    if n_features is None:
+                        raise ValueError("sin parámetros de warm-up ni n_features_in_")
+                    self.predict(name, features=[0.0] * int(n_features))
+                if name == TICKER_MODEL and self.ticker_index() is not None:
+                    # abre el índice OHLCV y calcula la última ventana de cada ticker
+                    self.forecast_tickers(None, 30)
+                results[name] = {"ok": True, "seconds": time.perf_counter() - t0}
+            except Exception as e:
+                results[name] = {"ok": False, "seconds": time.perf_counter() - t0, "error": str(e)}
+        return results
+
+    # -------------- recarga en caliente --------------------
+    def artifact_version(self, model_name: str) -> Optional[tuple]:
+        """(mtime_ns, size) del artefacto cargado para model_name, o None si no está cargado."""
+        return self._versions.get(self._resolve_name(model_name))
+
+    def reload_model(self, model_name: str) -> bool:
+        """
+        Vuelve a leer el artefacto de model_name y lo intercambia atómicamente en
+        self.models. Las peticiones en curso terminan con el paquete anterior; si la
+        carga falla (p. ej. el trainer aún está escribiendo) se sigue sirviendo el viejo.
+        """
+        name = self._resolve_name(model_name)
+        if name not in self._artifacts:
+            raise ValueError(f"Modelo '{model_name}' no encontrado en {self.model_dir}")
+        with self._load_lock(name):
+            return self._load_model(name)
+
+    def reload_changed(self, settle_seconds: float = 1.0) -> Dict[str, Any]:
+        """
+        Compara los .joblib del directorio con las versiones cargadas y recarga los
+        que cambiaron (mtime/tamaño), registra los nuevos y retira los borrados.
+        Solo se recargan archivos sin modificar en los últimos settle_seconds, para
+        no leer un artefacto a medio escribir.
+        """
+        summary: Dict[str, Any] = {"reloaded": [], "added": [], "removed": [], "errors": []}
+        if not os.path.isdir(self.model_dir):
+            return summary
+        on_disk = {f.replace(".joblib", ""): os.path.join(self.model_dir, f)
+                   for f in os.listdir(self.model_dir) if f.endswith(".joblib")}
+        now = time.time()
+        for name in [n for n in self._artifacts if n not in on_disk]:
+            with self._lock:
+                self._artifacts.pop(name, None)
+                self.models.pop(name, None)
+                self._derived.pop(name, None)
+                self._versions.pop(name, None)
+                self._footprints.pop(name, None)
+                self._lru.pop(name, None)
+            self.prediction_cache.invalidate(name)
+            summary["removed"].append(name)
+        for name, path in on_disk.items():
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if now - st.st_mtime < settle_seconds:
+                continue
+            is_new = name not in self._artifacts
+            if is_new:
+                with self._lock:
+                    self._artifacts[name] = path
+                summary["added"].append(name)
+                if self.lazy:
+                    continue
+            elif name not in self.models or self._versions.get(name) == (st.st_mtime_ns, st.st_size):
+                # sin cambios, o aún no cargado (lazy): la próxima carga lee el archivo nuevo
+                continue
+            with self._load_lock(name):
+                ok = self._load_model(name)
+            if ok:
+                if not is_new:
+                    summary["reloaded"].append(name)
+            else:
+                summary["errors"].append(name)
+        return summary
+
+    def start_watcher(self, interval: Optional[float] = None) -> bool:
+        """
+        Inicia un hilo que revisa backend/models/ cada `interval` segundos
+        (env MODEL_WATCH_INTERVAL; 0 = desactivado) y recarga artefactos modificados.
+        """
+        if interval is None:
+            interval = float(os.getenv("MODEL_WATCH_INTERVAL", "0") or 0)
+        if interval <= 0 or (self._watcher is not None and self._watcher.is_alive()):
+            return False
+        self._watcher_stop.clear()
+
+        def _watch():
+            while not self._watcher_stop.wait(interval):
                 try:
-                    self.models[name] = joblib.load(path)
-                    print(f"[ModelRunner] cargado modelo: {name}")
+                    summary = self.reload_changed()
+                    if any(summary.values()):
+                        print(f"[ModelRunner] recarga: {summary}")
                 except Exception as e:
-                    print(f"[ModelRunner] ERROR cargando {f}: {e}")
-                    traceback.print_exc()
+                    print(f"[ModelRunner] ERROR revisando {self.model_dir}: {e}")
+
+        self._watcher = threading.Thread(target=_watch, name="model-watcher", daemon=True)
+        self._watcher.start()
+        print(f"[ModelRunner] vigilando {self.model_dir} cada {interval:g}s")
+        return True
+
+    def stop_watcher(self):
+        self._watcher_stop.set()
+
+    def _enforce_memory_budget(self, keep: Optional[str] = None):
+        if not self.lazy or self.memory_budget_bytes <= 0:
+            return
+        evicted = False
+        while sum(self._footprints.values()) > self.memory_budget_bytes:
+            victim = next((n for n in self._lru if n != keep), None)
+            if victim is None:
+                break
+            self._lru.pop(victim, None)
+            self.models.pop(victim, None)
+            self._derived.pop(victim, None)
+            self._versions.pop(victim, None)
+            self.prediction_cache.invalidate(victim)
+            freed = self._footprints.pop(victim, 0)
+            evicted = True
+            print(f"[ModelRunner] descargado modelo (LRU): {victim} ({freed / 1e6:.1f} MB)")
+        if evicted:
+            gc.collect()
+
+    def _resolve_name(self, model_name: str) -> str:
+        if model_name not in self._artifacts and model_name in ALIASES:
+            return ALIASES[model_name]
+        return model_name
+
+    def get_package(self, model_name: str) -> Any:
+        """
+        Devuelve el paquete cargado (dict o estimador) para model_name, cargándolo
+        si hace falta en modo lazy. Devuelve None si el artefacto no existe.
+        """
+        name = self._resolve_name(model_name)
+        if name not in self._artifacts:
+            return None
+        pkg = self.models.get(name)
+        if pkg is None and self.lazy:
+            # joblib.load fuera de self._lock: las cargas de otros modelos y las
+            # predicciones con modelos ya cargados no esperan a esta
+            with self._load_lock(name):
+                pkg = self.models.get(name)
+                if pkg is None and self._load_model(name):
+                    pkg = self.models.get(name)
+        elif pkg is not None and self.lazy:
+            with self._lock:
+                if name in self._lru:
+                    self._lru.move_to_end(name)
+        return pkg
+
+    def _load_lock(self, name: str) -> threading.Lock:
+        with self._lock:
+            lock = self._load_locks.get(name)
+            if lock is None:
+                lock = self._load_locks[name] = threading.Lock()
+            return lock
+
+    def _snapshot(self, model_name: str) -> tuple:
+        """(paquete, derivados, versión) de model_name, tomados juntos bajo self._lock.
+
+        Una recarga intercambia los tres a la vez; leídos por separado, una petición
+        podría puntuar con la tabla de consulta de una versión y el estimador de la
+        otra, y guardar el resultado en caché con la clave equivocada.
+        """
+        name = self._resolve_name(model_name)
+        pkg = self.get_package(name)  # modo lazy: carga el modelo
+        with self._lock:
+            current = self.models.get(name)
+            if current is not None:
+                return current, self._derived.get(name, {}), self._versions.get(name)
+        # descargado (LRU) justo después de cargarlo: sin estructuras derivadas ni caché
+        return pkg, {}, None
+
+    def latest_features(self, model_name: str) -> Optional[Dict[str, Any]]:
+        """Último estado de la serie de `model_name` (lags, medias móviles, fecha) o None.
+
+        Sale del paquete ('latest_features', lo guarda el trainer). Con artefactos
+        anteriores se calcula una vez del CSV y se reutiliza mientras el archivo no
+        cambie: por petición solo queda un stat().
+        """
+        name = self._resolve_name(model_name)
+        pkg = self.get_package(name)
+        state = pkg.get('latest_features') if isinstance(pkg, dict) else None
+        if state:
+            return state
+        if name not in LATEST_STATE_SOURCES:
+            return None
+        path, build = LATEST_STATE_SOURCES[name]
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        version = (st.st_mtime_ns, st.st_size)
+        cached = self._latest_states.get(name)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        with self._latest_lock:
+            cached = self._latest_states.get(name)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+            try:
+                state = build(load_dataset(path))
+            except Exception as e:
+                print(f"[ModelRunner] WARN no se pudo leer el último estado de {name} desde {os.path.basename(path)}: {e}")
+                state = None
+            self._latest_states[name] = (version, state)
+            print(f"[ModelRunner] último estado de {name} calculado desde {os.path.basename(path)}")
+        return state
 
     def get_available_models(self) -> List[str]:
         # include aliases as available names for convenience
-        names = list(self.models.keys())
+        names = list(self._artifacts.keys())
         # expose alias keys if their targets exist
         for alias, target in ALIASES.items():
-            if target in self.models and alias not in names:
+            if target in self._artifacts and alias not in names:
                 names.append(alias)
         return names
 
     def is_ready(self) -> bool:
-        return len(self.models) > 0
+        return len(self._artifacts) > 0
 
-    def _get_model_object(self, model_name: str) -> Any:
+    def _get_model_object(self, model_name: str, loaded: Any = None) -> Any:
         """
         Extrae el objeto modelo real desde el diccionario o devuelve directamente.
         Algunos modelos se guardan como dict con clave 'model', otros directamente.
         """
-        loaded = self.models.get(model_name)
+        if loaded is None:
+            loaded = self.get_package(model_name)
         if loaded is None:
             return None
         # Si es diccionario con 'model', extraer
@@ -68,317 +562,43 @@ class ModelRunner:
         return loaded
 
     # --------- helpers de conversión por modelo ----------
-    def _to_features_for_model(self, model_name: str, params: Dict[str, Any]) -> Optional[List[float]]:
+    def _to_features_for_model(self, model_name: str, params: Dict[str, Any], package: Any = None,
+                               derived: Optional[Dict[str, Any]] = None) -> Optional[List[float]]:
         """
-        Convertir un dict de params en un vector de features para modelos
-        con mapeos predefinidos.
-        Si el modelo requiere un mapping no implementado, devuelve None.
+        Convertir un dict de params en un vector de features con el spec
+        registrado para el modelo (services/feature_specs.py). `package` es el
+        paquete ya cargado de model_name (para usar sus encoders sin volver a buscarlo)
+        y `derived` sus estructuras derivadas, del mismo snapshot.
+        Si el modelo no tiene spec (p. ej. movie_recommender), devuelve None.
         """
-        m = model_name.lower()
+        build = self._feature_builder(model_name, package, derived)
+        if build is None:
+            return None
         try:
-            if m in ("car_price", "car_model"):
-                # Car model necesita 7 features: Year, Present_Price, Kms_Driven, Fuel_Type_encoded, Seller_Type_encoded, Transmission_encoded, Owner
-                year = float(params.get("year", 2015))
-                km = float(params.get("km", 50000))
-                # Estimamos el precio presente basado en el año (autos más nuevos valen más)
-                present_price = max(1.0, 10.0 - (2025 - year) * 0.5)  # Depreciación aproximada
-                fuel_type = 0  # 0=Petrol, 1=Diesel, 2=CNG
-                seller_type = 0  # 0=Dealer, 1=Individual
-                transmission = 0  # 0=Manual, 1=Automatic
-                owner = min(3, int((2025 - year) / 5))  # Estimamos dueños previos basado en edad del carro
-                return [year, present_price, km, fuel_type, seller_type, transmission, owner]
-            if m == "bmi_model":
-                # espera {'height': 1.78, 'weight': 78, 'age': 30}
-                return [float(params.get("height")), float(params.get("weight")), float(params.get("age", 30))]
-            if m in ("bitcoin_model",):
-                # Bitcoin - Predicción a CORTO PLAZO (días, no años)
-                # Features: price_lag_1, price_lag_2, price_lag_3, price_lag_7, rolling_mean_7, rolling_mean_30
-                # Accept either 'days' or 'years' in params. Convert years -> days.
-                years_val = params.get('years') if params and 'years' in params else None
-                days_val = params.get('days') if params and 'days' in params else None
-                if years_val is not None:
-                    try:
-                        horizon_days = int(float(years_val) * 365)
-                    except Exception:
-                        horizon_days = int(float(years_val))
-                else:
-                    try:
-                        horizon_days = int(float(days_val)) if days_val is not None else 1
-                    except Exception:
-                        horizon_days = 1
-
-                # Precio base más realista
-                random.seed(int(max(1, horizon_days) * 137))  # Seed único por día
-                base_price = 45000.0 + (horizon_days * random.uniform(50, 150))  # Variación diaria ~$50-150
-                volatility = random.uniform(0.97, 1.03)  # ±3% volatilidad diaria
-                # Return 7 features matching training: 6 price-derived features + horizon_days
-                return [
-                    base_price * volatility,
-                    base_price * 0.998 * volatility,
-                    base_price * 0.997 * volatility,
-                    base_price * 0.995 * volatility,
-                    base_price * 0.999 * volatility,
-                    base_price * 1.001 * volatility,
-                    float(horizon_days)
-                ]
-            if m in ("sp500_model",):
-                # SP500 - Predicción a CORTO PLAZO (días)
-                # Features: open, high, low, volume, price_change, high_low_diff, close_lag_1, close_lag_5, close_lag_10, rolling_mean_5, rolling_mean_20
-                # Accept 'days' or 'years' and convert to days
-                years_val = params.get('years') if params and 'years' in params else None
-                days_val = params.get('days') if params and 'days' in params else None
-                if years_val is not None:
-                    try:
-                        horizon_days = int(float(years_val) * 365)
-                    except Exception:
-                        horizon_days = int(float(years_val))
-                else:
-                    try:
-                        horizon_days = int(float(days_val)) if days_val is not None else 1
-                    except Exception:
-                        horizon_days = 1
-
-                random.seed(int(max(1, horizon_days) * 271))  # Seed único por día
-                base = 4500.0 + (horizon_days * random.uniform(5, 20))  # Variación diaria ~$5-20
-                vol_factor = random.uniform(0.98, 1.02)  # ±2% volatilidad
-                # Return 12 features: the 11 price/volume features plus horizon_days
-                return [
-                    base * vol_factor,
-                    base * 1.005 * vol_factor,
-                    base * 0.995 * vol_factor,
-                    5000000 + int(horizon_days * 50000),
-                    random.uniform(-20, 20),
-                    random.uniform(10, 30),
-                    base * 0.999 * vol_factor,
-                    base * 0.997 * vol_factor,
-                    base * 0.995 * vol_factor,
-                    base * vol_factor,
-                    base * 1.002 * vol_factor,
-                    float(horizon_days)
-                ]
-            if m in ("avocado_model", "avocado_price"):
-                # Avocado - Predicción a CORTO PLAZO (months)
-                # Features: Total Volume, 4046, 4225, 4770, Total Bags, Small Bags, Large Bags, XLarge Bags,
-                # type_encoded, region_encoded, year, horizon_months
-                # Accept 'months' or 'days' or 'years' in params; convert to months
-                months_val = None
-                if params:
-                    if 'months' in params:
-                        months_val = params.get('months')
-                    elif 'days' in params:
-                        try:
-                            months_val = float(params.get('days')) / 30.0
-                        except Exception:
-                            months_val = None
-                    elif 'years' in params:
-                        try:
-                            months_val = float(params.get('years')) * 12.0
-                        except Exception:
-                            months_val = None
-                try:
-                    horizon_months = int(float(months_val)) if months_val is not None else 1
-                except Exception:
-                    horizon_months = 1
-
-                random.seed(int(max(1, horizon_months) * 181))  # Seed único por mes
-                year_value = 2025  # Año actual
-                # Small variations by months
-                vol_factor = 1.0 + (horizon_months * 0.01 * random.uniform(0.95, 1.05))
-                # Build realistic-looking features matching trainer feature_cols:
-                # ['avg_price','total_volume','v_4046','v_4225','v_4770','total_bags','small_bags','large_bags','xlarge_bags','lag_1','lag_3','rolling_3','horizon_months']
-                avg_price = 1.5 * vol_factor
-                total_volume = 100000 * vol_factor
-                v_4046 = 50000 * vol_factor
-                v_4225 = 30000 * vol_factor
-                v_4770 = 10000 * vol_factor
-                total_bags = 5000 * vol_factor
-                small_bags = 4000 * vol_factor
-                large_bags = 800 * vol_factor
-                xlarge_bags = 200 * vol_factor
-                # lag features derived from avg_price
-                lag_1 = avg_price * 0.99
-                lag_3 = avg_price * 0.97
-                rolling_3 = (avg_price * 0.99 + avg_price * 0.98 + avg_price * 1.0) / 3.0
-                return [
-                    avg_price,
-                    total_volume,
-                    v_4046,
-                    v_4225,
-                    v_4770,
-                    total_bags,
-                    small_bags,
-                    large_bags,
-                    xlarge_bags,
-                    lag_1,
-                    lag_3,
-                    rolling_3,
-                    float(horizon_months)
-                ]
-            if m in ("london_crime", "london_crime_model"):
-                # London model expects ['month','day_of_week','borough_le']
-                dow = params.get("day_of_week", params.get("day"))
-                day_idx = 4
-                if isinstance(dow, str):
-                    mapping = {
-                        "monday":0,"mon":0,"lunes":0,
-                        "tuesday":1,"tue":1,"martes":1,
-                        "wednesday":2,"wed":2,"miercoles":2,"miércoles":2,
-                        "thursday":3,"thu":3,"jueves":3,
-                        "friday":4,"fri":4,"viernes":4,
-                        "saturday":5,"sat":5,"sabado":5,"sábado":5,
-                        "sunday":6,"sun":6,"domingo":6
-                    }
-                    key = dow.strip().lower()
-                    day_idx = mapping.get(key, 4)
-                elif isinstance(dow, int):
-                    if dow > 6:
-                        day_idx = (int(dow) - 1) % 7
-                    else:
-                        day_idx = int(dow)
-
-                month = int(params.get('month', 10))
-                # borough parameter - accept 'borough' or 'borough_le'
-                borough = params.get('borough', params.get('borough_le', params.get('borough_name', None)))
-                borough_le = 0
-                try:
-                    pkg = self.models.get('london_crime_model')
-                    if isinstance(pkg, dict) and 'encoder' in pkg:
-                        enc = pkg['encoder']
-                        # encoder expected to be a LabelEncoder-like object
-                        if borough is None:
-                            borough_le = int(enc.transform([enc.classes_[0]])[0]) if hasattr(enc, 'classes_') else 0
-                        else:
-                            borough_le = int(enc.transform([str(borough)])[0])
-                    else:
-                        borough_le = int(params.get('borough_le', 0) or 0)
-                except Exception:
-                    borough_le = int(params.get('borough_le', 0) or 0)
-
-                return [float(month), float(day_idx), float(borough_le)]
-
-            if m in ("chicago_crime", "chicago_crime_model"):
-                # For Chicago trainer we expect features: dow0 (0=Monday), month, community_area
-                dow = params.get("day_of_week", params.get("day"))
-                day_idx = 4  # Default viernes
-                if isinstance(dow, str):
-                    mapping = {
-                        "monday":0,"mon":0,"lunes":0,
-                        "tuesday":1,"tue":1,"martes":1,
-                        "wednesday":2,"wed":2,"miercoles":2,"miércoles":2,
-                        "thursday":3,"thu":3,"jueves":3,
-                        "friday":4,"fri":4,"viernes":4,
-                        "saturday":5,"sat":5,"sabado":5,"sábado":5,
-                        "sunday":6,"sun":6,"domingo":6
-                    }
-                    key = dow.strip().lower()
-                    day_idx = mapping.get(key, 4)
-                elif isinstance(dow, int):
-                    # allow BigQuery style dayofweek (1=Sunday) or 0..6
-                    if dow > 6:
-                        # assume BigQuery 1..7 -> convert to 0..6
-                        day_idx = (int(dow) - 1) % 7
-                    else:
-                        day_idx = int(dow)
-
-                month = int(params.get('month', 10))
-                community_area = int(params.get('community_area', params.get('district', -1) or -1))
-                # Check if a pre-trained chicago model exists and what feature count it expects
-                try:
-                    loaded = self.models.get('chicago_crime') or self.models.get('chicago_crime_model')
-                    model_obj = None
-                    if isinstance(loaded, dict) and 'model' in loaded:
-                        model_obj = loaded['model']
-                    else:
-                        model_obj = loaded
-                    if model_obj is not None and hasattr(model_obj, 'n_features_in_'):
-                        expected = int(getattr(model_obj, 'n_features_in_', 0))
-                        if expected == 1:
-                            return [float(day_idx)]
-                except Exception:
-                    # ignore and return full feature set
-                    pass
-                return [float(day_idx), float(month), float(community_area)]
-            if m in ("airline_delay", "airline_delay_model"):
-                # Airline necesita: Month, DayofMonth, DayOfWeek, DepTime, CRSDepTime, CRSArrTime, Distance, + encoders
-                # Aproximadamente 7-10 features según el modelo entrenado
-                month = float(params.get("month", 6))  # Mes (1-12)
-                day = float(params.get("day", 15))  # Día del mes (1-31)
-                distance = float(params.get("distance", 500))  # Distancia en millas
-                day_of_week = float(params.get("day_of_week", 3))  # Día de la semana (1-7)
-                dep_time = float(params.get("dep_time", 1400))  # Hora de salida (formato 24h como 1400 = 2pm)
-                crs_dep_time = float(params.get("crs_dep_time", 1400))  # Hora programada salida
-                crs_arr_time = float(params.get("crs_arr_time", 1700))  # Hora programada llegada
-                carrier = 0  # Código de aerolínea (0-N)
-                origin = 0  # Código origen (0-N)
-                dest = 0  # Código destino (0-N)
-                return [month, day, day_of_week, dep_time, crs_dep_time, crs_arr_time, distance, carrier, origin, dest]
-            if m in ("cirrhosis_classifier", "cirrhosis_model"):
-                # Cirrosis feature order must match trainer:
-                # cols_num (N_Days, Age, Bilirubin, Cholesterol, Albumin, Copper, Alk_Phos, SGOT, Tryglicerides, Platelets, Prothrombin)
-                # + bools (Ascites_bin, Hepatomegaly_bin, Spiders_bin, Edema_bin)
-                # + Sex_le, Drug_le  => total 17 features
-                n_days = float(params.get("n_days", params.get('N_Days', 1000)))  # Días desde diagnóstico
-                age = float(params.get("age", params.get('Age', 18250)))  # Age en días fallback
-                bilirubin = float(params.get("bilirubin", params.get('Bilirubin', 1.5)))
-                cholesterol = float(params.get("cholesterol", params.get('Cholesterol', 280)))
-                albumin = float(params.get("albumin", params.get('Albumin', 3.5)))
-                copper = float(params.get("copper", params.get('Copper', 70)))
-                alk_phos = float(params.get("alk_phos", params.get('Alk_Phos', 1200)))
-                sgot = float(params.get("sgot", params.get('SGOT', 100)))
-                tryglicerides = float(params.get("tryglicerides", params.get('Tryglicerides', 100)))
-                platelets = float(params.get("platelets", params.get('Platelets', 250)))
-                prothrombin = float(params.get("prothrombin", params.get('Prothrombin', 11)))
-
-                # Boolean flags: accept 'Y'/'N', True/False, 1/0, or numeric
-                def _to_bin(v):
-                    if v is None:
-                        return 0
-                    if isinstance(v, (int, float)):
-                        return 1 if float(v) != 0 else 0
-                    s = str(v).strip().upper()
-                    if s in ('Y','YES','1','TRUE'):
-                        return 1
-                    return 0
-
-                ascites = _to_bin(params.get('Ascites', params.get('ascites', 0)))
-                hepatomegaly = _to_bin(params.get('Hepatomegaly', params.get('hepatomegaly', 0)))
-                spiders = _to_bin(params.get('Spiders', params.get('spiders', 0)))
-                # Edema in dataset had values like '0','S','Y' - map similarly
-                edema = _to_bin(params.get('Edema', params.get('edema', 0)))
-
-                # Sex and Drug - use saved encoders if available to ensure consistent mapping
-                drug_val = params.get('Drug', params.get('drug', 'Unknown'))
-                sex_val = params.get('Sex', params.get('sex', 'U'))
-                drug_le = 0
-                sex_le = 0
-                # try to use encoders stored with model package
-                try:
-                    pkg = self.models.get(model_name)
-                    encs = pkg.get('encoders', {}) if isinstance(pkg, dict) else {}
-                    if 'sex' in encs:
-                        sex_le = int(encs['sex'].transform([str(sex_val)])[0])
-                    else:
-                        sex_le = 1 if str(sex_val).strip().upper() in ('M','MALE') else 0
-                    if 'drug' in encs:
-                        drug_le = int(encs['drug'].transform([str(drug_val)])[0])
-                    else:
-                        drug_le = 0
-                except Exception:
-                    # graceful fallback
-                    sex_le = 1 if str(sex_val).strip().upper() in ('M','MALE') else 0
-                    drug_le = 0
-
-                return [n_days, age, bilirubin, cholesterol, albumin, copper, alk_phos, sgot,
-                        tryglicerides, platelets, prothrombin,
-                        ascites, hepatomegaly, spiders, edema,
-                        sex_le, drug_le]
-            if m == "movie_recommender":
-                # recommender idealmente expone método recommend(user_id, k)
-                # aquí no convertimos a features, se manejará aparte.
-                return None
+            return build([params])[0].tolist()
         except Exception as e:
             raise ValueError(f"Error al convertir params para {model_name}: {e}")
-        return None
+
+    def _feature_builder(self, model_name: str, package: Any = None,
+                         derived: Optional[Dict[str, Any]] = None) -> Optional[Callable]:
+        """Spec compilado de model_name: el del snapshot (package, derived), el de la
+        carga actual, o compilado al vuelo para `package`."""
+        m = model_name.lower()
+        spec = FEATURE_SPECS.get(m)
+        if spec is None:
+            return None
+        name = self._resolve_name(m)
+        if derived is None:
+            if package is None:
+                package, derived, _ = self._snapshot(name)
+            else:
+                # los derivados de la carga actual solo sirven si son de este mismo paquete
+                with self._lock:
+                    derived = self._derived.get(name, {}) if package is self.models.get(name) else {}
+        build = derived.get("features")
+        if build is None:
+            build = spec.compile(package, derived)
+        return build
 
     # -------------- predict genérico --------------------
     def predict(self, model_name: str, features: Optional[List[float]] = None, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
@@ -390,114 +610,32 @@ class ModelRunner:
         Devuelve dict con keys: model, input, prediction.
         """
         # resolve aliases
-        if model_name not in self.models:
+        if model_name not in self._artifacts:
             if model_name in ALIASES:
                 resolved = ALIASES[model_name]
                 model_name = resolved
             else:
                 raise ValueError(f"Modelo '{model_name}' no cargado. Modelos disponibles: {self.get_available_models()}")
 
+        # Un único snapshot (paquete, derivados, versión) para toda la petición: si el
+        # artefacto se recarga mientras tanto, esta predicción termina con la versión
+        # anterior y su resultado queda en caché con la clave de esa versión.
+        loaded, derived, version = self._snapshot(model_name)
         # Extraer el objeto modelo real (puede estar en dict['model'] o directamente)
-        model_obj = self._get_model_object(model_name)
+        model_obj = self._get_model_object(model_name, loaded)
         if model_obj is None:
             raise ValueError(f"No se pudo extraer el modelo de '{model_name}'")
         
         # Caso especial: movie recommender
-        if model_name == "movie_recommender":
-            # The saved recommender is a dict with a DataFrame 'movies'
-            loaded = self.models[model_name]
-            if isinstance(loaded, dict):
-                top_k = int(params.get("top_k", 1)) if params else 1  # Default 1 movie
-                year = params.get('year') if params else None
-                genre = params.get('genre') if params else None
-
-                movies_df = loaded.get('movies')
-                if movies_df is None:
-                    return {"model": model_name, "input": params or {}, "prediction": []}
-
-                # If movies_df is a DataFrame, filter by year/genre and return top_k by popularity
-                try:
-                    df = movies_df
-                    # filter by year if provided
-                    if year is not None:
-                        try:
-                            y = int(year)
-                            df = df[df['year'] == y]
-                        except Exception:
-                            pass
-                    # filter by genre if provided (case-insensitive substring in genres_str or in genres_list)
-                    if genre:
-                        g = str(genre).strip().lower()
-                        df = df[df['genres_str'].str.lower().str.contains(g, na=False) | df['genres_list'].apply(lambda gl: any(g == gg.lower() for gg in gl))]
-
-                    # If after filtering we have no matches, fallback to the full list
-                    if df.shape[0] == 0:
-                        df = movies_df
-
-                    # Sort by popularity and take top_k
-                    df_sorted = df.sort_values('popularity', ascending=False).head(top_k)
-                    titles = df_sorted['title'].tolist()
-                    return {"model": model_name, "input": params or {}, "prediction": titles}
-                except Exception as e:
-                    # fallback: if movies is a list
-                    import random, time
-                    random.seed(int(time.time() * 1000))
-                    movies_list = loaded.get('movies', [])
-                    if isinstance(movies_list, list) and len(movies_list) > 0:
-                        recs = random.sample(movies_list, min(top_k, len(movies_list)))
-                        return {"model": model_name, "input": params or {}, "prediction": recs}
-                    return {"model": model_name, "input": params or {}, "prediction": []}
-        
+        if model_name == "movie_recommender" and isinstance(loaded, dict):
+            return self._recommend_movies(model_name, loaded, params)
+
         # si pasaron features explícitos
         if features is not None:
-            X = np.array(features).reshape(1, -1)
-            try:
-                pred = model_obj.predict(X)
-                out = pred.tolist() if hasattr(pred, "tolist") else pred
-
-                # Build a response dict so we can attach model-specific conversions (eg. car price -> rupees/usd)
-                resp = {"model": model_name, "input": features, "prediction": out}
-
-                # si clasificación y existe predict_proba
-                if hasattr(model_obj, "predict_proba"):
-                    proba = model_obj.predict_proba(X)
-                    resp["proba"] = proba.tolist()
-
-                # For car price models, provide helpful conversions: dataset units -> rupees -> usd
-                try:
-                    if model_name in ("car_price", "car_model"):
-                        # prediction may be list-like
-                        price_val = None
-                        if isinstance(out, (list, tuple)) and len(out) > 0:
-                            price_val = float(out[0])
-                        else:
-                            price_val = float(out)
-
-                        unit_multiplier = float(os.getenv('CAR_PRICE_UNIT_MULTIPLIER', '100000'))
-                        rupees = price_val * unit_multiplier
-
-                        usd_rate = os.getenv('CAR_PRICE_TO_USD_RATE', '0.012')
-                        usd = None
-                        try:
-                            usd = rupees * float(usd_rate)
-                        except Exception:
-                            usd = None
-
-                        resp.update({
-                            "price_dataset_units": price_val,
-                            "price_rupees": rupees,
-                            "price_usd": usd,
-                        })
-                except Exception:
-                    # if conversion fails, ignore and return base response
-                    pass
-
-                return resp
-            except Exception as e:
-                raise RuntimeError(f"Error al predecir con {model_name}: {e}")
+            return self._predict_features(model_name, model_obj, features, version, derived)
         # si pasaron params -> intentar mapping
         if params is not None:
-            converted = self._to_features_for_model(model_name, params)
+            converted = self._to_features_for_model(model_name, params, loaded, derived)
             if converted is None:
                 # si no pudimos convertir, para algunos modelos intentamos llamar predict con dict/array
                 try:
@@ -508,11 +646,430 @@ class ModelRunner:
                 except Exception:
                     raise ValueError(f"No se pudo convertir params a features para {model_name}. Pasa 'features' como lista.")
             # si conversion exitosa, predecir
-            return self.predict(model_name, features=converted, params=None)
+            return self._predict_features(model_name, model_obj, converted, version, derived)
 
         # si no hay ni features ni params
         raise ValueError("Debe proveer 'features' (lista) o 'params' (dict) para predecir.")
 
+    def predict_batch(self, model_name: str, features: Optional[List[List[float]]] = None, params: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+        """
+        Predicción por lotes: N filas de 'features' o N dicts de 'params'.
+        Se construye una sola matriz 2-D y se llama predict/predict_proba una vez.
+        Devuelve una lista con un resultado por fila, con el mismo formato que predict().
+        """
+        model_name = self._require_model(model_name)
+        loaded, derived, version = self._snapshot(model_name)
+        model_obj = self._get_model_object(model_name, loaded)
+        if model_obj is None:
+            raise ValueError(f"No se pudo extraer el modelo de '{model_name}'")
+
+        if model_name == "movie_recommender" and isinstance(loaded, dict):
+            # no hay nada que vectorizar: cada consulta es un filtro sobre el catálogo
+            return [self._recommend_movies(model_name, loaded, p) for p in (params or [{}])]
+
+        if features is not None:
+            rows = [list(r) for r in features]
+            if not rows:
+                return []
+            X = self._as_matrix(model_name, rows)
+        elif params is not None:
+            if not params:
+                return []
+            X = self.batch_features(model_name, params, loaded, derived)
+            rows = X.tolist()
+        else:
+            raise ValueError("Debe proveer 'features' (lista de filas) o 'params' (lista de dicts) para predecir.")
+        return self._predict_matrix(model_name, model_obj, X, rows, version, derived)
+
+    def batch_features(self, model_name: str, params: List[Dict[str, Any]], package: Any = None,
+                       derived: Optional[Dict[str, Any]] = None) -> np.ndarray:
+        """Matriz 2-D de features para una lista de params (una fila por dict), en una pasada."""
+        model_name = self._resolve_name(model_name)
+        build = self._feature_builder(model_name, package, derived)
+        if build is None:
+            raise ValueError(f"No se pudo convertir params a features para {model_name}. Pasa 'features' como lista de filas.")
+        try:
+            return build(list(params))
+        except Exception:
+            # localizar la fila inválida para el mensaje de error
+            for i, p in enumerate(params):
+                try:
+                    build([p])
+                except Exception as e:
+                    raise ValueError(f"No se pudo convertir params[{i}] a features para {model_name}: {e}")
+            raise
+
+    def forecast(self, model_name: str, start: int = 1, end: Optional[int] = None, step: int = 1) -> Dict[str, Any]:
+        """Predicciones de los horizontes start..end (inclusive) de un modelo de series de tiempo.
+
+        Se leen de la curva precalculada; sin curva (o fuera de ella) se construye
+        la matriz de todos los horizontes y se puntúa con un solo predict. Si el
+        paquete trae 'last_date', cada horizonte lleva su fecha objetivo.
+        """
+        if model_name not in FORECAST_MODELS and f"{model_name}_model" in FORECAST_MODELS:
+            model_name = f"{model_name}_model"  # bitcoin / sp500 / avocado
+        model_name = self._require_model(model_name)
+        if model_name not in FORECAST_MODELS:
+            raise ValueError(f"'{model_name}' no es un modelo de pronóstico. Disponibles: {sorted(FORECAST_MODELS)}")
+        unit = FORECAST_MODELS[model_name][0]
+        start, step = int(start), int(step)
+        end = start if end is None else int(end)
+        if step < 1 or end < start:
+            raise ValueError("Rango inválido: se requiere start <= end y step >= 1")
+        if (end - start) // step + 1 > FORECAST_MAX_POINTS:
+            raise ValueError(f"Rango demasiado grande: máximo {FORECAST_MAX_POINTS} puntos por llamada")
+        package, derived, _ = self._snapshot(model_name)  # modo lazy: carga el modelo (y su curva)
+        curve = derived.get("curve")
+        if curve is not None and curve.covers(start) and curve.covers(end):
+            horizons, pred = curve.range(start, end, step)
+            values = pred.tolist()
+        else:
+            horizons = np.arange(start, end + 1, step)
+            results = self.predict_batch(model_name, params=[{unit: int(h)} for h in horizons])
+            values = [r["prediction"][0] for r in results]
+        last_date = package.get('last_date') if isinstance(package, dict) else None
+        return {
+            "model": model_name,
+            "unit": unit,
+            "last_date": self._iso_date(last_date),
+            "horizons": horizons.tolist(),
+            "dates": self._target_dates(last_date, horizons, unit),
+            "predictions": values,
+        }
+
+    def ticker_index(self) -> Optional[TickerIndex]:
+        """Índice OHLCV memory-mapped del store S&P 500; se reabre cuando la ingesta publica otro."""
+        path = os.path.join(TICKER_STORE_DIR, "ohlcv", "index.json")
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        version = (st.st_mtime_ns, st.st_size)
+        current = self._ticker_index
+        if current is None or current[0] != version:
+            with self._lock:
+                current = self._ticker_index
+                if current is None or current[0] != version:
+                    index = TickerIndex.open(TICKER_STORE_DIR)
+                    current = (version, index)
+                    self._ticker_index = current
+                    self._ticker_forecasts.clear()
+                    if index is not None:
+                        print(f"[ModelRunner] índice de tickers S&P 500: {len(index)} tickers, {len(index.dates)} filas")
+        return current[1]
+
+    def forecast_tickers(self, tickers: Any = None, horizon_days: int = 30) -> Dict[str, Any]:
+        """Cierre previsto a horizon_days de cada ticker de `tickers` (lista o "A,B"; None/"all" = todos).
+
+        La última ventana de features de cada ticker se calcula una vez por índice.
+        Por horizonte, todos los tickers se puntúan con un solo predict y el
+        resultado se conserva: pedir la lista completa es una selección de filas.
+        """
+        horizon = int(horizon_days)
+        index = self.ticker_index()
+        if index is None:
+            raise ValueError("No hay store de S&P 500: ejecuta scripts/ingest_sp500.py")
+        name = self._require_model(TICKER_MODEL)
+        package, _, version = self._snapshot(name)
+        model_obj = self._get_model_object(name, package)
+        if model_obj is None:
+            raise ValueError(f"No se pudo extraer el modelo de '{name}'")
+        trained = package.get('horizons') if isinstance(package, dict) else None
+        max_horizon = int(max(trained)) if trained else TICKER_MAX_HORIZON
+        if not 1 <= horizon <= max_horizon:
+            raise ValueError(f"horizon_days debe estar entre 1 y {max_horizon} (horizonte máximo entrenado)")
+        latest = index.latest()
+        if isinstance(tickers, str):
+            tickers = None if tickers.strip().lower() == 'all' else [t for t in tickers.split(',') if t.strip()]
+        if tickers is None:
+            rows, found, missing = np.arange(len(latest.tickers)), latest.tickers, []
+        else:
+            rows, found, missing = index.positions(tickers)
+        changes = self._ticker_changes(model_obj, version, index, horizon)[rows]
+        last_close = latest.last_close[rows]
+        predicted = last_close * (1.0 + changes)
+        last_day = latest.last_day[rows]
+        last_dates = last_day.astype('datetime64[D]').astype(str).tolist()
+        target_dates = (last_day + horizon).astype('datetime64[D]').astype(str).tolist()
+        return {
+            "model": name,
+            "horizon_days": horizon,
+            "forecasts": [
+                {"ticker": t, "last_date": ld, "last_close": c, "predicted_close": p, "change_pct": ch * 100.0,
+                 "target_date": td}
+                for t, ld, c, p, ch, td in zip(found, last_dates, last_close.tolist(), predicted.tolist(),
+                                                changes.tolist(), target_dates)
+            ],
+            "missing": missing,
+        }
+
+    def _ticker_changes(self, model_obj: Any, version: Any, index: TickerIndex, horizon: int) -> np.ndarray:
+        """Cambio relativo previsto (close[t+h]/close[t] - 1) de todos los tickers de latest()."""
+        key = (version, index.generation, horizon)
+        changes = self._ticker_forecasts.get(key)
+        if changes is not None:
+            return changes
+        latest = index.latest()
+        X = np.hstack([latest.features, np.full((len(latest.tickers), 1), float(horizon))])
+        pred, _ = self._call_model(TICKER_MODEL, model_obj, X)
+        changes = pred.astype(np.float64).reshape(-1)
+        if TICKER_FORECAST_CACHE > 0:
+            with self._lock:
+                self._ticker_forecasts[key] = changes
+                while len(self._ticker_forecasts) > TICKER_FORECAST_CACHE:
+                    self._ticker_forecasts.popitem(last=False)
+        return changes
+
+    @staticmethod
+    def _iso_date(value: Any) -> Optional[str]:
+        if value is None:
+            return None
+        import pandas as pd
+
+        try:
+            return pd.Timestamp(value).date().isoformat()
+        except Exception:
+            return None
+
+    @staticmethod
+    def _target_dates(last_date: Any, horizons: np.ndarray, unit: str) -> Optional[List[str]]:
+        """last_date + cada horizonte (días o meses de calendario), en ISO; None sin last_date."""
+        if last_date is None:
+            return None
+        import pandas as pd
+
+        try:
+            base = pd.Timestamp(last_date)
+            if unit == 'months':
+                return [(base + pd.DateOffset(months=int(h))).date().isoformat() for h in horizons]
+            dates = base.normalize() + pd.to_timedelta(np.asarray(horizons), unit="D")
+            return [d.date().isoformat() for d in dates]
+        except Exception:
+            return None
+
+    def score(self, model_name: str, X: np.ndarray) -> tuple:
+        """(pred, proba|None) de una matriz 2-D ya construida, sin formatear la respuesta."""
+        model_name = self._require_model(model_name)
+        package, derived, _ = self._snapshot(model_name)
+        model_obj = self._get_model_object(model_name, package)
+        if model_obj is None:
+            raise ValueError(f"No se pudo extraer el modelo de '{model_name}'")
+        return self._score_model(model_name, model_obj, X, derived)
+
+    def format_predictions(self, model_name: str, pred: np.ndarray, proba: Optional[np.ndarray], inputs: List[Any]) -> List[Dict[str, Any]]:
+        """Un dict de respuesta por fila (formato de predict()) a partir de las salidas del modelo."""
+        model_name = self._resolve_name(model_name)
+        pred = np.asarray(pred)
+        results = []
+        for i, row in enumerate(inputs):
+            # Build a response dict so we can attach model-specific conversions (eg. car price -> rupees/usd)
+            resp = {"model": model_name, "input": row, "prediction": pred[i:i + 1].tolist()}
+            if proba is not None:
+                resp["proba"] = proba[i:i + 1].tolist()
+            results.append(resp)
+
+        # For car price models, provide helpful conversions: dataset units -> rupees -> usd
+        if model_name in ("car_price", "car_model"):
+            self._add_car_price_conversions(results)
+        return results
+
+    def _require_model(self, model_name: str) -> str:
+        name = self._resolve_name(model_name)
+        if name not in self._artifacts:
+            raise ValueError(f"Modelo '{model_name}' no cargado. Modelos disponibles: {self.get_available_models()}")
+        return name
+
+    @staticmethod
+    def _as_matrix(model_name: str, rows: List[Any]) -> np.ndarray:
+        try:
+            X = np.array(rows)
+        except ValueError:
+            X = None
+        if X is None or X.ndim != 2:
+            raise ValueError(f"Todas las filas deben tener el mismo número de features para {model_name}")
+        return X
+
+    def _predict_features(self, model_name: str, model_obj: Any, features: List[float],
+                          version: Optional[tuple] = None, derived: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Predicción con un vector de features ya construido."""
+        X = np.array(features).reshape(1, -1)
+        return self._predict_matrix(model_name, model_obj, X, [features], version, derived)[0]
+
+    def _predict_matrix(self, model_name: str, model_obj: Any, X: np.ndarray, inputs: List[Any],
+                        version: Optional[tuple] = None, derived: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Una llamada vectorizada a predict (y predict_proba) para las filas de X que no estén en caché.
+
+        `model_obj`, `version` y `derived` deben venir del mismo _snapshot()."""
+        return self.predict_with_cache(
+            model_name, X, inputs, version, lambda Xm: self._score_model(model_name, model_obj, Xm, derived or {}))
+
+    def predict_with_cache(self, model_name: str, X: np.ndarray, inputs: List[Any],
+                           version: Optional[tuple], score_fn) -> List[Dict[str, Any]]:
+        """
+        Resultados por fila de X: los que están en prediction_cache se devuelven
+        directamente y el resto se calcula con una sola llamada score_fn(X_faltantes)
+        -> (pred, proba). `version` es la del artefacto con que se puntúa (None = sin caché).
+        """
+        keys = self._cache_keys(model_name, X, version)
+        if keys is None:
+            pred, proba = score_fn(X)
+            return self.format_predictions(model_name, pred, proba, inputs)
+        cache = self.prediction_cache
+        results: List[Optional[Dict[str, Any]]] = [None] * len(keys)
+        missing = []
+        for i, key in enumerate(keys):
+            hit = cache.get(key)
+            if hit is None:
+                missing.append(i)
+            else:
+                res = dict(hit)
+                res["input"] = inputs[i]
+                results[i] = res
+        if missing:
+            X_missing = X if len(missing) == len(keys) else X[missing]
+            pred, proba = score_fn(X_missing)
+            fresh = self.format_predictions(model_name, pred, proba, [inputs[i] for i in missing])
+            for i, res in zip(missing, fresh):
+                cache.put(keys[i], dict(res))
+                results[i] = res
+        return results
+
+    def _cache_keys(self, model_name: str, X: np.ndarray, version: Optional[tuple]) -> Optional[List[tuple]]:
+        if version is None or not self.prediction_cache.enabled:
+            return None
+        try:
+            rows = np.asarray(X, dtype=np.float64).tolist()
+        except (TypeError, ValueError):
+            return None  # features no numéricas: sin caché
+        return [(model_name, version, tuple(r)) for r in rows]
+
+    def _score_model(self, model_name: str, model_obj: Any, X: np.ndarray, derived: Dict[str, Any]) -> tuple:
+        table = derived.get("lookup") or derived.get("curve")
+        if table is not None:
+            try:
+                mask, pred, proba = table.lookup(X)
+            except (TypeError, ValueError):
+                mask = None
+            if mask is not None and mask.all():
+                return pred, proba
+            if mask is not None and mask.any():
+                # filas fuera del dominio tabulado: solo esas pasan por el modelo
+                rest_pred, rest_proba = self._call_model(model_name, model_obj, np.asarray(X)[~mask])
+                return merge_scores(mask, pred, proba, rest_pred, rest_proba)
+        return self._call_model(model_name, model_obj, X)
+
+    @staticmethod
+    def _call_model(model_name: str, model_obj: Any, X: np.ndarray) -> tuple:
+        try:
+            pred = model_obj.predict(X)
+            # si clasificación y existe predict_proba
+            proba = model_obj.predict_proba(X) if hasattr(model_obj, "predict_proba") else None
+        except Exception as e:
+            raise RuntimeError(f"Error al predecir con {model_name}: {e}")
+        return np.asarray(pred), proba
+
+    def _add_car_price_conversions(self, results: List[Dict[str, Any]]) -> None:
+        try:
+            unit_multiplier = float(os.getenv('CAR_PRICE_UNIT_MULTIPLIER', '100000'))
+        except Exception:
+            return
+        try:
+            usd_rate = float(os.getenv('CAR_PRICE_TO_USD_RATE', '0.012'))
+        except Exception:
+            usd_rate = None
+        for resp in results:
+            try:
+                price_val = float(resp["prediction"][0])
+            except Exception:
+                # if conversion fails, ignore and return base response
+                continue
+            rupees = price_val * unit_multiplier
+            resp.update({
+                "price_dataset_units": price_val,
+                "price_rupees": rupees,
+                "price_usd": rupees * usd_rate if usd_rate is not None else None,
+            })
+
+    def _recommend_movies(self, model_name: str, loaded: Dict[str, Any], params: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Top-k películas por popularidad, filtradas por año/género si se indican."""
+        top_k = int(params.get("top_k", 1)) if params else 1  # Default 1 movie
+        year = params.get('year') if params else None
+        genre = params.get('genre') if params else None
+        genres = params.get('genres') if params else None  # lista: filtro multi-género
+
+        # índices invertidos construidos al cargar (solo si son de este mismo paquete)
+        index = self._derived.get(model_name, {}).get("movie_index")
+        if index is None or loaded is not self.models.get(model_name):
+            index = self._movie_index_for(loaded)
+        if index is not None:
+            try:
+                y = int(year) if year is not None else None
+            except Exception:
+                y = None
+            if genres:
+                # AND/OR de géneros: una operación bitwise sobre todo el catálogo
+                mode = 'all' if str(params.get('match', 'any')).lower() == 'all' else 'any'
+                mask = index.catalog.match(genres=list(genres), mode=mode, year=y)
+                titles = index.catalog.top_k(top_k, mask) or index.catalog.top_k(top_k)
+            else:
+                titles = index.top_k(top_k, genre=genre or None, year=y)
+            return {"model": model_name, "input": params or {}, "prediction": titles}
+
+        movies_df = loaded.get('movies')
+        if movies_df is None:
+            return {"model": model_name, "input": params or {}, "prediction": []}
+
+        # If movies_df is a DataFrame, filter by year/genre and return top_k by popularity
+        try:
+            df = movies_df
+            # filter by year if provided
+            if year is not None:
+                try:
+                    y = int(year)
+                    df = df[df['year'] == y]
+                except Exception:
+                    pass
+            # filter by genre if provided (case-insensitive substring in genres_str or in genres_list)
+            if genre:
+                g = str(genre).strip().lower()
+                df = df[df['genres_str'].str.lower().str.contains(g, na=False) | df['genres_list'].apply(lambda gl: any(g == gg.lower() for gg in gl))]
+
+            # If after filtering we have no matches, fallback to the full list
+            if df.shape[0] == 0:
+                df = movies_df
+
+            # Sort by popularity and take top_k
+            df_sorted = df.sort_values('popularity', ascending=False).head(top_k)
+            titles = df_sorted['title'].tolist()
+            return {"model": model_name, "input": params or {}, "prediction": titles}
+        except Exception as e:
+            # fallback: if movies is a list
+            import random, time
+            random.seed(int(time.time() * 1000))
+            movies_list = loaded.get('movies', [])
+            if isinstance(movies_list, list) and len(movies_list) > 0:
+                recs = random.sample(movies_list, min(top_k, len(movies_list)))
+                return {"model": model_name, "input": params or {}, "prediction": recs}
+            return {"model": model_name, "input": params or {}, "prediction": []}
+
+    @staticmethod
+    def _movie_index_for(package: Any) -> Optional[MovieIndex]:
+        """Índice de un paquete que no es el cargado actualmente (recarga en curso)."""
+        if not isinstance(package, dict) or 'catalog' not in package:
+            return None  # DataFrame legacy: se filtra directamente
+        return MovieIndex(MovieCatalog.from_arrays(package['catalog']))
+
+    def movie_catalog(self) -> Optional[MovieCatalog]:
+        """Catálogo columnar del movie_recommender cargado (None si no hay)."""
+        name = self._resolve_name('movie_recommender')
+        if name not in self._artifacts:
+            return None
+        package = self.get_package(name)
+        index = self._derived.get(name, {}).get("movie_index")
+        if index is None:
+            index = self._movie_index_for(package)
+        return index.catalog if index is not None else None
+
     # -------------- run_model desde texto ----------------
     def run_model(self, command_text: str) -> Dict[str, Any]:
         """
@@ -0,0 +1,171 @@
+"""Columnar movie catalog for the movie_recommender package.
+
+Instead of a DataFrame with Python-list (``genres_list``) and string columns,
+the package stores plain numpy arrays (``MovieCatalog.to_arrays()``):
+
+- ``genres``: uint32 bitmask per movie, bit i = ``genre_names[i]``;
+- ``year`` (int16, -1 = unknown), ``popularity``, ``rating_count``,
+  ``rating_mean``, ``movie_id``;
+- titles as one UTF-8 byte buffer plus an offsets array.
+
+Rows are sorted by popularity (descending), so row number = popularity rank and
+a top-k is the first k rows that pass a filter. Genre AND/OR filters are one
+bitwise op over the whole ``genres`` array. Having no object arrays, the
+artifact unpickles fast and is memory-mappable (``MODEL_MMAP_MODE=r``).
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+CATALOG_FORMAT = 1
+MAX_GENRES = 32
+
+
+class MovieCatalog:
+    def __init__(self, genre_names: List[str], genres: np.ndarray, year: np.ndarray, popularity: np.ndarray,
+                 rating_count: np.ndarray, rating_mean: np.ndarray, movie_id: np.ndarray,
+                 title_bytes: np.ndarray, title_offsets: np.ndarray):
+        self.genre_names = list(genre_names)
+        self.genres = genres
+        self.year = year
+        self.popularity = popularity
+        self.rating_count = rating_count
+        self.rating_mean = rating_mean
+        self.movie_id = movie_id
+        self.title_bytes = title_bytes
+        self.title_offsets = title_offsets
+        self._bits = {name.strip().lower(): 1 << i for i, name in enumerate(self.genre_names)}
+
+    # ------------------------------------------------------------ build / store
+
+    @classmethod
+    def from_frame(cls, movies_df: Any) -> "MovieCatalog":
+        """Build from the legacy DataFrame (title, year, genres_list or genres_str, popularity, ...)."""
+        order = np.argsort(-movies_df['popularity'].to_numpy(dtype=np.float64), kind='stable')
+        df = movies_df.iloc[order]
+        n = len(df)
+        if 'genres_list' in df.columns:
+            genre_lists = [[str(g).strip() for g in gl if str(g).strip()] if isinstance(gl, (list, tuple, np.ndarray)) else []
+                           for gl in df['genres_list']]
+        else:
+            genre_lists = [[g.strip() for g in str(s).split('|') if g.strip()] for s in df['genres_str'].fillna('')]
+        names: Dict[str, int] = {}
+        genres = np.zeros(n, dtype=np.uint32)
+        for row, gl in enumerate(genre_lists):
+            for g in gl:
+                bit = names.setdefault(g, len(names))
+                if bit >= MAX_GENRES:
+                    raise ValueError(f"El catálogo tiene más de {MAX_GENRES} géneros; no cabe en un bitmask uint32")
+                genres[row] |= np.uint32(1 << bit)
+
+        def column(name: str, dtype: Any, fill: Any) -> np.ndarray:
+            if name not in df.columns:
+                return np.full(n, fill, dtype=dtype)
+            values = df[name].to_numpy(dtype=np.float64, na_value=np.nan)
+            return np.where(np.isnan(values), fill, values).astype(dtype)
+
+        titles = [str(t).encode('utf-8') for t in df['title'].tolist()]
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(t) for t in titles])
+        return cls(
+            genre_names=list(names),
+            genres=genres,
+            year=column('year', np.int16, -1),
+            popularity=column('popularity', np.float32, 0.0),
+            rating_count=column('rating_count', np.int32, 0),
+            rating_mean=column('rating_mean', np.float32, 0.0),
+            movie_id=column('movieId', np.int32, -1),
+            title_bytes=np.frombuffer(b''.join(titles), dtype=np.uint8).copy(),
+            title_offsets=offsets,
+        )
+
+    def to_arrays(self) -> Dict[str, Any]:
+        """Plain dict of numpy arrays to store in the joblib package under 'catalog'."""
+        return {
+            'format': CATALOG_FORMAT,
+            'genre_names': list(self.genre_names),
+            'genres': self.genres,
+            'year': self.year,
+            'popularity': self.popularity,
+            'rating_count': self.rating_count,
+            'rating_mean': self.rating_mean,
+            'movie_id': self.movie_id,
+            'title_bytes': self.title_bytes,
+            'title_offsets': self.title_offsets,
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, Any]) -> "MovieCatalog":
+        if arrays.get('format') != CATALOG_FORMAT:
+            raise ValueError(f"Formato de catálogo no soportado: {arrays.get('format')!r}")
+        return cls(**{k: v for k, v in arrays.items() if k != 'format'})
+
+    @classmethod
+    def from_package(cls, pkg: Any) -> Optional["MovieCatalog"]:
+        """Catalog of a movie_recommender package: columnar 'catalog', or the legacy 'movies' DataFrame."""
+        if not isinstance(pkg, dict):
+            return None
+        if isinstance(pkg.get('catalog'), dict):
+            return cls.from_arrays(pkg['catalog'])
+        movies = pkg.get('movies')
+        if hasattr(movies, 'columns') and {'title', 'popularity'} <= set(movies.columns):
+            return cls.from_frame(movies)
+        return None
+
+    # ------------------------------------------------------------ queries
+
+    def __len__(self) -> int:
+        return len(self.genres)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self.genres, self.year, self.popularity, self.rating_count,
+                                      self.rating_mean, self.movie_id, self.title_bytes, self.title_offsets))
+
+    def title(self, row: int) -> str:
+        start, end = self.title_offsets[row], self.title_offsets[row + 1]
+        return bytes(self.title_bytes[start:end]).decode('utf-8')
+
+    def titles(self, rows: Iterable[int]) -> List[str]:
+        return [self.title(int(r)) for r in rows]
+
+    def genre_bits(self, names: Iterable[str]) -> Optional[int]:
+        """OR of the bits of `names` (case-insensitive, exact); None if any name is unknown."""
+        bits = 0
+        for name in names:
+            bit = self._bits.get(str(name).strip().lower())
+            if bit is None:
+                return None
+            bits |= bit
+        return bits
+
+    def match(self, genres: Optional[List[str]] = None, mode: str = 'any', year: Optional[int] = None) -> np.ndarray:
+        """Boolean mask over the catalog: genres AND (mode='all') / OR (mode='any'), and year."""
+        mask = np.ones(len(self), dtype=bool)
+        if genres:
+            if mode == 'all':
+                bits = self.genre_bits(genres)
+                if bits is None:
+                    return np.zeros(len(self), dtype=bool)
+                mask &= (self.genres & np.uint32(bits)) == np.uint32(bits)
+            else:
+                bits = self.genre_bits([g for g in genres if str(g).strip().lower() in self._bits])
+                mask &= (self.genres & np.uint32(bits or 0)) != 0
+        if year is not None:
+            mask &= self.year == year
+        return mask
+
+    def top_k(self, k: int, mask: Optional[np.ndarray] = None) -> List[str]:
+        """Titles of the first k rows (by popularity) passing `mask`."""
+        k = max(0, int(k))
+        if mask is None:
+            return self.titles(range(min(k, len(self))))
+        return self.titles(np.flatnonzero(mask)[:k])
+
+    def genre_list(self) -> List[str]:
+        return sorted(self.genre_names)
+
+    def year_list(self) -> List[int]:
+        return [int(y) for y in np.unique(self.year[self.year >= 0])]
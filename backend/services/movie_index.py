@@ -0,0 +1,101 @@
+"""Inverted indexes over the movie_recommender catalog.
+
+Built on ``MovieCatalog``, whose rows are already ranked by popularity (rank
+0 = most popular). Each genre and each year maps to the ascending array of
+ranks of its movies, so a filtered top-k is the first k entries of one list, or
+of a lazy merge of a few sorted lists, instead of filtering and sorting the
+whole catalog per request.
+"""
+from __future__ import annotations
+
+import heapq
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+
+from services.movie_catalog import MovieCatalog
+
+
+class MovieIndex:
+    def __init__(self, catalog: MovieCatalog):
+        # las filas del catálogo ya están en orden de popularidad descendente: fila = rank
+        self.catalog = catalog
+        self.years = catalog.year
+        self.genre_bit = {name.strip().lower(): np.uint32(1 << i) for i, name in enumerate(catalog.genre_names)}
+        self.by_genre: Dict[str, np.ndarray] = {
+            name: np.flatnonzero(catalog.genres & bit).astype(np.int32) for name, bit in self.genre_bit.items()
+        }
+        self.by_year: Dict[int, np.ndarray] = {}
+        for y in np.unique(self.years[self.years >= 0]):
+            self.by_year[int(y)] = np.flatnonzero(self.years == y).astype(np.int32)
+
+    @classmethod
+    def from_frame(cls, movies_df: Any) -> "MovieIndex":
+        """Build from the legacy DataFrame (title, year, genres_list/genres_str, popularity)."""
+        return cls(MovieCatalog.from_frame(movies_df))
+
+    def __len__(self) -> int:
+        return len(self.catalog)
+
+    @property
+    def nbytes(self) -> int:
+        # solo las listas invertidas: las columnas del catálogo son arrays del paquete
+        return sum(a.nbytes for a in self.by_genre.values()) + sum(a.nbytes for a in self.by_year.values())
+
+    def genres(self) -> List[str]:
+        return sorted(self.by_genre)
+
+    def matching_genres(self, genre: str) -> List[str]:
+        """Indexed genres containing `genre` (case-insensitive substring, like the old str.contains)."""
+        g = str(genre).strip().lower()
+        return [name for name in self.by_genre if g in name]
+
+    def _genre_ranks(self, names: List[str]) -> Iterator[int]:
+        """Ascending ranks of the movies in any of the genres `names`."""
+        if len(names) == 1:
+            return iter(self.by_genre[names[0]])
+        # merge acotado: de cada lista solo se consumen los primeros elementos
+        merged = heapq.merge(*(iter(self.by_genre[n]) for n in names))
+        return _dedup(merged)
+
+    def top_k(self, k: int, genre: Optional[str] = None, year: Optional[int] = None) -> List[Any]:
+        """Top-k titles by popularity, optionally filtered by genre and/or year.
+
+        No match for the filters -> top-k of the whole catalog (same as before).
+        """
+        k = max(0, int(k))
+        ranks: Iterator[int] = iter(range(len(self)))
+        if genre or year is not None:
+            names = self.matching_genres(genre) if genre else None
+            year_ranks = self.by_year.get(int(year), np.empty(0, dtype=np.int32)) if year is not None else None
+            if names is not None and not names:
+                ranks = iter(())
+            elif names is not None and year_ranks is not None:
+                # recorrer la lista más corta y comprobar el otro filtro por rank
+                if len(year_ranks) <= sum(len(self.by_genre[n]) for n in names):
+                    wanted = np.uint32(0)
+                    for n in names:
+                        wanted |= self.genre_bit[n]
+                    ranks = (r for r in year_ranks if self.catalog.genres[r] & wanted)
+                else:
+                    ranks = (r for r in self._genre_ranks(names) if self.years[r] == int(year))
+            elif names is not None:
+                ranks = self._genre_ranks(names)
+            else:
+                ranks = iter(year_ranks)
+        picked = [int(r) for r in islice(ranks, k)]
+        if not picked:
+            picked = list(range(min(k, len(self))))
+        return self.catalog.titles(picked)
+
+    def describe(self) -> dict:
+        return {"movies": len(self), "genres": len(self.by_genre), "years": len(self.by_year), "bytes": self.nbytes}
+
+
+def _dedup(sorted_ranks: Iterator[int]) -> Iterator[int]:
+    last = None
+    for r in sorted_ranks:
+        if r != last:
+            yield r
+            last = r
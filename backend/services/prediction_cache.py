@@ -0,0 +1,90 @@
+"""LRU + TTL cache of per-row prediction results.
+
+Keys are ``(model name, artifact version, feature tuple)``. Including the
+artifact version means a reloaded model can never serve a stale result; the
+entries of the old version are also dropped eagerly by ``invalidate``.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class PredictionCache:
+    def __init__(self, max_entries: Optional[int] = None, ttl_seconds: Optional[float] = None):
+        if max_entries is None:
+            max_entries = int(os.getenv("PREDICTION_CACHE_SIZE", "10000") or 0)
+        if ttl_seconds is None:
+            ttl_seconds = float(os.getenv("PREDICTION_CACHE_TTL", "300") or 0)
+        self.max_entries = max(0, int(max_entries))
+        self.ttl = max(0.0, float(ttl_seconds))  # 0 = sin expiración
+        # key -> (expires_at, value); orden = recencia de uso (más antiguo primero)
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+        if hasattr(os, "register_at_fork"):
+            # gunicorn hace fork de sus workers tras importar la app: el lock pudo quedar tomado
+            os.register_at_fork(after_in_child=self._reset_lock)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def get(self, key: Hashable) -> Any:
+        """Cached value for key, or None (counts a hit or a miss)."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            expires_at, value = entry
+            if expires_at and expires_at < time.monotonic():
+                del self._data[key]
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._data.move_to_end(key)
+            self._stats["hits"] += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if not self.enabled:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl else 0.0
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def invalidate(self, model_name: Optional[str] = None) -> int:
+        """Drop the entries of model_name (every entry if None); returns how many."""
+        with self._lock:
+            if model_name is None:
+                keys = list(self._data)
+            else:
+                keys = [k for k in self._data if k[0] == model_name]
+            for k in keys:
+                del self._data[k]
+            self._stats["invalidations"] += len(keys)
+            return len(keys)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            s: Dict[str, Any] = dict(self._stats)
+            size = len(self._data)
+        lookups = s["hits"] + s["misses"]
+        s.update({
+            "size": size,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hit_rate": round(s["hits"] / lookups, 4) if lookups else 0.0,
+        })
+        return s
+
+    def _reset_lock(self) -> None:
+        self._lock = threading.Lock()
@@ -1,12 +1,15 @@
 # stt_service.py - Servicio de Speech-to-Text
+import asyncio
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
 class STTService:
-    def __init__(self):
+    def __init__(self, executor=None):
         self.service_type = os.getenv("STT_SERVICE", "azure")  # azure, google, whisper
+        # pool donde corren las llamadas bloqueantes (SDKs, Whisper); None = pool por defecto del loop
+        self.executor = executor
         self.configure_service()
     
     def configure_service(self):
@@ -20,60 +23,79 @@ class STTService:
         else:
             print(f"[WARN] Servicio STT no configurado: {self.service_type}")
     
+    @staticmethod
+    def _has_module(name: str) -> bool:
+        import importlib.util
+        try:
+            return importlib.util.find_spec(name) is not None
+        except ModuleNotFoundError:
+            return False
+
+    # Los SDKs y el modelo Whisper se importan/cargan en la primera transcripción:
+    # aquí solo se verifica que estén instalados para no retrasar el arranque.
     def setup_azure(self):
         """Configurar Azure Speech Services"""
-        try:
-            import azure.cognitiveservices.speech as speechsdk
-            
-            speech_key = os.getenv("AZURE_SPEECH_KEY", "")
-            service_region = os.getenv("AZURE_SERVICE_REGION", "")
-            
-            if speech_key and service_region:
-                self.speech_config = speechsdk.SpeechConfig(
-                    subscription=speech_key,
-                    region=service_region
-                )
-                self.speech_config.speech_recognition_language = "es-ES"
-                self.configured = True
-                print("[OK] Azure Speech configurado")
-            else:
-                self.configured = False
-                print("[WARN] Azure Speech no configurado. Configure AZURE_SPEECH_KEY y AZURE_SERVICE_REGION")
-        except ImportError:
+        self.speech_config = None
+        if not self._has_module("azure.cognitiveservices.speech"):
             self.configured = False
             print("[WARN] Instale azure-cognitiveservices-speech")
+            return
+
+        speech_key = os.getenv("AZURE_SPEECH_KEY", "")
+        service_region = os.getenv("AZURE_SERVICE_REGION", "")
+
+        if speech_key and service_region:
+            self.configured = True
+            print("[OK] Azure Speech configurado")
+        else:
+            self.configured = False
+            print("[WARN] Azure Speech no configurado. Configure AZURE_SPEECH_KEY y AZURE_SERVICE_REGION")
+
+    def _get_speech_config(self):
+        if self.speech_config is None:
+            import azure.cognitiveservices.speech as speechsdk
+
+            self.speech_config = speechsdk.SpeechConfig(
+                subscription=os.getenv("AZURE_SPEECH_KEY", ""),
+                region=os.getenv("AZURE_SERVICE_REGION", "")
+            )
+            self.speech_config.speech_recognition_language = "es-ES"
+        return self.speech_config
     
     def setup_google(self):
         """Configurar Google Speech-to-Text"""
-        try:
-            from google.cloud import speech
-            
-            self.client = speech.SpeechClient()
+        self.client = None
+        if self._has_module("google.cloud.speech"):
             self.configured = True
             print("[OK] Google Speech configurado")
-        except ImportError:
+        else:
             self.configured = False
             print("[WARN] Instale google-cloud-speech")
-        except Exception as e:
-            self.configured = False
-            print(f"[WARN] Error configurando Google Speech: {e}")
+
+    def _get_google_client(self):
+        if self.client is None:
+            from google.cloud import speech
+
+            self.client = speech.SpeechClient()
+        return self.client
     
     def setup_whisper(self):
         """Configurar OpenAI Whisper (local)"""
-        try:
-            import importlib
-            whisper = importlib.import_module('whisper')
-            
-            model_size = os.getenv("WHISPER_MODEL_SIZE", "base")
-            self.model = whisper.load_model(model_size)
+        self.model = None
+        self.whisper_model_size = os.getenv("WHISPER_MODEL_SIZE", "base")
+        if self._has_module("whisper"):
             self.configured = True
-            print(f"[OK] Whisper configurado (modelo: {model_size})")
-        except ImportError:
+            print(f"[OK] Whisper configurado (modelo: {self.whisper_model_size}, se carga en el primer uso)")
+        else:
             self.configured = False
             print("[WARN] Instale openai-whisper")
-        except Exception as e:
-            self.configured = False
-            print(f"[WARN] Error configurando Whisper: {e}")
+
+    def _get_whisper_model(self):
+        if self.model is None:
+            import importlib
+            whisper = importlib.import_module('whisper')
+            self.model = whisper.load_model(self.whisper_model_size)
+        return self.model
     
     def is_available(self):
         """Verificar si el servicio está disponible"""
@@ -94,21 +116,25 @@ class STTService:
         
         try:
             if self.service_type == "azure":
-                return await self.transcribe_azure(audio_path)
+                fn = self.transcribe_azure
             elif self.service_type == "google":
-                return await self.transcribe_google(audio_path)
+                fn = self.transcribe_google
             elif self.service_type == "whisper":
-                return await self.transcribe_whisper(audio_path)
+                fn = self.transcribe_whisper
+            else:
+                return None
+            # reconocimiento bloqueante (red / CPU): fuera del event loop
+            return await asyncio.get_running_loop().run_in_executor(self.executor, fn, audio_path)
         except Exception as e:
             return f"Error en transcripción: {str(e)}"
     
-    async def transcribe_azure(self, audio_path: str):
+    def transcribe_azure(self, audio_path: str):
         """Transcribir con Azure Speech"""
         import azure.cognitiveservices.speech as speechsdk
         
         audio_config = speechsdk.audio.AudioConfig(filename=audio_path)
         speech_recognizer = speechsdk.SpeechRecognizer(
-            speech_config=self.speech_config,
+            speech_config=self._get_speech_config(),
             audio_config=audio_config
         )
         
@@ -121,7 +147,7 @@ class STTService:
         else:
             return f"Error: {result.reason}"
     
-    async def transcribe_google(self, audio_path: str):
+    def transcribe_google(self, audio_path: str):
         """Transcribir con Google Speech-to-Text"""
         from google.cloud import speech
         
@@ -135,13 +161,13 @@ class STTService:
             language_code="es-ES"
         )
         
-        response = self.client.recognize(config=config, audio=audio)
+        response = self._get_google_client().recognize(config=config, audio=audio)
         
         if response.results:
             return response.results[0].alternatives[0].transcript
         return "No se pudo reconocer el audio"
     
-    async def transcribe_whisper(self, audio_path: str):
+    def transcribe_whisper(self, audio_path: str):
         """Transcribir con Whisper (local)"""
-        result = self.model.transcribe(audio_path, language="es")
+        result = self._get_whisper_model().transcribe(audio_path, language="es")
         return result["text"]
@@ -0,0 +1,118 @@
+"""Memory-mapped OHLCV of every ticker in the S&P 500 store.
+
+Reads ``store/ohlcv/`` written by ``services/ticker_store.py``: one (N, 5)
+float64 array with all tickers back to back, their int64 day arrays, and
+``index.json`` mapping ticker -> (offset, length). Slicing a ticker is a view,
+with no per-ticker file to open. The latest feature row of every ticker
+(``TICKER_FEATURE_COLS``, last ``TICKER_WINDOW`` days) is computed once, as a
+single (T, W) gather, and kept with the index.
+"""
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from services.feature_specs import TICKER_WINDOW, ticker_window_features
+from services.ticker_store import COLUMNS, STORE_DIR, _load_json
+
+OPEN, HIGH, LOW, CLOSE, VOLUME = (COLUMNS.index(c) for c in ("open", "high", "low", "close", "volume"))
+
+
+class LatestRows(NamedTuple):
+    tickers: List[str]          # tickers with at least TICKER_WINDOW days, in index order
+    features: np.ndarray        # (T, len(TICKER_FEATURE_COLS))
+    last_close: np.ndarray      # (T,)
+    last_day: np.ndarray        # (T,) int64 days since 1970-01-01
+
+
+class TickerIndex:
+    def __init__(self, root: Path, index: Dict[str, Any]):
+        self.root = Path(root)
+        self.generation = index.get("generation")
+        out = self.root / "ohlcv"
+        self.dates = np.load(out / index["date_file"], mmap_mode="r")
+        self.ohlcv = np.load(out / index["ohlcv_file"], mmap_mode="r")
+        self.offsets: Dict[str, Tuple[int, int]] = {t: (int(o), int(n)) for t, (o, n) in index["tickers"].items()}
+        self._latest: Optional[LatestRows] = None
+        self._positions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def open(cls, root: Path = STORE_DIR) -> Optional["TickerIndex"]:
+        """Index of the store at `root`, or None if it was never ingested."""
+        for attempt in range(2):
+            index = _load_json(Path(root) / "ohlcv" / "index.json")
+            if not index:
+                return None
+            try:
+                return cls(root, index)
+            except FileNotFoundError:
+                # una ingesta publicó dos generaciones entre la lectura de index.json y el mmap
+                if attempt:
+                    raise
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker in self.offsets
+
+    def tickers(self) -> List[str]:
+        return list(self.offsets)
+
+    @property
+    def nbytes(self) -> int:
+        latest = self._latest
+        return 0 if latest is None else latest.features.nbytes + latest.last_close.nbytes + latest.last_day.nbytes
+
+    def slice(self, ticker: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(dates, ohlcv) views of one ticker, sorted by date."""
+        offset, length = self.offsets[ticker]
+        return self.dates[offset:offset + length], self.ohlcv[offset:offset + length]
+
+    def latest(self) -> LatestRows:
+        """Latest feature row, close and day of every ticker with enough history (computed once)."""
+        latest = self._latest
+        if latest is None:
+            with self._lock:
+                if self._latest is None:
+                    self._latest = self._build_latest()
+                    self._positions = {t: i for i, t in enumerate(self._latest.tickers)}
+                latest = self._latest
+        return latest
+
+    def _build_latest(self) -> LatestRows:
+        names = [t for t, (_, n) in self.offsets.items() if n >= TICKER_WINDOW]
+        ends = np.array([sum(self.offsets[t]) for t in names], dtype=np.int64).reshape(-1)
+        rows = ends[:, None] - TICKER_WINDOW + np.arange(TICKER_WINDOW)  # (T, W)
+        window = np.asarray(self.ohlcv[rows.ravel()]).reshape(len(names), TICKER_WINDOW, len(COLUMNS))
+        last_close = window[:, -1, CLOSE]
+        # sin cierre reciente no hay pronóstico; huecos en la ventana -> feature neutra (0)
+        keep = np.isfinite(last_close) & (last_close > 0)
+        features = ticker_window_features(window[keep][..., CLOSE], window[keep][..., HIGH], window[keep][..., LOW])
+        features = np.nan_to_num(features, nan=0.0, posinf=0.0, neginf=0.0)
+        return LatestRows([t for t, k in zip(names, keep) if k], features, last_close[keep].copy(),
+                          np.asarray(self.dates[ends[keep] - 1]))
+
+    def positions(self, tickers: Iterable[str]) -> Tuple[np.ndarray, List[str], List[str]]:
+        """Rows of `tickers` in latest() (case-insensitive), the names found, and the ones missing."""
+        self.latest()
+        rows: List[int] = []
+        found: List[str] = []
+        missing: List[str] = []
+        for t in tickers:
+            key = str(t).strip().upper()
+            i = self._positions.get(key)
+            if i is None:
+                missing.append(str(t))
+            else:
+                rows.append(i)
+                found.append(key)
+        return np.array(rows, dtype=np.int64), found, missing
+
+    def describe(self) -> dict:
+        return {"tickers": len(self), "rows": int(len(self.dates)), "generation": self.generation,
+                "bytes": int(self.ohlcv.nbytes + self.dates.nbytes)}
@@ -0,0 +1,314 @@
+"""Ticker-partitioned columnar store for the S&P 500 per-ticker CSVs.
+
+``scripts/ingest_sp500.py`` reads ``datasets/sp500/individual_stocks_5yr/**/<TICKER>_data.csv``
+in a process pool and writes, under ``datasets/sp500/store/`` (env
+``SP500_STORE_DIR``):
+
+- ``tickers/<TICKER>/``: one ``.npy`` per column, ``date`` (int64 days since
+  1970-01-01, sorted, unique) plus open/high/low/close/volume (float64), and a
+  ``meta.json`` with the source file's (mtime_ns, size);
+- ``aggregate/``: the cross-ticker daily ``sum`` and ``count`` of ``close``
+  over the sorted ``date`` union (the proxy index of ``train_sp500_model.py``
+  is sum / count);
+- ``ohlcv/``: every ticker concatenated into one (N, 5) float64 OHLCV array and
+  its int64 ``date`` array, plus ``index.json`` mapping ticker -> (offset,
+  length), for memory-mapped reads (services/ticker_index.py);
+- ``manifest.json``: per ticker source version, rows and date range.
+
+Only tickers whose CSV changed are re-read. Their previous close series is
+subtracted from the aggregate and the new one added, so adding a ticker or a
+day does not touch the other 504 files.
+"""
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+DATASET_DIR = Path(__file__).resolve().parents[1] / "datasets"
+SOURCE_DIR = DATASET_DIR / "sp500" / "individual_stocks_5yr"
+STORE_DIR = Path(os.getenv("SP500_STORE_DIR") or DATASET_DIR / "sp500" / "store")
+COLUMNS = ("open", "high", "low", "close", "volume")
+STORE_FORMAT = 1
+
+Series = Tuple[np.ndarray, np.ndarray]  # (date int64 días, valores)
+
+
+def day_to_iso(day: int) -> str:
+    return str(np.datetime64(int(day), "D"))
+
+
+def find_ticker_files(source: Path = SOURCE_DIR) -> Dict[str, Path]:
+    """Ticker -> CSV path (``AAPL_data.csv`` -> ``AAPL``), skipping macOS metadata folders."""
+    files: Dict[str, Path] = {}
+    for path in sorted(Path(source).rglob("*.csv")):
+        if "__MACOSX" in path.parts or path.name.startswith("._"):
+            continue
+        name = path.name[:-len("_data.csv")] if path.name.endswith("_data.csv") else path.stem
+        files[name] = path
+    return files
+
+
+def read_ticker_csv(path: Path) -> Dict[str, np.ndarray]:
+    """Columns of one ticker CSV: date as int64 days (sorted, last row wins per day), OHLCV as float64."""
+    import pandas as pd
+
+    df = pd.read_csv(path, usecols=lambda c: c in ("date",) + COLUMNS)
+    dates = pd.to_datetime(df["date"], errors="coerce")
+    df = df.assign(date=dates).dropna(subset=["date"])
+    df = df.sort_values("date", kind="stable").drop_duplicates("date", keep="last")
+    out = {"date": df["date"].to_numpy(dtype="datetime64[D]").astype(np.int64)}
+    for col in COLUMNS:
+        out[col] = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=np.float64) if col in df.columns \
+            else np.full(len(df), np.nan)
+    return out
+
+
+# ---------------------------------------------------------------- aggregate
+
+def accumulate(agg: Dict[str, np.ndarray], series: Series, sign: int) -> Dict[str, np.ndarray]:
+    """Add (sign=1) or remove (sign=-1) one ticker's daily values from the {date, sum, count} aggregate."""
+    dates, values = series
+    ok = np.isfinite(values)
+    dates, values = dates[ok], values[ok]
+    all_dates = np.union1d(agg["date"], dates)
+    total = np.zeros(len(all_dates), dtype=np.float64)
+    count = np.zeros(len(all_dates), dtype=np.int64)
+    idx = np.searchsorted(all_dates, agg["date"])
+    total[idx] = agg["sum"]
+    count[idx] = agg["count"]
+    idx = np.searchsorted(all_dates, dates)
+    np.add.at(total, idx, sign * values)
+    np.add.at(count, idx, sign)
+    keep = count > 0
+    return {"date": all_dates[keep], "sum": total[keep], "count": count[keep]}
+
+
+def empty_aggregate() -> Dict[str, np.ndarray]:
+    return {"date": np.empty(0, np.int64), "sum": np.empty(0, np.float64), "count": np.empty(0, np.int64)}
+
+
+# ---------------------------------------------------------------- store
+
+class TickerStore:
+    """Read side of the store: manifest, per-ticker columns (memory-mapped) and the daily aggregate."""
+
+    def __init__(self, root: Path = STORE_DIR):
+        self.root = Path(root)
+        self.manifest = _load_json(self.root / "manifest.json") or {"format": STORE_FORMAT, "tickers": {}}
+
+    @property
+    def exists(self) -> bool:
+        return bool(self.manifest.get("tickers"))
+
+    def tickers(self) -> List[str]:
+        return sorted(self.manifest["tickers"])
+
+    def read(self, ticker: str, columns: Iterable[str] = ("date",) + COLUMNS) -> Dict[str, np.ndarray]:
+        if ticker not in self.manifest["tickers"]:
+            raise KeyError(f"Ticker '{ticker}' no está en el store")
+        part = self.root / "tickers" / ticker
+        return {c: np.load(part / f"{c}.npy", mmap_mode="r") for c in columns}
+
+    def daily_aggregate(self) -> Dict[str, np.ndarray]:
+        agg_dir = self.root / "aggregate"
+        if not (agg_dir / "date.npy").exists():
+            return empty_aggregate()
+        return {k: np.load(agg_dir / f"{k}.npy") for k in ("date", "sum", "count")}
+
+    def index_frame(self) -> Any:
+        """DataFrame date / index_close (mean close across tickers) / tickers, sorted by date."""
+        import pandas as pd
+
+        agg = self.daily_aggregate()
+        return pd.DataFrame({
+            "date": agg["date"].astype("datetime64[D]").astype("datetime64[ns]"),
+            "index_close": agg["sum"] / agg["count"],
+            "tickers": agg["count"],
+        })
+
+
+def ingest(source: Path = SOURCE_DIR, root: Path = STORE_DIR, workers: Optional[int] = None,
+           full: bool = False) -> Dict[str, Any]:
+    """Bring the store up to date with `source`; returns a summary of what changed."""
+    t0 = time.perf_counter()
+    source, root = Path(source), Path(root)
+    if full and root.exists():
+        shutil.rmtree(root)
+    (root / "tickers").mkdir(parents=True, exist_ok=True)
+    store = TickerStore(root)
+    tickers: Dict[str, Any] = store.manifest["tickers"]
+    agg = store.daily_aggregate()
+    # partición escrita sin manifest al día (ingesta interrumpida): el agregado
+    # ya no es fiable, se recalcula desde las particiones al final
+    rebuild = not _partitions_match(root, tickers)
+
+    files = find_ticker_files(source)
+    todo: List[Tuple[str, str, str]] = []
+    unchanged = 0
+    for ticker, path in files.items():
+        st = path.stat()
+        entry = tickers.get(ticker)
+        if entry is not None and (entry["mtime_ns"], entry["size"]) == (st.st_mtime_ns, st.st_size):
+            unchanged += 1
+            continue
+        todo.append((ticker, str(path), str(root)))
+    removed = [t for t in tickers if t not in files]
+
+    added = updated = 0
+    if todo:
+        pool = None
+        if workers == 1 or len(todo) == 1:
+            results: Iterable[Any] = map(_ingest_one, todo)
+        else:
+            n = workers or os.cpu_count() or 1
+            pool = ProcessPoolExecutor(max_workers=n)
+            results = pool.map(_ingest_one, todo, chunksize=max(1, len(todo) // (4 * n)))
+        try:
+            for ticker, entry, old, new in results:
+                if old is not None and ticker in tickers:
+                    agg = accumulate(agg, old, -1)
+                    updated += 1
+                else:
+                    added += 1
+                agg = accumulate(agg, new, 1)
+                tickers[ticker] = entry
+        finally:
+            if pool is not None:
+                pool.shutdown()
+    for ticker in removed:
+        part = root / "tickers" / ticker
+        if (part / "close.npy").exists():
+            agg = accumulate(agg, (np.load(part / "date.npy"), np.load(part / "close.npy")), -1)
+        shutil.rmtree(part, ignore_errors=True)
+        tickers.pop(ticker)
+    if rebuild:
+        print("[SP500Store] particiones y manifest no coinciden: recalculando el agregado diario")
+        agg = empty_aggregate()
+        for ticker in tickers:
+            data = store.read(ticker, ("date", "close"))
+            agg = accumulate(agg, (np.asarray(data["date"]), np.asarray(data["close"])), 1)
+
+    _save_arrays(root / "aggregate", agg)
+    store.manifest.update({"format": STORE_FORMAT, "source": str(source), "updated_at": time.time()})
+    _save_json(root / "manifest.json", store.manifest)
+    # después del manifest: write_ohlcv lee las filas de cada ticker de él
+    if todo or removed or rebuild or not (root / "ohlcv" / "index.json").exists():
+        write_ohlcv(root, sorted(tickers))
+    return {
+        "tickers": len(tickers), "added": added, "updated": updated, "removed": len(removed),
+        "unchanged": unchanged, "days": int(len(agg["date"])), "seconds": round(time.perf_counter() - t0, 3),
+    }
+
+
+def write_ohlcv(root: Path, tickers: List[str]) -> Dict[str, Any]:
+    """Concatenate the partitions into ohlcv/: one (N, 5) array + date array, index.json last.
+
+    File names carry a generation number, so a process that already mapped the
+    previous files keeps reading a consistent pair until it reopens index.json.
+    The previous generation stays on disk (only older ones are removed): a
+    reader that has read the old index.json but not mapped its files yet can
+    still open them.
+    """
+    out = Path(root) / "ohlcv"
+    out.mkdir(parents=True, exist_ok=True)
+    previous = _load_json(out / "index.json") or {}
+    gen = int(previous.get("generation", 0)) + 1
+    store = TickerStore(root)
+    lengths = [store.manifest["tickers"][t]["rows"] for t in tickers]
+    offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+    dates = np.lib.format.open_memmap(out / f"date-{gen}.npy", mode="w+", dtype=np.int64, shape=(int(offsets[-1]),))
+    ohlcv = np.lib.format.open_memmap(out / f"ohlcv-{gen}.npy", mode="w+", dtype=np.float64,
+                                      shape=(int(offsets[-1]), len(COLUMNS)))
+    for i, ticker in enumerate(tickers):
+        data = store.read(ticker)
+        lo, hi = offsets[i], offsets[i + 1]
+        dates[lo:hi] = data["date"]
+        for j, col in enumerate(COLUMNS):
+            ohlcv[lo:hi, j] = data[col]
+    dates.flush()
+    ohlcv.flush()
+    del dates, ohlcv
+    index = {
+        "format": STORE_FORMAT,
+        "generation": gen,
+        "columns": list(COLUMNS),
+        "date_file": f"date-{gen}.npy",
+        "ohlcv_file": f"ohlcv-{gen}.npy",
+        "tickers": {t: [int(offsets[i]), int(lengths[i])] for i, t in enumerate(tickers)},
+    }
+    _save_json(out / "index.json", index)
+    for path in list(out.glob("date-*.npy")) + list(out.glob("ohlcv-*.npy")):
+        try:
+            stale = int(path.stem.split("-", 1)[1]) < gen - 1
+        except ValueError:
+            continue
+        if stale:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    return index
+
+
+def _ingest_one(job: Tuple[str, str, str]) -> Tuple[str, Dict[str, Any], Optional[Series], Series]:
+    """Worker: read one CSV, replace its partition; returns the old and new close series for the aggregate."""
+    ticker, path, root = job
+    part = Path(root) / "tickers" / ticker
+    old = None
+    if (part / "close.npy").exists():
+        old = (np.load(part / "date.npy"), np.load(part / "close.npy"))
+    st = os.stat(path)
+    arrays = read_ticker_csv(Path(path))
+    entry = {
+        "path": path,
+        "mtime_ns": st.st_mtime_ns,
+        "size": st.st_size,
+        "rows": int(len(arrays["date"])),
+        "first_date": day_to_iso(arrays["date"][0]) if len(arrays["date"]) else None,
+        "last_date": day_to_iso(arrays["date"][-1]) if len(arrays["date"]) else None,
+    }
+    tmp = part.with_name(f".{ticker}.{os.getpid()}")
+    _save_arrays(tmp, arrays)
+    _save_json(tmp / "meta.json", {"mtime_ns": st.st_mtime_ns, "size": st.st_size})
+    if part.exists():
+        shutil.rmtree(part)
+    os.rename(tmp, part)
+    return ticker, entry, old, (arrays["date"], arrays["close"])
+
+
+def _partitions_match(root: Path, tickers: Dict[str, Any]) -> bool:
+    for ticker, entry in tickers.items():
+        meta = _load_json(root / "tickers" / ticker / "meta.json")
+        if meta is None or (meta["mtime_ns"], meta["size"]) != (entry["mtime_ns"], entry["size"]):
+            return False
+    return True
+
+
+def _save_arrays(directory: Path, arrays: Dict[str, np.ndarray]) -> None:
+    directory.mkdir(parents=True, exist_ok=True)
+    for name, values in arrays.items():
+        tmp = directory / f".{name}.npy"
+        np.save(tmp, values, allow_pickle=False)
+        os.replace(tmp, directory / f"{name}.npy")
+
+
+def _save_json(path: Path, payload: Any) -> None:
+    tmp = path.with_name("." + path.name)
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=1)
+    os.replace(tmp, path)
+
+
+def _load_json(path: Path) -> Optional[Any]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
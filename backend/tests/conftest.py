@@ -0,0 +1,90 @@
+"""Fixtures: small sklearn artifacts written to tmp_path.
+
+Run from backend/: ``python -m pytest tests``.
+"""
+import os
+import sys
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pytest
+
+BACKEND = Path(__file__).resolve().parents[1]
+if str(BACKEND) not in sys.path:
+    sys.path.insert(0, str(BACKEND))
+
+from services.feature_specs import bitcoin_features  # noqa: E402
+
+BOROUGHS = ["Barnet", "Camden", "Ealing", "Hackney"]
+
+
+def save_toy_model(path: Path, coef: float) -> None:
+    """toy_model: y = coef * x0 + x1, two features, no feature spec."""
+    from sklearn.linear_model import LinearRegression
+
+    X = np.random.default_rng(0).uniform(0, 10, size=(50, 2))
+    model = LinearRegression().fit(X, coef * X[:, 0] + X[:, 1])
+    old = path.stat() if path.exists() else None
+    joblib.dump({"model": model}, path)
+    if old is not None:
+        # mismo tamaño y quizá el mismo mtime: forzar una versión (mtime_ns, size) más nueva
+        os.utime(path, ns=(time.time_ns(), max(path.stat().st_mtime_ns, old.st_mtime_ns + 1000)))
+
+
+@pytest.fixture
+def model_dir(tmp_path):
+    from sklearn.preprocessing import LabelEncoder
+    from sklearn.tree import DecisionTreeClassifier, DecisionTreeRegressor
+
+    rng = np.random.default_rng(42)
+    out = tmp_path / "models"
+    out.mkdir()
+
+    # month 1..12, day_of_week 0..6, borough_le -> clase (tabla de consulta)
+    X = np.column_stack([rng.integers(1, 13, 400), rng.integers(0, 7, 400), rng.integers(0, len(BOROUGHS), 400)])
+    y = (X[:, 0] + 2 * X[:, 1] + X[:, 2]) % 3
+    encoder = LabelEncoder().fit(BOROUGHS)
+    clf = DecisionTreeClassifier(max_depth=6, random_state=0).fit(X.astype(float), y)
+    joblib.dump({"model": clf, "encoder": encoder}, out / "london_crime_model.joblib")
+
+    # 7 features de bitcoin_features(h) (curva de pronóstico)
+    rows = np.array([bitcoin_features(h) for h in rng.integers(1, 4000, 300)], dtype=float)
+    reg = DecisionTreeRegressor(max_depth=8, random_state=0).fit(rows, rows[:, 0] * 1.01 + rows[:, -1])
+    joblib.dump({"model": reg}, out / "bitcoin_model.joblib")
+
+    save_toy_model(out / "toy_model.joblib", 2.0)
+    return out
+
+
+def write_ticker_csv(path: Path, dates, close, seed: int = 0) -> None:
+    """<TICKER>_data.csv with the columns of datasets/sp500/individual_stocks_5yr."""
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    close = np.asarray(close, dtype=float)
+    pd.DataFrame({
+        "date": pd.to_datetime(list(dates)).strftime("%Y-%m-%d"),
+        "open": close * rng.uniform(0.98, 1.02, len(close)),
+        "high": close * 1.03,
+        "low": close * 0.97,
+        "close": close,
+        "volume": rng.integers(1_000, 100_000, len(close)),
+        "Name": path.name.split("_")[0],
+    }).to_csv(path, index=False)
+
+
+@pytest.fixture
+def ticker_source(tmp_path):
+    """Three tickers with different, gapped business-day ranges."""
+    import pandas as pd
+
+    src = tmp_path / "individual_stocks_5yr"
+    src.mkdir()
+    days = pd.bdate_range("2017-01-02", "2018-06-29")
+    specs = {"AAA": days, "BBB": days[40:], "CCC": days[::2]}
+    for i, (ticker, dates) in enumerate(specs.items()):
+        close = 50 + 10 * i + np.cumsum(np.random.default_rng(i).normal(0, 1, len(dates)))
+        write_ticker_csv(src / f"{ticker}_data.csv", dates, close, seed=i)
+    return src
@@ -0,0 +1,75 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import services.datasets as datasets
+from services.datasets import load_dataset, open_dataset
+
+
+@pytest.fixture
+def csv(tmp_path, monkeypatch):
+    monkeypatch.setattr(datasets, "CACHE_DIR", tmp_path / "cache")
+    monkeypatch.setattr(datasets, "ROW_GROUP_ROWS", 64)
+    path = tmp_path / "crimes.csv"
+    _write(path, 500, seed=0)
+    return path
+
+
+def _write(path, rows, seed):
+    rng = np.random.default_rng(seed)
+    old = path.stat() if path.exists() else None
+    pd.DataFrame({
+        "Year": rng.integers(2001, 2020, rows),
+        "Primary Type": rng.choice(["THEFT", "BATTERY", "ASSAULT", None], rows),
+        "Arrest": rng.random(rows) < 0.3,
+        "Latitude": np.where(rng.random(rows) < 0.1, np.nan, rng.uniform(41.6, 42.1, rows)),
+    }).to_csv(path, index=False)
+    if old is not None:
+        os.utime(path, ns=(time.time_ns(), old.st_mtime_ns + 10**9))
+
+
+def _generations(path):
+    store = open_dataset(path)
+    return sorted(p.name.split("-")[0] for p in store.root.iterdir() if p.is_dir())
+
+
+def test_projection_and_filters_match_read_csv(csv):
+    expected = pd.read_csv(csv)
+    filters = [("Year", ">=", 2010), ("Primary Type", "in", ["THEFT", "ASSAULT"])]
+
+    got = load_dataset(csv, columns=["Year", "Primary Type", "Latitude"], filters=filters)
+
+    mask = (expected["Year"] >= 2010) & expected["Primary Type"].isin(["THEFT", "ASSAULT"])
+    want = expected.loc[mask, ["Year", "Primary Type", "Latitude"]].reset_index(drop=True)
+    pd.testing.assert_frame_equal(got, want, check_dtype=False)
+    pd.testing.assert_frame_equal(load_dataset(csv), expected, check_dtype=False)
+
+
+def test_rebuild_keeps_the_previous_generation(csv):
+    first = open_dataset(csv)  # todavía sin columnas mapeadas
+    _write(csv, 300, seed=1)
+    second = open_dataset(csv)
+
+    assert len(first.read(["Year"])) == 500  # sus archivos siguen en disco
+    assert len(second.read(["Year"])) == 300
+    assert _generations(csv) == ["g1", "g2"]
+
+    _write(csv, 200, seed=2)
+    third = open_dataset(csv)
+    assert _generations(csv) == ["g2", "g3"]
+    assert len(second.read(["Latitude"])) == 300
+    pd.testing.assert_frame_equal(third.read(), pd.read_csv(csv), check_dtype=False)
+
+
+def test_nrows_sample_does_not_build_the_store(csv, monkeypatch):
+    sample = load_dataset(csv, nrows=20)
+
+    assert not datasets.CACHE_DIR.exists()
+    pd.testing.assert_frame_equal(sample, pd.read_csv(csv, nrows=20), check_dtype=False)
+
+    load_dataset(csv, columns=["Year"])
+    monkeypatch.setattr(datasets, "_read_csv_direct", None)  # ya convertido: se lee de la caché
+    assert load_dataset(csv, nrows=20)["Year"].tolist() == sample["Year"].tolist()
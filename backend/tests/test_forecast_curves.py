@@ -0,0 +1,20 @@
+import numpy as np
+
+from services.feature_specs import bitcoin_features
+from services.model_runner import ModelRunner
+
+
+def test_forecast_curve_matches_predict(model_dir):
+    runner = ModelRunner(str(model_dir), lazy=False)
+    curve = runner._derived["bitcoin_model"]["curve"]
+    model = runner.get_package("bitcoin_model")["model"]
+    end = curve.max_horizon + 20  # el tramo final no está en la curva
+
+    out = runner.forecast("bitcoin", start=1, end=end, step=7)
+
+    horizons = list(range(1, end + 1, 7))
+    assert out["horizons"] == horizons
+    expected = model.predict(np.array([bitcoin_features(h) for h in horizons]))
+    np.testing.assert_allclose(out["predictions"], expected)
+    single = runner.predict("bitcoin_model", params={"days": 30})
+    assert single["prediction"][0] == model.predict([bitcoin_features(30)])[0]
@@ -0,0 +1,113 @@
+import json
+import struct
+
+import numpy as np
+import pytest
+
+from services.history import HistoryStore, downsample, encode_binary, encode_json, to_day
+from services.ticker_index import TickerIndex
+from services.ticker_store import ingest
+
+
+@pytest.fixture
+def history(ticker_source, tmp_path):
+    root = tmp_path / "store"
+    ingest(ticker_source, root, workers=1)
+    index = TickerIndex.open(root)
+    return HistoryStore(lambda: index)
+
+
+def _iso(days):
+    return np.asarray(days).astype("datetime64[D]").astype(str).tolist()
+
+
+def test_range_bounds_are_inclusive(history):
+    full = history.series("AAA")
+    dates = np.asarray(full.dates)
+
+    exact = history.query("aaa", start=_iso(dates[10]), end=_iso(dates[20]))
+    np.testing.assert_array_equal(exact.dates, dates[10:21])
+    np.testing.assert_array_equal(exact.ohlcv, np.asarray(full.ohlcv)[10:21])
+
+    # 2017-01-07 es sábado: el rango empieza en el lunes siguiente y termina el viernes anterior
+    between = history.query("AAA", start="2017-01-07", end="2017-01-14")
+    assert _iso(between.dates) == ["2017-01-09", "2017-01-10", "2017-01-11", "2017-01-12", "2017-01-13"]
+
+
+def test_open_and_out_of_range_bounds(history):
+    dates = np.asarray(history.series("BBB").dates)
+    assert len(history.query("BBB").dates) == len(dates)
+    np.testing.assert_array_equal(history.query("BBB", start="1990-01-01", end="2030-01-01").dates, dates)
+    np.testing.assert_array_equal(history.query("BBB", end=_iso(dates[0])).dates, dates[:1])
+    np.testing.assert_array_equal(history.query("BBB", start=_iso(dates[-1])).dates, dates[-1:])
+    assert len(history.query("BBB", end="2000-01-01").dates) == 0
+    assert len(history.query("BBB", start="2018-06-01", end="2018-05-01").dates) == 0
+
+
+def test_unknown_symbol(history):
+    with pytest.raises(KeyError):
+        history.query("NOPE")
+
+
+def test_downsample_matches_brute_force():
+    rng = np.random.default_rng(3)
+    n, points = 1000, 37
+    dates = np.arange(n, dtype=np.int64) + 17000
+    ohlcv = rng.uniform(1, 100, size=(n, 5))
+    ohlcv[rng.integers(0, n, 30), 1] = np.nan
+
+    d, out = downsample(dates, ohlcv, points)
+
+    starts = np.unique(np.linspace(0, n, points, endpoint=False).astype(np.int64))
+    bounds = list(starts) + [n]
+    assert len(d) == points
+    for i, (lo, hi) in enumerate(zip(bounds[:-1], bounds[1:])):
+        bucket = ohlcv[lo:hi]
+        assert d[i] == dates[lo]
+        assert out[i, 0] == bucket[0, 0]
+        assert out[i, 1] == np.nanmax(bucket[:, 1])
+        assert out[i, 2] == bucket[:, 2].min()
+        assert out[i, 3] == bucket[-1, 3]
+        assert out[i, 4] == pytest.approx(bucket[:, 4].sum())
+
+
+def test_downsample_keeps_short_ranges(history):
+    full = history.query("CCC")
+    again = history.query("CCC", points=len(full.dates) + 5)
+    np.testing.assert_array_equal(again.dates, full.dates)
+    assert len(history.query("CCC", points=10).dates) == 10
+
+
+def test_encoders_round_trip(history):
+    result = history.query("AAA", start="2018-01-01", end="2018-01-31")
+
+    payload = json.loads(b"".join(encode_json(result)))
+    assert payload["rows"] == len(result.dates)
+    assert payload["date"] == _iso(result.dates)
+    np.testing.assert_allclose(payload["close"], result.ohlcv[:, 3])
+
+    body = b"".join(encode_binary(result))
+    assert body[:4] == b"OHLC"
+    (size,) = struct.unpack("<I", body[4:8])
+    header = json.loads(body[8:8 + size])
+    data = body[8 + size:]
+    cols = {c["name"]: np.frombuffer(data, dtype=c["dtype"], count=header["rows"], offset=c["offset"])
+            for c in header["columns"]}
+    np.testing.assert_array_equal(cols["date"], result.dates)
+    np.testing.assert_array_equal(cols["volume"], result.ohlcv[:, 4])
+
+
+def test_to_day():
+    assert to_day("1970-01-02") == 1
+    assert to_day(19000) == 19000
+
+
+@pytest.mark.parametrize("points", [None, 0, -5, 10**6])
+def test_row_limit_without_effective_downsampling(history, monkeypatch, points):
+    import services.history as h
+
+    monkeypatch.setattr(h, "HISTORY_MAX_ROWS", 50)
+    with pytest.raises(ValueError):
+        history.query("AAA", points=points)
+    assert len(history.query("AAA", points=50).dates) == 50
+    assert len(history.query("AAA", start="2018-06-01").dates) <= 50
@@ -0,0 +1,28 @@
+from conftest import save_toy_model
+from services.model_runner import ModelRunner
+
+
+def test_reload_changed_picks_up_new_artifact(model_dir):
+    runner = ModelRunner(str(model_dir), lazy=False)
+    old = runner.get_package("toy_model")
+    runner.predict("toy_model", features=[1.0, 0.0])
+    save_toy_model(model_dir / "toy_model.joblib", 3.0)
+
+    summary = runner.reload_changed(settle_seconds=0)
+
+    assert summary["reloaded"] == ["toy_model"]
+    assert runner.get_package("toy_model") is not old
+    assert abs(runner.predict("toy_model", features=[1.0, 0.0])["prediction"][0] - 3.0) < 1e-6
+
+
+def test_reload_changed_skips_unsettled_and_retires_removed(model_dir):
+    runner = ModelRunner(str(model_dir), lazy=False)
+    save_toy_model(model_dir / "toy_model.joblib", 3.0)
+
+    # recién escrito: el trainer podría seguir escribiendo
+    assert runner.reload_changed(settle_seconds=60)["reloaded"] == []
+
+    (model_dir / "bitcoin_model.joblib").unlink()
+    summary = runner.reload_changed(settle_seconds=60)
+    assert summary["removed"] == ["bitcoin_model"]
+    assert "bitcoin_model" not in runner.get_available_models()
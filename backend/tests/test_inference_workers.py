@@ -0,0 +1,112 @@
+import os
+import signal
+
+import numpy as np
+import pytest
+
+from conftest import save_toy_model
+from services.inference_workers import WorkerPool, _handle
+from services.model_runner import ModelRunner
+
+
+@pytest.fixture
+def pool(model_dir):
+    runner = ModelRunner(str(model_dir), lazy=True)
+    pool = WorkerPool(runner, 2, models=["toy_model"], health_interval=0, timeout=20)
+    pool.start()
+    yield pool
+    pool.shutdown()
+
+
+def _restarts(pool):
+    return sum(w["restarts"] for w in pool.health())
+
+
+def _kill(worker):
+    os.kill(worker.pid, signal.SIGKILL)
+    worker.process.join(5)
+
+
+def test_workers_are_not_forked_from_the_api_process(pool):
+    assert pool._ctx.get_start_method() in ("forkserver", "spawn")
+    assert all(w["alive"] and w["pid"] != os.getpid() for w in pool.health())
+
+
+def test_batch_goes_through_shared_memory(pool):
+    results = pool.predict_batch("toy_model", features=[[1.0, 2.0], [3.0, 0.0]])
+    assert [round(r["prediction"][0], 6) for r in results] == [4.0, 6.0]
+
+
+def test_request_is_retried_when_the_worker_dies(pool):
+    acquire = pool._acquire
+    killed = []
+
+    def acquire_and_kill():
+        # el worker muere después de ser elegido: la petición falla en él y se reintenta
+        worker = acquire()
+        if not killed:
+            _kill(worker)
+            killed.append(worker.index)
+        return worker
+
+    pool._acquire = acquire_and_kill
+    result = pool.predict("toy_model", features=[1.0, 2.0])
+
+    assert round(result["prediction"][0], 6) == 4.0
+    assert killed and _restarts(pool) == 1
+    assert all(w["alive"] for w in pool.health())
+
+
+def test_dead_idle_worker_is_restarted(pool):
+    for worker in pool._workers:
+        _kill(worker)
+
+    result = pool.predict_batch("toy_model", params=None, features=[[0.0, 1.0]])
+
+    assert round(result[0]["prediction"][0], 6) == 1.0
+    assert pool.check_health() and all(w["alive"] for w in pool.health())
+    assert _restarts(pool) == 2
+
+
+def _toy_request(runner, version):
+    req, resp = np.zeros(16), np.zeros(16)
+    req[:2] = [1.0, 2.0]
+    meta = _handle(runner, req, resp, ("features", "toy_model", version, (1, 2)))
+    return meta, float(resp[0])
+
+
+def _count_reloads(monkeypatch, runner):
+    reloads = []
+    reload = runner.reload_model
+    monkeypatch.setattr(runner, "reload_model", lambda name: reloads.append(name) or reload(name))
+    return reloads
+
+
+def test_worker_with_newer_artifact_does_not_reload_for_stale_api(model_dir, monkeypatch):
+    api = ModelRunner(str(model_dir), lazy=False)
+    stale = api.artifact_version("toy_model")
+    save_toy_model(model_dir / "toy_model.joblib", 5.0)  # la API no recarga (sin watcher)
+    worker = ModelRunner(str(model_dir), lazy=True)  # worker reiniciado: lee el archivo nuevo
+    worker.get_package("toy_model")
+    reloads = _count_reloads(monkeypatch, worker)
+
+    for _ in range(3):
+        meta, pred = _toy_request(worker, stale)
+        assert meta["rows"] == 1 and abs(pred - 7.0) < 1e-6
+
+    assert reloads == []
+
+
+def test_worker_reloads_when_api_has_newer_artifact(model_dir, monkeypatch):
+    worker = ModelRunner(str(model_dir), lazy=True)
+    worker.get_package("toy_model")
+    save_toy_model(model_dir / "toy_model.joblib", 5.0)
+    api = ModelRunner(str(model_dir), lazy=False)
+    reloads = _count_reloads(monkeypatch, worker)
+
+    for _ in range(3):
+        _, pred = _toy_request(worker, api.artifact_version("toy_model"))
+        assert abs(pred - 7.0) < 1e-6
+
+    assert reloads == ["toy_model"]
+    assert worker.artifact_version("toy_model") == api.artifact_version("toy_model")
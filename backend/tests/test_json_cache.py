@@ -0,0 +1,75 @@
+import pytest
+
+from services.json_cache import VersionedJsonCache, etag_matches
+
+
+def test_rebuilds_only_when_version_changes():
+    cache = VersionedJsonCache()
+    version = {"v": 1}
+    builds = []
+
+    def build():
+        builds.append(version["v"])
+        return {"items": [version["v"]]}
+
+    first = cache.get("meta", lambda: version["v"], build)
+    again = cache.get("meta", lambda: version["v"], build)
+    version["v"] = 2
+    changed = cache.get("meta", lambda: version["v"], build)
+
+    assert builds == [1, 2]
+    assert again is first
+    assert changed.etag != first.etag
+    assert changed.body == b'{"items":[2]}'
+
+
+def test_etag_depends_only_on_the_body():
+    a = VersionedJsonCache().get("x", lambda: "v1", lambda: {"k": "ñ"})
+    b = VersionedJsonCache().get("x", lambda: "other", lambda: {"k": "ñ"})
+    assert a.etag == b.etag
+
+
+def test_none_version_is_not_stored():
+    cache = VersionedJsonCache()
+    cache.get("meta", lambda: None, lambda: {})
+    cache.get("meta", lambda: None, lambda: {})
+    assert cache.stats()["builds"] == 2
+    assert cache.stats()["entries"] == {}
+
+
+@pytest.mark.parametrize("header,expected", [
+    (None, False),
+    ('"abc"', True),
+    ('W/"abc"', True),
+    ('"zzz", "abc"', True),
+    ("*", True),
+    ('"abcd"', False),
+])
+def test_etag_matches(header, expected):
+    assert etag_matches(header, '"abc"') is expected
+
+
+def test_metadata_endpoint_answers_304(monkeypatch):
+    monkeypatch.setenv("WARMUP_ON_STARTUP", "0")
+    fastapi_testclient = pytest.importorskip("fastapi.testclient")
+    import app
+
+    builds = []
+    monkeypatch.setitem(app.META_PAYLOADS, "meta_airports",
+                        (lambda: "v1", lambda: builds.append(1) or {"origins": ["JFK", "LAX"]}))
+    app.meta_cache.invalidate("meta_airports")
+    client = fastapi_testclient.TestClient(app.app)
+
+    first = client.get("/api/v1/meta/airports")
+    assert first.status_code == 200
+    assert first.json() == {"origins": ["JFK", "LAX"]}
+    etag = first.headers["etag"]
+
+    revalidated = client.get("/api/v1/meta/airports", headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+    assert revalidated.headers["etag"] == etag
+
+    stale = client.get("/api/v1/meta/airports", headers={"If-None-Match": '"old"'})
+    assert stale.status_code == 200
+    assert builds == [1]
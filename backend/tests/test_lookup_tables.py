@@ -0,0 +1,31 @@
+import numpy as np
+
+from services.lookup_tables import LookupTable
+from services.model_runner import ModelRunner
+
+
+def test_lookup_table_matches_predict(model_dir):
+    runner = ModelRunner(str(model_dir), lazy=False)
+    assert "lookup" in runner._derived["london_crime_model"]
+    model = runner.get_package("london_crime_model")["model"]
+    grid = np.array([[m, d, b] for m in range(1, 13) for d in range(7) for b in range(4)], dtype=float)
+    # fuera del dominio tabulado (mes 13, valor no entero, borough -1): pasan por el modelo
+    outside = np.array([[13, 0, 0], [2.5, 3, 1], [6, 2, -1]], dtype=float)
+    X = np.vstack([outside[:1], grid, outside[1:]])
+
+    results = runner.predict_batch("london_crime_model", features=X.tolist())
+
+    assert [r["prediction"][0] for r in results] == model.predict(X).tolist()
+    np.testing.assert_array_equal(np.array([r["proba"][0] for r in results]), model.predict_proba(X))
+
+
+def test_lookup_table_mask():
+    class Sum:
+        def predict(self, X):
+            return X.sum(axis=1)
+
+    table = LookupTable.build(Sum(), [(0, 3), (1, 2)])
+    mask, pred, proba = table.lookup(np.array([[0, 1], [3, 2], [4, 1], [1.5, 1]]))
+    assert mask.tolist() == [True, True, False, False]
+    assert pred.tolist() == [1, 5]
+    assert proba is None
@@ -0,0 +1,94 @@
+import asyncio
+import gc
+
+import pytest
+
+from services.micro_batcher import MicroBatcher
+
+
+class FakeBatch:
+    """predict_batch stand-in: one call per lote, filas con 'bad' fallan."""
+
+    def __init__(self, delay: float = 0.0):
+        self.calls = []
+        self.delay = delay
+
+    async def __call__(self, model_name, features=None, params=None):
+        rows = features if features is not None else params
+        self.calls.append(list(rows))
+        await asyncio.sleep(self.delay)
+        if any(r == "bad" for r in rows):
+            raise ValueError("fila inválida")
+        return [{"model": model_name, "input": r, "prediction": [sum(r)]} for r in rows]
+
+
+def test_concurrent_rows_share_one_call():
+    fake = FakeBatch()
+    batcher = MicroBatcher(fake, max_wait_ms=20, max_batch_size=64)
+
+    async def main():
+        return await asyncio.gather(*(batcher.predict("m", features=[i, 1]) for i in range(10)))
+
+    results = asyncio.run(main())
+
+    assert len(fake.calls) == 1
+    assert [r["prediction"][0] for r in results] == [i + 1 for i in range(10)]
+    assert batcher.stats()["max_batch"] == 10
+
+
+def test_full_batch_flushes_without_waiting():
+    fake = FakeBatch()
+    batcher = MicroBatcher(fake, max_wait_ms=10_000, max_batch_size=4)
+
+    async def main():
+        return await asyncio.wait_for(asyncio.gather(*(batcher.predict("m", features=[i]) for i in range(8))), 2)
+
+    assert len(asyncio.run(main())) == 8
+    assert [len(c) for c in fake.calls] == [4, 4]
+
+
+def test_invalid_row_only_fails_its_caller():
+    fake = FakeBatch()
+    batcher = MicroBatcher(fake, max_wait_ms=10)
+
+    async def main():
+        return await asyncio.gather(batcher.predict("m", features=[1]), batcher.predict("m", features="bad"),
+                                    batcher.predict("m", features=[2]), return_exceptions=True)
+
+    ok1, bad, ok2 = asyncio.run(main())
+
+    assert ok1["prediction"] == [1] and ok2["prediction"] == [2]
+    assert isinstance(bad, ValueError)
+    assert batcher.stats()["fallbacks"] == 1
+
+
+def test_running_batches_are_referenced_until_done():
+    fake = FakeBatch(delay=0.05)
+    batcher = MicroBatcher(fake, max_wait_ms=0)
+
+    async def main():
+        pending = asyncio.ensure_future(batcher.predict("m", features=[3]))
+        await asyncio.sleep(0.01)
+        gc.collect()
+        assert len(batcher._tasks) == 1
+        result = await pending
+        await asyncio.sleep(0)
+        return result
+
+    assert asyncio.run(main())["prediction"] == [3]
+    assert batcher._tasks == set()
+
+
+@pytest.mark.parametrize("delay", [0.0, 0.05])
+def test_close_answers_queued_and_running_rows(delay):
+    fake = FakeBatch(delay=delay)
+    batcher = MicroBatcher(fake, max_wait_ms=10_000)
+
+    async def main():
+        pending = [asyncio.ensure_future(batcher.predict("m", features=[i])) for i in range(3)]
+        await asyncio.sleep(0)
+        await batcher.close()
+        assert all(p.done() for p in pending)
+        return [p.result()["prediction"][0] for p in pending]
+
+    assert asyncio.run(main()) == [0, 1, 2]
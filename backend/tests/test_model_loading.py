@@ -0,0 +1,65 @@
+import threading
+
+from services.model_runner import ModelRunner
+
+
+def _cached_models(runner):
+    return {key[0] for key in runner.prediction_cache._data}
+
+
+def test_lazy_mode_loads_on_first_use(model_dir):
+    runner = ModelRunner(str(model_dir), lazy=True)
+    assert runner.models == {}
+    assert sorted(runner.get_available_models()) == ["bitcoin_model", "london_crime_model", "toy_model"]
+
+    runner.predict("toy_model", features=[1.0, 2.0])
+
+    assert list(runner.models) == ["toy_model"]
+
+
+def test_concurrent_lazy_loads_read_the_artifact_once(model_dir, monkeypatch):
+    runner = ModelRunner(str(model_dir), lazy=True)
+    loads = []
+    load = runner._load_model
+    monkeypatch.setattr(runner, "_load_model", lambda name, **kw: loads.append(name) or load(name, **kw))
+    threads = [threading.Thread(target=runner.get_package, args=("toy_model",)) for _ in range(8)]
+    threads += [threading.Thread(target=runner.get_package, args=("london_crime_model",))]
+
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sorted(loads) == ["london_crime_model", "toy_model"]
+
+
+def test_eviction_drops_prediction_cache(model_dir):
+    # presupuesto mínimo: cada carga desaloja a los demás modelos
+    runner = ModelRunner(str(model_dir), lazy=True, memory_budget_mb=1e-6)
+    runner.predict("toy_model", features=[1.0, 2.0])
+    assert _cached_models(runner) == {"toy_model"}
+
+    runner.get_package("london_crime_model")
+
+    assert list(runner.models) == ["london_crime_model"]
+    assert "toy_model" not in _cached_models(runner)
+    # el modelo desalojado se vuelve a cargar en su próximo uso
+    assert abs(runner.predict("toy_model", features=[1.0, 2.0])["prediction"][0] - 4.0) < 1e-6
+
+
+def test_lazy_loads_use_the_structural_estimate(model_dir, monkeypatch):
+    import services.model_runner as mr
+
+    # el RSS del proceso crece por lo que cargan otros hilos: no debe atribuirse al modelo
+    rss = iter(range(10**9, 10**12, 10**8))
+    monkeypatch.setattr(mr, "current_rss_bytes", lambda: next(rss))
+    runner = ModelRunner(str(model_dir), lazy=True)
+    threads = [threading.Thread(target=runner.get_package, args=(n,)) for n in ("toy_model", "bitcoin_model")]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    for name in ("toy_model", "bitcoin_model"):
+        derived = sum(getattr(v, "nbytes", 0) for v in runner._derived[name].values())
+        assert runner._footprints[name] == mr.estimate_nbytes(runner.models[name]) + derived
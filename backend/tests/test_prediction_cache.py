@@ -0,0 +1,70 @@
+from conftest import save_toy_model
+from services.model_runner import ModelRunner
+from services.prediction_cache import PredictionCache
+
+
+def _cached_models(runner):
+    return {key[0] for key in runner.prediction_cache._data}
+
+
+def test_lru_eviction_and_invalidate():
+    cache = PredictionCache(max_entries=2, ttl_seconds=0)
+    cache.put(("a", 1, (1.0,)), "x")
+    cache.put(("a", 1, (2.0,)), "y")
+    assert cache.get(("a", 1, (1.0,))) == "x"  # pasa a ser el más reciente
+    cache.put(("b", 1, (1.0,)), "z")
+
+    assert cache.get(("a", 1, (2.0,))) is None
+    assert cache.get(("a", 1, (1.0,))) == "x"
+    assert cache.invalidate("a") == 1
+    assert cache.get(("b", 1, (1.0,))) == "z"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_expiration(monkeypatch):
+    import services.prediction_cache as pc
+
+    now = [1000.0]
+    monkeypatch.setattr(pc.time, "monotonic", lambda: now[0])
+    cache = PredictionCache(max_entries=10, ttl_seconds=5)
+    cache.put("k", "v")
+    now[0] += 4
+    assert cache.get("k") == "v"
+    now[0] += 2
+    assert cache.get("k") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_reload_invalidates_prediction_cache(model_dir):
+    runner = ModelRunner(str(model_dir), lazy=False)
+    first = runner.predict("toy_model", features=[1.0, 2.0])["prediction"][0]
+    assert runner.predict("toy_model", features=[1.0, 2.0])["prediction"][0] == first
+    assert runner.prediction_cache.stats()["hits"] == 1
+
+    save_toy_model(model_dir / "toy_model.joblib", 5.0)
+    assert runner.reload_model("toy_model")
+
+    assert "toy_model" not in _cached_models(runner)
+    second = runner.predict("toy_model", features=[1.0, 2.0])["prediction"][0]
+    assert abs(first - 4.0) < 1e-6 and abs(second - 7.0) < 1e-6
+
+
+def test_lazy_first_prediction_is_cached_under_loaded_version(model_dir):
+    runner = ModelRunner(str(model_dir), lazy=True)
+    runner.predict("toy_model", features=[1.0, 2.0])
+
+    keys = list(runner.prediction_cache._data)
+    assert [(k[0], k[1]) for k in keys] == [("toy_model", runner.artifact_version("toy_model"))]
+
+
+def test_batch_scores_only_uncached_rows(model_dir, monkeypatch):
+    runner = ModelRunner(str(model_dir), lazy=False)
+    runner.predict_batch("toy_model", features=[[1.0, 0.0], [2.0, 0.0]])
+    scored = []
+    call = runner._call_model
+    monkeypatch.setattr(runner, "_call_model", lambda name, model, X: scored.append(len(X)) or call(name, model, X))
+
+    results = runner.predict_batch("toy_model", features=[[1.0, 0.0], [3.0, 0.0], [2.0, 0.0]])
+
+    assert scored == [1]
+    assert [round(r["prediction"][0], 6) for r in results] == [2.0, 6.0, 4.0]
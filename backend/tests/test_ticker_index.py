@@ -0,0 +1,34 @@
+import os
+import time
+
+import numpy as np
+
+from services.ticker_index import CLOSE, TickerIndex
+from services.ticker_store import ingest, read_ticker_csv
+
+
+def _touch(path):
+    st = path.stat()
+    os.utime(path, ns=(time.time_ns(), st.st_mtime_ns + 10**9))
+
+
+def test_ohlcv_index_keeps_previous_generation(ticker_source, tmp_path):
+    root = tmp_path / "store"
+    ingest(ticker_source, root, workers=1)
+    first = TickerIndex.open(root)
+    aaa = ticker_source / "AAA_data.csv"
+    for _ in range(2):
+        _touch(aaa)
+        ingest(ticker_source, root, workers=1)
+
+    files = sorted(p.name for p in (root / "ohlcv").glob("*.npy"))
+    assert files == ["date-2.npy", "date-3.npy", "ohlcv-2.npy", "ohlcv-3.npy"]
+    index = TickerIndex.open(root)
+    assert index.generation == 3
+    for ticker in ("AAA", "BBB", "CCC"):
+        dates, ohlcv = index.slice(ticker)
+        csv = read_ticker_csv(ticker_source / f"{ticker}_data.csv")
+        np.testing.assert_array_equal(dates, csv["date"])
+        np.testing.assert_array_equal(ohlcv[:, CLOSE], csv["close"])
+    # un índice abierto antes sigue leyendo sus archivos ya mapeados
+    assert len(first.slice("AAA")[0]) == len(index.slice("AAA")[0])
@@ -0,0 +1,79 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from conftest import write_ticker_csv
+from services.ticker_store import TickerStore, ingest, read_ticker_csv
+
+
+def _expected_aggregate(source):
+    frames = [pd.read_csv(p, usecols=["date", "close"]) for p in sorted(source.glob("*_data.csv"))]
+    df = pd.concat(frames)
+    grouped = df.groupby(pd.to_datetime(df["date"]))["close"]
+    days = grouped.sum().index.to_numpy(dtype="datetime64[D]").astype(np.int64)
+    return days, grouped.sum().to_numpy(), grouped.count().to_numpy()
+
+
+def _assert_aggregate(root, source):
+    agg = TickerStore(root).daily_aggregate()
+    days, sums, counts = _expected_aggregate(source)
+    np.testing.assert_array_equal(agg["date"], days)
+    np.testing.assert_allclose(agg["sum"], sums, rtol=1e-12)
+    np.testing.assert_array_equal(agg["count"], counts)
+
+
+def _touch(path):
+    st = path.stat()
+    os.utime(path, ns=(time.time_ns(), st.st_mtime_ns + 10**9))
+
+
+def test_initial_ingest(ticker_source, tmp_path):
+    root = tmp_path / "store"
+    summary = ingest(ticker_source, root, workers=1)
+
+    assert (summary["added"], summary["updated"], summary["unchanged"]) == (3, 0, 0)
+    store = TickerStore(root)
+    assert store.tickers() == ["AAA", "BBB", "CCC"]
+    csv = read_ticker_csv(ticker_source / "BBB_data.csv")
+    part = store.read("BBB")
+    np.testing.assert_array_equal(part["date"], csv["date"])
+    np.testing.assert_array_equal(part["close"], csv["close"])
+    _assert_aggregate(root, ticker_source)
+
+
+def test_incremental_update_and_removal(ticker_source, tmp_path):
+    root = tmp_path / "store"
+    ingest(ticker_source, root, workers=1)
+
+    # BBB: cambia un cierre y agrega un día nuevo; los demás no se vuelven a leer
+    bbb = ticker_source / "BBB_data.csv"
+    df = pd.read_csv(bbb)
+    df.loc[5, "close"] += 100.0
+    df = pd.concat([df, df.tail(1).assign(date="2018-07-02", close=77.0)])
+    df.to_csv(bbb, index=False)
+    _touch(bbb)
+    summary = ingest(ticker_source, root, workers=1)
+    assert (summary["updated"], summary["unchanged"], summary["added"]) == (1, 2, 0)
+    _assert_aggregate(root, ticker_source)
+
+    unchanged = ingest(ticker_source, root, workers=1)
+    assert (unchanged["updated"], unchanged["unchanged"]) == (0, 3)
+
+    (ticker_source / "CCC_data.csv").unlink()
+    removed = ingest(ticker_source, root, workers=1)
+    assert removed["removed"] == 1 and removed["tickers"] == 2
+    assert TickerStore(root).tickers() == ["AAA", "BBB"]
+    _assert_aggregate(root, ticker_source)
+
+
+def test_new_ticker_is_added(ticker_source, tmp_path):
+    root = tmp_path / "store"
+    ingest(ticker_source, root, workers=1)
+    write_ticker_csv(ticker_source / "DDD_data.csv", pd.bdate_range("2018-01-01", periods=30), np.arange(30) + 10.0)
+
+    summary = ingest(ticker_source, root, workers=1)
+
+    assert (summary["added"], summary["unchanged"]) == (1, 3)
+    _assert_aggregate(root, ticker_source)